@@ -0,0 +1,212 @@
+"""
+Thread Layout Benchmark - Inference Latency Variance
+Runs the detector in a fresh process per thread layout while a camera
+decode thread and periodic servo cycles (real bin_routing.Node against a
+local HTTP stand-in) compete for the cores, then reports p50/p99/std and
+the p99 while a servo cycle is in flight for each layout.
+
+    python benchmark_affinity.py                          (search layouts)
+    python benchmark_affinity.py --layout "torch=3;inference=1-3;capture=0;io=0"
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import csv
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from thread_affinity import AffinityManager, available_cores, format_layout, parse_layout, DEFAULT_LAYOUT
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+FRAMES = 400
+FRAME_SHAPE = (720, 1280, 3)
+CONF_THRESHOLD = 0.60
+INFERENCE_IMGSZ = 640
+WARMUP_RUNS = 10
+CAMERA_FPS = 30
+SERVO_PERIOD = 2.0              # Seconds between simulated triggers
+SERVO_DWELL = 0.5               # Open → close inside one cycle
+OUTPUT_DIR = 'runs/benchmark'
+
+
+class ServoStub(BaseHTTPRequestHandler):
+    """Answers /servo1?angle=.. like the ESP8266 web server"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'OK')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def candidate_layouts(cores):
+    """Defaults, pool-size-only layouts, and split layouts for this core set"""
+    n = len(cores)
+    layouts = [DEFAULT_LAYOUT]
+    for threads in sorted({1, max(1, n // 2), max(1, n - 1), n}):
+        layouts.append(DEFAULT_LAYOUT._replace(torch_threads=threads))
+    if n >= 2:
+        # Inference on the top cores, capture + I/O share the rest
+        for k in sorted({n - 1, max(1, n // 2)}, reverse=True):
+            rest = tuple(cores[:n - k])
+            layouts.append(DEFAULT_LAYOUT._replace(torch_threads=k, opencv_threads=1,
+                                                   inference=tuple(cores[n - k:]), capture=rest, io=rest))
+    if n >= 3:
+        # Capture and I/O each get a core of their own
+        layouts.append(DEFAULT_LAYOUT._replace(torch_threads=n - 2, opencv_threads=1, inference=tuple(cores[2:]),
+                                               capture=(cores[0],), io=(cores[1],)))
+    return layouts
+
+
+def load_frames(replay_path, count):
+    """Frames from a replay source, or seeded noise frames when none is given"""
+    if replay_path:
+        from frame_sources import ReplaySource
+        source = ReplaySource(replay_path, size=(FRAME_SHAPE[1], FRAME_SHAPE[0]))
+        return [source.read()[1] for _ in range(count)]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, FRAME_SHAPE, dtype=np.uint8) for _ in range(min(count, 16))]
+
+
+def layout_worker(spec, replay_path, frames_count, servo_port, queue):
+    """Fresh interpreter: apply the layout, load + warm the model, time frames under load"""
+    affinity = AffinityManager(spec).apply()
+    import cv2
+    from ultralytics import YOLO
+    from inference_buffers import LetterboxBuffers, warm_up
+    from bin_routing import Node
+
+    frames = load_frames(replay_path, frames_count)
+    model = YOLO(MODEL_PATH)
+    buffers = LetterboxBuffers(FRAME_SHAPE, INFERENCE_IMGSZ)
+    warm_up(model, buffers, WARMUP_RUNS)
+
+    stop = threading.Event()
+    in_cycle = threading.Event()
+
+    def camera_load():
+        """MJPEG decode at camera rate, like CameraCapture's grab thread"""
+        jpegs = [cv2.imencode('.jpg', frame)[1] for frame in frames[:8]]
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            cv2.imdecode(jpegs[i % len(jpegs)], cv2.IMREAD_COLOR)
+            i += 1
+            time.sleep(max(0.0, 1.0 / CAMERA_FPS - (time.perf_counter() - start)))
+
+    node = Node('bench', '127.0.0.1', servo_port, timeout=2, pool_size=2)
+
+    def servo_cycle():
+        in_cycle.set()
+        try:
+            node.set_angle('servo1', 0)
+            time.sleep(SERVO_DWELL)
+            node.set_angle('servo1', 180)
+        finally:
+            in_cycle.clear()
+
+    def servo_load():
+        while not stop.wait(SERVO_PERIOD):
+            node.executor.submit(servo_cycle)
+
+    threading.Thread(target=camera_load, name='camera-grab', daemon=True).start()
+    threading.Thread(target=servo_load, name='node-bench-trigger', daemon=True).start()
+    affinity.refresh()
+
+    latencies = np.empty(frames_count, dtype=np.float64)
+    during_cycle = np.zeros(frames_count, dtype=bool)
+    for i in range(frames_count):
+        affinity.maybe_refresh()
+        frame = frames[i % len(frames)]
+        cycling = in_cycle.is_set()
+        start = time.perf_counter()
+        results = model(buffers.prepare(frame), conf=CONF_THRESHOLD, verbose=False)
+        buffers.scale_boxes(results[0].boxes.xyxy.cpu().numpy())
+        latencies[i] = (time.perf_counter() - start) * 1000
+        during_cycle[i] = cycling or in_cycle.is_set()
+    stop.set()
+    node.executor.shutdown(wait=True)
+    queue.put((latencies.tolist(), during_cycle.tolist(), affinity.pinning, affinity.errors))
+
+
+def summarize(latencies, during_cycle):
+    latencies = np.asarray(latencies)
+    during_cycle = np.asarray(during_cycle, dtype=bool)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    busy = latencies[during_cycle]
+    idle = latencies[~during_cycle]
+    return {
+        'p50_ms': p50,
+        'p99_ms': p99,
+        'std_ms': latencies.std(),
+        'max_ms': latencies.max(),
+        'idle_p99_ms': np.percentile(idle, 99) if len(idle) else float('nan'),
+        'servo_p99_ms': np.percentile(busy, 99) if len(busy) else float('nan'),
+        'servo_frames': int(during_cycle.sum()),
+    }
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Inference latency variance per thread/core layout')
+    parser.add_argument('--layout', action='append', help='Layout spec to test (repeatable); default: search')
+    parser.add_argument('--replay', help='Video or image folder to use instead of noise frames')
+    parser.add_argument('--frames', type=int, default=FRAMES)
+    args = parser.parse_args()
+
+    cores = available_cores()
+    layouts = [parse_layout(spec) for spec in args.layout] if args.layout else candidate_layouts(cores)
+
+    print("="*80)
+    print("THREAD LAYOUT BENCHMARK")
+    print("="*80)
+    print(f"  Cores: {len(cores)} ({', '.join(map(str, cores))})")
+    print(f"  Layouts: {len(layouts)} | {args.frames} frames each | servo cycle every {SERVO_PERIOD:g}s")
+    if not hasattr(os, 'sched_setaffinity'):
+        print("  ⚠️  No per-thread pinning on this OS - only pool sizes differ between layouts")
+
+    # The ESP stand-in lives in this process, off the measured one
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ServoStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    ctx = multiprocessing.get_context('spawn')
+    rows = []
+    for layout in layouts:
+        spec = format_layout(layout)
+        print(f"\n▶️  {spec} (fresh process)...")
+        queue = ctx.Queue()
+        worker = ctx.Process(target=layout_worker, args=(spec, args.replay, args.frames, port, queue))
+        worker.start()
+        latencies, during_cycle, pinned, errors = queue.get()
+        worker.join()
+        row = {'layout': spec, 'pinned': pinned, 'pin_errors': errors}
+        row.update(summarize(latencies, during_cycle))
+        rows.append(row)
+    server.shutdown()
+
+    rows.sort(key=lambda row: (row['std_ms'], row['p99_ms']))
+    print(f"\n{'='*80}")
+    print("⏱️  INFERENCE LATENCY PER LAYOUT (ms, lowest variance first)")
+    print("="*80)
+    print(f"{'Layout':<46} {'p50':<7} {'p99':<7} {'Std':<7} {'Servo p99':<10}")
+    print("-"*80)
+    for row in rows:
+        print(f"{row['layout']:<46} {row['p50_ms']:<7.1f} {row['p99_ms']:<7.1f} {row['std_ms']:<7.2f} "
+              f"{row['servo_p99_ms']:<10.1f}")
+    print("="*80)
+    print(f"Best: AFFINITY_LAYOUT = '{rows[0]['layout']}'")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    csv_path = Path(OUTPUT_DIR) / f"affinity_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n✓ Results saved: {csv_path}")
@@ -0,0 +1,116 @@
+"""
+Camera Capture Benchmark
+Compares the default VideoCapture setup against explicit MJPEG / buffer /
+threaded-decode settings and reports capture-to-availability latency
+"""
+from frame_sources import CameraCapture, FakeCameraDevice
+import argparse
+import time
+import cv2
+import numpy as np
+
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 720
+DURATION = 10.0                 # seconds per configuration
+CONSUMER_WORK_MS = 40           # Simulated per-frame inference time in the reader
+
+# name → CameraCapture settings (the plain VideoCapture baseline runs first)
+CONFIGS = {
+    'mjpg + buffer 1':    {'fourcc': 'MJPG', 'fps': 30, 'buffer_size': 1, 'decode_threads': 0},
+    'mjpg + buffer 1 + decode pool': {'fourcc': 'MJPG', 'fps': 30, 'buffer_size': 1, 'decode_threads': 2},
+}
+
+
+def run_plain(camera, fake_path, duration, work_ms):
+    """Baseline: default backend, only width/height set, read() in the app loop"""
+    if fake_path:
+        cap = FakeCameraDevice(fake_path, fps=30, buffer_size=4)
+    else:
+        cap = cv2.VideoCapture(camera)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+    latencies = []
+    start = time.perf_counter()
+    end = time.time() + duration
+    while time.time() < end:
+        grab_start = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        captured = cap.frame_timestamp() if hasattr(cap, 'frame_timestamp') else grab_start
+        latencies.append((time.perf_counter() - captured) * 1000)
+        time.sleep(work_ms / 1000)
+    elapsed = time.perf_counter() - start
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    negotiated = {
+        'fourcc': ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)) if fourcc else '?',
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'buffer_size': int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        'decode': 'driver (in app loop)',
+    }
+    cap.release()
+    p50, p90, p99 = np.percentile(latencies or [0], [50, 90, 99])
+    return {'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99, 'fps': len(latencies) / elapsed,
+            'reads': len(latencies) / duration, 'dropped': 0, 'negotiated': negotiated}
+
+
+def run_config(name, settings, camera, fake_path, duration, work_ms):
+    """Open one configuration, consume frames for `duration` seconds, return stats"""
+    device = FakeCameraDevice(fake_path, fps=30, buffer_size=4) if fake_path else None
+    capture = CameraCapture(camera, FRAME_WIDTH, FRAME_HEIGHT, device=device, **settings).open()
+    end = time.time() + duration
+    reads = 0
+    while time.time() < end:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        reads += 1
+        time.sleep(work_ms / 1000)
+    stats = capture.stats()
+    stats['reads'] = reads / duration
+    stats['negotiated'] = capture.negotiated
+    capture.release()
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Camera capture latency benchmark')
+    parser.add_argument('--camera', type=int, default=0)
+    parser.add_argument('--fake', metavar='PATH', help='Use a file-backed fake camera (video or image folder)')
+    parser.add_argument('--duration', type=float, default=DURATION)
+    parser.add_argument('--work-ms', type=float, default=CONSUMER_WORK_MS)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("CAMERA CAPTURE BENCHMARK")
+    print("="*80)
+    print(f"  Source: {'fake device ' + args.fake if args.fake else f'camera {args.camera}'}")
+    print(f"  Consumer work: {args.work_ms:.0f} ms/frame | {args.duration:.0f}s per config")
+
+    results = {}
+    print(f"\n▶️  default...")
+    results['default'] = run_plain(args.camera, args.fake, args.duration, args.work_ms)
+    n = results['default']['negotiated']
+    print(f"  Negotiated: {n['fourcc']} {n['width']}x{n['height']} @ {n['fps']:.0f} fps, "
+          f"buffer={n['buffer_size']}, decode={n['decode']}")
+    for name, settings in CONFIGS.items():
+        print(f"\n▶️  {name}...")
+        results[name] = run_config(name, settings, args.camera, args.fake, args.duration, args.work_ms)
+        n = results[name]['negotiated']
+        print(f"  Negotiated: {n['fourcc']} {n['width']}x{n['height']} @ {n['fps']:.0f} fps, "
+              f"buffer={n['buffer_size']}, decode={n['decode']}")
+
+    print(f"\n{'='*100}")
+    print("⏱️  CAPTURE → AVAILABLE LATENCY (ms)")
+    print("="*100)
+    print(f"{'Config':<32} {'p50':<9} {'p90':<9} {'p99':<9} {'Camera fps':<12} {'Reads/s':<10} {'Dropped':<10}")
+    print("-"*100)
+    for name, r in results.items():
+        print(f"{name:<32} {r['p50_ms']:<9.1f} {r['p90_ms']:<9.1f} {r['p99_ms']:<9.1f} "
+              f"{r['fps']:<12.1f} {r['reads']:<10.1f} {r['dropped']:<10}")
+    print("="*100)
+    if not args.fake:
+        print("Note: with a real camera, latency starts when the driver hands over the frame;")
+        print("      time spent in the driver buffer is only visible with --fake.")
@@ -0,0 +1,80 @@
+"""
+Cascade Benchmark - Compute Saved on Recorded Footage
+Compares detector-on-every-frame against presence gate + detector and
+reports average per-frame compute and frames the gate would have missed
+"""
+from ultralytics import YOLO
+from frame_sources import ReplaySource
+from inference_buffers import LetterboxBuffers, warm_up
+from presence_cascade import PresenceGate, PRESENCE_MODEL_PATH, PRESENCE_THRESHOLD
+import argparse
+import time
+import numpy as np
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+CONF_THRESHOLD = 0.60
+MAX_FRAMES = 3000
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Presence cascade compute savings')
+    parser.add_argument('footage', help='Recorded video or image folder')
+    parser.add_argument('--presence-model', default=PRESENCE_MODEL_PATH)
+    parser.add_argument('--threshold', type=float, default=PRESENCE_THRESHOLD)
+    parser.add_argument('--frames', type=int, default=MAX_FRAMES)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("CASCADE BENCHMARK")
+    print("="*80)
+
+    source = ReplaySource(args.footage, loop=False)
+    detector = YOLO(MODEL_PATH)
+    gate = PresenceGate(args.presence_model, threshold=args.threshold).warm_up()
+
+    detector_ms, gate_ms, passed, has_item = [], [], [], []
+    buffers = None
+    while len(detector_ms) < args.frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        if buffers is None:
+            buffers = LetterboxBuffers(frame.shape)
+            warm_up(detector, buffers)
+
+        start = time.perf_counter()
+        results = detector(buffers.prepare(frame), conf=CONF_THRESHOLD, verbose=False)
+        detector_ms.append((time.perf_counter() - start) * 1000)
+        has_item.append(len(results[0].boxes) > 0)
+
+        start = time.perf_counter()
+        passed.append(gate.should_detect(frame))
+        gate_ms.append((time.perf_counter() - start) * 1000)
+
+    detector_ms = np.array(detector_ms)
+    gate_ms = np.array(gate_ms)
+    passed = np.array(passed)
+    has_item = np.array(has_item)
+    if not len(detector_ms):
+        print("❌ No frames read")
+        exit(1)
+
+    baseline = detector_ms.mean()
+    cascade = (gate_ms + detector_ms * passed).mean()
+    missed = int((has_item & ~passed).sum())
+
+    print(f"\n{'='*80}")
+    print("📊 PER-FRAME COMPUTE")
+    print("="*80)
+    print(f"{'Metric':<40} {'Value':<20}")
+    print("-"*80)
+    print(f"{'Frames':<40} {len(detector_ms)}")
+    print(f"{'Frames with detections (≥ conf)':<40} {int(has_item.sum())} ({has_item.mean():.1%})")
+    print(f"{'Frames passed by gate':<40} {int(passed.sum())} ({passed.mean():.1%})")
+    print(f"{'Detector only (avg ms/frame)':<40} {baseline:.2f}")
+    print(f"{'Gate (avg ms/frame)':<40} {gate_ms.mean():.2f}")
+    print(f"{'Cascade (avg ms/frame)':<40} {cascade:.2f}")
+    print(f"{'Compute saved':<40} {(1 - cascade / baseline):.1%}")
+    print(f"{'Detection frames missed by gate':<40} {missed} "
+          f"({missed / max(int(has_item.sum()), 1):.1%} of detection frames)")
+    print("="*80)
+    print("Lower --threshold to trade savings for fewer missed frames.")
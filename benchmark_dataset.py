@@ -0,0 +1,222 @@
+"""
+Dataset Layout Benchmark - Roboflow Folders vs Packed Arrays
+Times the same work on the JPEG/label folder layout and on the memory-mapped
+packed layout (packed_dataset.py), each in a fresh process:
+
+    read    decode + resize every image of a split and read its labels (no model)
+    epoch   one training epoch of the Ultralytics DataLoader (mosaic/HSV/flip augmentation, no model)
+    val     model.val() on the test split (wall clock, plus mAP to confirm both layouts agree)
+
+Every task runs --passes times; the first pass is roughly cold page cache
+(if the data hasn't been read recently), later ones warm.
+
+    python packed_dataset.py                  (once)
+    python benchmark_dataset.py
+    python benchmark_dataset.py --tasks epoch --fraction 0.25 --workers 4
+"""
+from pathlib import Path
+import argparse
+import csv
+import multiprocessing
+import os
+import time
+import cv2
+import torch
+import yaml
+from dataset_utils import split_images
+from packed_dataset import (PackedSplit, PackedValidator, build_packed_dataset, label_path, read_label_rows,
+                            resize_long_side, OUTPUT_DIR as PACKED_DIR, PACKED_YAML)
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+DATA_YAML = 'data_roboflow.yaml'
+PACKED_DATA = f"{PACKED_DIR}/roboflow_640/{PACKED_YAML}"
+TASKS = ('read', 'epoch', 'val')
+LAYOUTS = ('folder', 'packed')
+IMGSZ = 640
+BATCH = 32
+WORKERS = 0                     # Same as train_roboflow.py (Windows)
+PASSES = 2
+OUTPUT_DIR = 'runs/benchmark'
+
+
+def read_pass(layout, data_yaml, split, imgsz):
+    """Load every image of a split at training resolution plus its labels; returns image count"""
+    with open(data_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+    total = 0.0
+    if layout == 'folder':
+        images = split_images(data, split)
+        for path in images:
+            image = cv2.imread(str(path))
+            if image is None:
+                continue
+            total += float(resize_long_side(image, imgsz).mean())
+            read_label_rows(label_path(path))
+        return len(images)
+
+    pack = PackedSplit(Path(data['path']) / data[split])
+    for i in pack.keep:
+        total += float(pack.image(i).mean())     # Same touch of every pixel as the folder pass
+        pack.boxes(i)
+    return len(pack.keep)
+
+
+def split_size(layout, data_yaml, split):
+    with open(data_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+    if layout == 'folder':
+        return len(split_images(data, split))
+    return len(PackedSplit(Path(data['path']) / data[split]).keep)
+
+
+def epoch_pass(loader):
+    """Iterate one epoch of batches; returns image count"""
+    images = 0
+    for batch in loader:
+        images += batch['img'].shape[0]
+    return images
+
+
+def task_worker(layout, task, args, queue):
+    """One layout × task in a fresh process: [(pass, seconds, images, map50_95), ...], setup seconds"""
+    from ultralytics import YOLO
+    from ultralytics.cfg import get_cfg
+    from ultralytics.data import build_dataloader, build_yolo_dataset
+    from ultralytics.data.utils import check_det_dataset
+
+    data_yaml = args['packed'] if layout == 'packed' else args['data']
+    results = []
+    setup = 0.0
+    try:
+        if task == 'read':
+            for index in range(args['passes']):
+                start = time.perf_counter()
+                count = read_pass(layout, data_yaml, 'train', args['imgsz'])
+                results.append((index + 1, time.perf_counter() - start, count, None))
+
+        elif task == 'epoch':
+            start = time.perf_counter()
+            cfg = get_cfg(overrides={'imgsz': args['imgsz'], 'fraction': args['fraction']})
+            data = check_det_dataset(data_yaml)
+            build = build_packed_dataset if layout == 'packed' else build_yolo_dataset
+            dataset = build(cfg, data['train'], args['batch'], data, mode='train')
+            loader = build_dataloader(dataset, args['batch'], args['workers'], True)
+            setup = time.perf_counter() - start
+            for index in range(args['passes']):
+                start = time.perf_counter()
+                count = epoch_pass(loader)
+                results.append((index + 1, time.perf_counter() - start, count, None))
+
+        elif task == 'val':
+            model = YOLO(args['weights'])
+            validator = PackedValidator if layout == 'packed' else None
+            count = split_size(layout, data_yaml, 'test')
+            for index in range(args['passes']):
+                start = time.perf_counter()
+                metrics = model.val(data=data_yaml, split='test', imgsz=args['imgsz'], batch=args['batch'],
+                                    workers=args['workers'], device=args['device'], plots=False,
+                                    verbose=False, validator=validator)
+                results.append((index + 1, time.perf_counter() - start, count, float(metrics.box.map)))
+        queue.put((results, setup, None))
+    except Exception as e:
+        queue.put((results, setup, f"{type(e).__name__}: {e}"))
+
+
+def folder_bytes(data_yaml, splits):
+    with open(data_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+    total = 0
+    for split in splits:
+        for image in split_images(data, split):
+            total += image.stat().st_size
+            label = label_path(image)
+            total += label.stat().st_size if label.exists() else 0
+    return total
+
+
+def packed_bytes(packed_yaml, splits):
+    with open(packed_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+    return sum(PackedSplit(Path(data['path']) / data[split]).nbytes() for split in splits if split in data)
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Folder vs packed dataset: read, epoch and validation wall clock')
+    parser.add_argument('--data', default=DATA_YAML)
+    parser.add_argument('--packed', default=PACKED_DATA, help='data_packed.yaml written by packed_dataset.py')
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--tasks', nargs='+', choices=TASKS, default=list(TASKS))
+    parser.add_argument('--imgsz', type=int, default=IMGSZ)
+    parser.add_argument('--batch', type=int, default=BATCH)
+    parser.add_argument('--workers', type=int, default=WORKERS, help='DataLoader workers')
+    parser.add_argument('--fraction', type=float, default=1.0, help='Share of the train split per epoch pass')
+    parser.add_argument('--passes', type=int, default=PASSES)
+    parser.add_argument('--device', default=None, help='Default: GPU 0 if available, else cpu')
+    args = parser.parse_args()
+
+    if not Path(args.packed).exists():
+        print(f"❌ {args.packed} not found - run: python packed_dataset.py --imgsz {args.imgsz}")
+        exit(1)
+    device = args.device or (0 if torch.cuda.is_available() else 'cpu')
+    worker_args = {**vars(args), 'device': device}
+
+    print("="*80)
+    print("DATASET LAYOUT BENCHMARK - FOLDERS VS PACKED")
+    print("="*80)
+    folder_size = folder_bytes(args.data, ['train', 'test'])
+    packed_size = packed_bytes(args.packed, ['train', 'test'])
+    print(f"  Folder: {args.data} ({folder_size / 1024**3:.2f} GB train+test)")
+    print(f"  Packed: {args.packed} ({packed_size / 1024**3:.2f} GB train+test)")
+    print(f"  imgsz {args.imgsz} | batch {args.batch} | workers {args.workers} | device {device} | "
+          f"{args.passes} passes")
+
+    ctx = multiprocessing.get_context('spawn')
+    rows = []
+    for task in args.tasks:
+        for layout in LAYOUTS:
+            print(f"\n▶️  {task} / {layout}...")
+            queue = ctx.Queue()
+            worker = ctx.Process(target=task_worker, args=(layout, task, worker_args, queue))
+            worker.start()
+            results, setup, error = queue.get()
+            worker.join()
+            if error:
+                print(f"   ❌ {error}")
+            for pass_index, seconds, count, map50_95 in results:
+                rows.append({'task': task, 'layout': layout, 'pass': pass_index, 'seconds': seconds,
+                             'images': count, 'images_per_s': count / seconds if seconds else 0.0,
+                             'setup_s': setup, 'map50_95': map50_95})
+                map_text = f", mAP50-95 {map50_95:.4f}" if map50_95 is not None else ''
+                print(f"   pass {pass_index}: {seconds:.1f}s, {count / seconds:.0f} img/s{map_text}")
+
+    print(f"\n{'='*80}")
+    print("📊 WALL CLOCK PER TASK (first pass / best pass)")
+    print("="*80)
+    print(f"{'Task':<8} {'Folder s':<16} {'Packed s':<16} {'Speedup (best)':<16} {'Setup s folder/packed':<22}")
+    print("-"*80)
+    for task in args.tasks:
+        by_layout = {layout: [r for r in rows if r['task'] == task and r['layout'] == layout] for layout in LAYOUTS}
+        if not all(by_layout.values()):
+            continue
+        texts, best = {}, {}
+        for layout, layout_rows in by_layout.items():
+            best[layout] = min(r['seconds'] for r in layout_rows)
+            texts[layout] = f"{layout_rows[0]['seconds']:.1f} / {best[layout]:.1f}"
+        speedup_text = f"{best['folder'] / best['packed']:.2f}x"
+        setup_text = f"{by_layout['folder'][0]['setup_s']:.1f} / {by_layout['packed'][0]['setup_s']:.1f}"
+        print(f"{task:<8} {texts['folder']:<16} {texts['packed']:<16} {speedup_text:<16} {setup_text:<22}")
+    val_maps = {r['layout']: r['map50_95'] for r in rows if r['task'] == 'val'}
+    if len(val_maps) == 2:
+        print(f"\n  Test mAP50-95: folder {val_maps['folder']:.4f} | packed {val_maps['packed']:.4f}")
+    print("="*80)
+
+    if rows:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        csv_path = Path(OUTPUT_DIR) / f"dataset_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n✓ Results saved: {csv_path}")
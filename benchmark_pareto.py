@@ -0,0 +1,213 @@
+"""
+Latency vs Accuracy Benchmark - Pareto Sweep
+Evaluates trained weights on the test split across imgsz, backend and thread count
+Prints the Pareto frontier (latency vs mAP) as a table and CSV
+"""
+from ultralytics import YOLO
+from pathlib import Path
+import argparse
+import csv
+import os
+import platform
+import time
+import cv2
+import numpy as np
+import torch
+import yaml
+
+# Default sweep grid
+WEIGHTS = ['runs/train/roboflow_fresh/weights/best.pt']
+IMGSZ_GRID = [320, 416, 512, 640]
+BACKEND_GRID = ['pytorch', 'onnx', 'openvino']
+THREAD_GRID = [1, 2, 4]
+
+DATA_YAML = 'data_roboflow.yaml'
+CONF_THRESHOLD = 0.60           # Same threshold the live app uses
+LATENCY_IMAGES = 200            # Test images timed per configuration
+WARMUP_RUNS = 10                # Untimed runs before measuring
+OUTPUT_DIR = 'runs/benchmark'
+
+# Export formats understood by ultralytics for each backend
+EXPORT_FORMATS = {
+    'onnx': 'onnx',
+    'openvino': 'openvino',
+    'torchscript': 'torchscript',
+}
+
+
+def load_test_images(data_yaml, limit):
+    """Load up to `limit` test split images into memory"""
+    with open(data_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+    test_dir = Path(data['path']) / data['test']
+    paths = sorted(p for p in test_dir.iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    images = []
+    for path in paths[:limit]:
+        image = cv2.imread(str(path))
+        if image is not None:
+            images.append(image)
+    return images
+
+
+def resolve_backend_weights(weights, backend, imgsz, cache):
+    """Return weights path for a backend, exporting (once) when needed"""
+    if backend == 'pytorch':
+        return weights
+    key = (weights, backend, imgsz)
+    if key not in cache:
+        print(f"  📦 Exporting {Path(weights).name} → {backend} @ {imgsz}px...")
+        exported = YOLO(weights).export(format=EXPORT_FORMATS[backend], imgsz=imgsz, device='cpu', verbose=False)
+        cache[key] = str(exported)
+    return cache[key]
+
+
+def set_thread_count(threads):
+    """Apply thread count to torch and OpenCV pools"""
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+
+
+def measure_accuracy(model, data_yaml, imgsz):
+    """mAP50 / mAP50-95 on the test split"""
+    results = model.val(data=data_yaml, split='test', imgsz=imgsz, batch=1,
+                        device='cpu', plots=False, verbose=False)
+    metrics = results.results_dict
+    return metrics.get('metrics/mAP50(B)', 0.0), metrics.get('metrics/mAP50-95(B)', 0.0)
+
+
+def measure_latency(model, images, imgsz):
+    """Per-frame end-to-end predict latency in milliseconds"""
+    for image in images[:WARMUP_RUNS]:
+        model(image, imgsz=imgsz, conf=CONF_THRESHOLD, device='cpu', verbose=False)
+
+    latencies = np.empty(len(images), dtype=np.float64)
+    for i, image in enumerate(images):
+        start = time.perf_counter()
+        model(image, imgsz=imgsz, conf=CONF_THRESHOLD, device='cpu', verbose=False)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+def pareto_frontier(rows, accuracy_key):
+    """Indices of rows not dominated on (lower p50 latency, higher accuracy)"""
+    latency = np.array([row['p50_ms'] for row in rows])
+    accuracy = np.array([row[accuracy_key] for row in rows])
+    frontier = []
+    for i in range(len(rows)):
+        dominated = (latency <= latency[i]) & (accuracy >= accuracy[i]) & \
+                    ((latency < latency[i]) | (accuracy > accuracy[i]))
+        if not dominated.any():
+            frontier.append(i)
+    return sorted(frontier, key=lambda i: latency[i])
+
+
+def print_table(title, rows):
+    """Print benchmark rows as a fixed-width table"""
+    print(f"\n{'='*100}")
+    print(title)
+    print("="*100)
+    print(f"{'Weights':<18} {'Backend':<10} {'imgsz':<7} {'Threads':<8} "
+          f"{'mAP50':<9} {'mAP50-95':<10} {'p50 ms':<9} {'p90 ms':<9} {'p99 ms':<9}")
+    print("-"*100)
+    for row in rows:
+        print(f"{row['weights']:<18} {row['backend']:<10} {row['imgsz']:<7} {row['threads']:<8} "
+              f"{row['map50']*100:<9.2f} {row['map50_95']*100:<10.2f} "
+              f"{row['p50_ms']:<9.1f} {row['p90_ms']:<9.1f} {row['p99_ms']:<9.1f}")
+    print("="*100)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Latency vs accuracy Pareto sweep')
+    parser.add_argument('--weights', nargs='+', default=WEIGHTS, help='One or more .pt files (model sizes)')
+    parser.add_argument('--imgsz', nargs='+', type=int, default=IMGSZ_GRID)
+    parser.add_argument('--backends', nargs='+', default=BACKEND_GRID,
+                        choices=['pytorch'] + list(EXPORT_FORMATS))
+    parser.add_argument('--threads', nargs='+', type=int, default=THREAD_GRID)
+    parser.add_argument('--data', default=DATA_YAML)
+    parser.add_argument('--images', type=int, default=LATENCY_IMAGES, help='Test images timed per config')
+    parser.add_argument('--objective', choices=['map50', 'map50_95'], default='map50_95',
+                        help='Accuracy axis of the Pareto frontier')
+    parser.add_argument('--sku', default=platform.node(), help='Hardware label written to the CSV')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("LATENCY vs ACCURACY - PARETO SWEEP")
+    print("="*80)
+    print(f"\n🖥️  Hardware: {args.sku} | {platform.processor() or platform.machine()} | {os.cpu_count()} CPUs")
+    print(f"  Weights: {args.weights}")
+    print(f"  imgsz: {args.imgsz}")
+    print(f"  Backends: {args.backends}")
+    print(f"  Threads: {args.threads}")
+
+    images = load_test_images(args.data, args.images)
+    print(f"\n✓ Loaded {len(images)} test images for latency timing")
+    if not images:
+        print("❌ No test images found - check 'path' and 'test' in the data YAML")
+        exit(1)
+
+    export_cache = {}
+    accuracy_cache = {}
+    rows = []
+
+    for weights in args.weights:
+        for backend in args.backends:
+            for imgsz in args.imgsz:
+                try:
+                    model_path = resolve_backend_weights(weights, backend, imgsz, export_cache)
+                except Exception as e:
+                    print(f"  ⚠️  Skipping {backend} @ {imgsz}: export failed ({e})")
+                    continue
+
+                model = YOLO(model_path, task='detect')
+
+                # Accuracy does not depend on thread count - validate once per model/imgsz
+                acc_key = (weights, backend, imgsz)
+                if acc_key not in accuracy_cache:
+                    print(f"\n🎯 Validating {Path(weights).name} | {backend} | {imgsz}px on test split...")
+                    accuracy_cache[acc_key] = measure_accuracy(model, args.data, imgsz)
+                map50, map50_95 = accuracy_cache[acc_key]
+
+                for threads in args.threads:
+                    set_thread_count(threads)
+                    latencies = measure_latency(model, images, imgsz)
+                    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+                    row = {
+                        'sku': args.sku,
+                        'weights': Path(weights).parent.parent.name or Path(weights).stem,
+                        'backend': backend,
+                        'imgsz': imgsz,
+                        'threads': threads,
+                        'map50': map50,
+                        'map50_95': map50_95,
+                        'p50_ms': p50,
+                        'p90_ms': p90,
+                        'p99_ms': p99,
+                        'mean_ms': latencies.mean(),
+                        'fps': 1000 / latencies.mean(),
+                    }
+                    rows.append(row)
+                    print(f"  ⚡ threads={threads}: p50={p50:.1f}ms p99={p99:.1f}ms | mAP50={map50*100:.2f}%")
+
+    if not rows:
+        print("\n❌ No configuration completed")
+        exit(1)
+
+    frontier = pareto_frontier(rows, args.objective)
+    for i, row in enumerate(rows):
+        row['pareto'] = i in frontier
+
+    print_table("ALL CONFIGURATIONS", rows)
+    print_table(f"🏆 PARETO FRONTIER (p50 latency vs {args.objective})", [rows[i] for i in frontier])
+
+    # CSV output
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    csv_path = Path(OUTPUT_DIR) / f"pareto_{args.sku}_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\n✓ Results saved: {csv_path}")
+    print("  Note: for exported backends the thread count applies to torch/OpenCV")
+    print("  pre/post-processing; the runtime's own pool follows its defaults.")
+    print("="*80)
@@ -0,0 +1,281 @@
+"""
+Servo Control Path Benchmark
+Drives ServoController.trigger (the smooth app's trigger path) at several
+trigger rates against a local ESP8266 stand-in with injected latency,
+errors and hangs, and reports per rate:
+
+    command latency p50/p95/p99 (per HTTP request), trigger → lid open p50/p99
+    accepted / dropped triggers, failed cycles, queued cycles
+    thread count (mean / max), servo lock wait and hold times (p99 / max)
+
+    python benchmark_servo.py
+    python benchmark_servo.py --rates 0.2 1 5 --latency lognormal:0.08,0.6 --hang-rate 0.01
+    python benchmark_servo.py --time-scale 0.1        (quick run: dwell/timers/duration ×0.1)
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import contextlib
+import csv
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from bin_routing import BinRouter, Node, ROUTES_FILE
+from servo_control import ServoController
+from simulate_throughput import Distribution
+
+RATES = [0.1, 0.5, 1, 2, 5]     # Triggers per second
+DURATION = 60.0                 # Seconds per rate
+FPS = 30                        # servo.update() calls per second, like the main loop
+LATENCY = 'lognormal:0.08,0.6'  # ESP8266 response time (s), same spec format as simulate_throughput.py
+ERROR_RATE = 0.0                # Share of requests answered with HTTP 500
+HANG_RATE = 0.0                 # Share of requests that never answer within the timeout
+HTTP_TIMEOUT = 5.0
+POOL_SIZE = 2
+
+# Current app settings (smart_dustbin_smooth.py)
+APP_OPERATION_TIME = 4.0
+APP_COOLDOWN_TIME = 0.5
+OUTPUT_DIR = 'runs/benchmark'
+
+
+class TimedLock:
+    """threading.Lock that records how long callers waited for it and held it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired_at = 0.0
+        self.waits = []
+        self.holds = []
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        ok = self._lock.acquire(blocking, timeout)
+        if ok:
+            self.acquired_at = time.perf_counter()
+            self.waits.append(self.acquired_at - start)
+        return ok
+
+    def release(self):
+        self.holds.append(time.perf_counter() - self.acquired_at)
+        self._lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ESPStandIn(BaseHTTPRequestHandler):
+    """GET /servoN?angle=.. with latency/errors/hangs drawn from the server's settings"""
+
+    protocol_version = 'HTTP/1.1'   # Keep-alive, like the ESP8266WebServer
+
+    def do_GET(self):
+        server = self.server
+        with server.rng_lock:
+            delay = float(server.latency.sample(1)[0])
+            draw = server.rng.random()
+        if draw < server.hang_rate:
+            delay = server.timeout * 2
+        time.sleep(delay)
+        status = 500 if draw >= 1 - server.error_rate else 200
+        body = b'OK' if status == 200 else b'ERR'
+        try:
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass                    # Client gave up (timeout)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_stand_in(port_queue, latency, error_rate, hang_rate, timeout, seed):
+    """ESP8266 stand-in in its own process, so its threads don't count against the app"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ESPStandIn)
+    server.daemon_threads = True
+    server.rng = np.random.default_rng(seed)
+    server.latency = Distribution(latency, server.rng)
+    server.rng_lock = threading.Lock()
+    server.error_rate = error_rate
+    server.hang_rate = hang_rate
+    server.timeout = timeout
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def percentiles(values, qs, scale=1000.0):
+    """Percentiles in ms (nan when empty)"""
+    if not len(values):
+        return [float('nan')] * len(qs)
+    return list(np.percentile(np.asarray(values) * scale, qs))
+
+
+def run_rate(rate, port, args, seed):
+    """One rate: fresh router/controller, drive triggers for the duration, drain, summarize"""
+    scale = args.time_scale
+    template = BinRouter.load(args.routes)
+    template.close()
+    node = Node('esp_bench', '127.0.0.1', port, timeout=args.timeout, pool_size=args.pool_size)
+    node.online = True
+    routes = [route._replace(node='esp_bench', dwell=route.dwell * scale) for route in template.routes]
+    router = BinRouter({'esp_bench': node}, routes)
+
+    command_times = []
+    node.session.hooks['response'].append(
+        lambda response, *hook_args, **hook_kwargs: command_times.append(response.elapsed.total_seconds()))
+    lock = TimedLock()
+    servo = ServoController(router, [route.name for route in routes], args.operation_time * scale,
+                            args.cooldown * scale, lock=lock)
+
+    open_delays = []
+    thread_counts = []
+    queued = []
+    stop = threading.Event()
+
+    def sample_threads():
+        while not stop.wait(0.02):
+            thread_counts.append(threading.active_count() - 1)     # Minus this sampler
+            queued.append(node.executor._work_queue.qsize())
+
+    sampler = threading.Thread(target=sample_threads, name='bench-sampler', daemon=True)
+    sampler.start()
+
+    rng = np.random.default_rng(seed)
+    arrivals = Distribution(f"exp:{1.0 / rate}" if args.arrivals == 'poisson' else f"const:{1.0 / rate}", rng)
+    duration = args.duration * scale
+    triggers = accepted = 0
+
+    start = time.perf_counter()
+    next_arrival = start + float(arrivals.sample(1)[0])
+    next_frame = start
+    while True:
+        now = time.perf_counter()
+        if now - start >= duration:
+            break
+        if now >= next_arrival:
+            route = routes[rng.integers(len(routes))]
+            triggered_at = time.perf_counter()
+
+            def on_event(event, route, triggered_at=triggered_at):
+                if event == 'opened':
+                    open_delays.append(time.perf_counter() - triggered_at)
+            triggers += 1
+            accepted += servo.trigger(route.name, on_event=on_event)
+            next_arrival += float(arrivals.sample(1)[0])
+        if now >= next_frame:
+            servo.update()
+            next_frame += 1.0 / FPS
+        time.sleep(max(0.0, min(next_frame, next_arrival) - time.perf_counter()))
+
+    # Let in-flight and queued cycles finish so their results count
+    node.executor.shutdown(wait=True)
+    stop.set()
+    sampler.join()
+    router.close()
+
+    failed = sum(s['failed'] for s in servo.stats.values())
+    completed = sum(s['success'] for s in servo.stats.values()) + failed
+    cmd_p50, cmd_p95, cmd_p99 = percentiles(command_times, [50, 95, 99])
+    open_p50, open_p99 = percentiles(open_delays, [50, 99])
+    wait_p99, wait_max = percentiles(lock.waits, [99, 100], 1e6)
+    hold_p99, hold_max = percentiles(lock.holds, [99, 100], 1e6)
+    return {
+        'rate': rate,
+        'triggers': triggers,
+        'accepted': accepted,
+        'dropped': triggers - accepted,
+        'drop_rate': (triggers - accepted) / triggers if triggers else 0.0,
+        'cycles': completed,
+        'failed': failed,
+        'commands': len(command_times),
+        'cmd_p50_ms': cmd_p50,
+        'cmd_p95_ms': cmd_p95,
+        'cmd_p99_ms': cmd_p99,
+        'open_p50_ms': open_p50,
+        'open_p99_ms': open_p99,
+        'threads_mean': float(np.mean(thread_counts)) if thread_counts else 0.0,
+        'threads_max': max(thread_counts, default=0),
+        'queued_max': max(queued, default=0),
+        'lock_acquisitions': len(lock.holds),
+        'lock_wait_p99_us': wait_p99,
+        'lock_wait_max_us': wait_max,
+        'lock_hold_p99_us': hold_p99,
+        'lock_hold_max_us': hold_max,
+    }
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Servo control path under load')
+    parser.add_argument('--rates', type=float, nargs='+', default=RATES, help='Triggers per second')
+    parser.add_argument('--duration', type=float, default=DURATION, help='Seconds per rate')
+    parser.add_argument('--arrivals', choices=['poisson', 'fixed'], default='poisson')
+    parser.add_argument('--latency', default=LATENCY, help='ESP response time spec (seconds)')
+    parser.add_argument('--error-rate', type=float, default=ERROR_RATE)
+    parser.add_argument('--hang-rate', type=float, default=HANG_RATE)
+    parser.add_argument('--timeout', type=float, default=HTTP_TIMEOUT, help='Client timeout per request (s)')
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE)
+    parser.add_argument('--operation-time', type=float, default=APP_OPERATION_TIME)
+    parser.add_argument('--cooldown', type=float, default=APP_COOLDOWN_TIME)
+    parser.add_argument('--routes', default=ROUTES_FILE)
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='Multiply dwell, timers and duration (latencies unchanged)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("SERVO CONTROL PATH BENCHMARK")
+    print("="*80)
+    capacity = 1.0 / ((args.operation_time + args.cooldown) * args.time_scale)
+    print(f"  ESP stand-in: latency {args.latency} | errors {args.error_rate:.1%} | hangs {args.hang_rate:.1%}")
+    print(f"  Client: timeout {args.timeout:g}s | pool {args.pool_size} | gate capacity {capacity:.2f} triggers/s")
+    print(f"  Rates: {', '.join(f'{r:g}' for r in args.rates)}/s × {args.duration * args.time_scale:g}s ({args.arrivals})")
+
+    ctx = multiprocessing.get_context('spawn')
+    port_queue = ctx.Queue()
+    stand_in = ctx.Process(target=run_stand_in, args=(port_queue, args.latency, args.error_rate,
+                                                      args.hang_rate, args.timeout, args.seed), daemon=True)
+    stand_in.start()
+    port = port_queue.get(timeout=30)
+
+    rows = []
+    try:
+        for i, rate in enumerate(args.rates):
+            print(f"\n▶️  {rate:g} triggers/s...")
+            # The control path prints every cycle; keep the console for the results
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                row = run_rate(rate, port, args, args.seed + i)
+            rows.append(row)
+            print(f"   {row['accepted']}/{row['triggers']} accepted, {row['failed']} failed cycles, "
+                  f"command p99 {row['cmd_p99_ms']:.0f} ms")
+    finally:
+        stand_in.terminate()
+
+    print(f"\n{'='*80}")
+    print("📊 SERVO CONTROL PATH PER TRIGGER RATE")
+    print("="*80)
+    print(f"{'Rate/s':<8} {'Drop':<8} {'Failed':<8} {'Cmd p50/p99 ms':<16} {'Open p99 ms':<12} "
+          f"{'Threads':<9} {'Queue':<6} {'Lock wait/hold p99 µs':<22}")
+    print("-"*80)
+    for row in rows:
+        cmd_text = f"{row['cmd_p50_ms']:.0f} / {row['cmd_p99_ms']:.0f}"
+        lock_text = f"{row['lock_wait_p99_us']:.0f} / {row['lock_hold_p99_us']:.0f}"
+        drop_text = f"{row['drop_rate']:.0%}"
+        print(f"{row['rate']:<8g} {drop_text:<8} {row['failed']:<8} {cmd_text:<16} "
+              f"{row['open_p99_ms']:<12.0f} {row['threads_max']:<9} {row['queued_max']:<6} {lock_text:<22}")
+    print("="*80)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    csv_path = Path(OUTPUT_DIR) / f"servo_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n✓ Results saved: {csv_path}")
@@ -0,0 +1,111 @@
+"""
+Detection Stream Benchmark
+Publishes synthetic detection records as fast as possible to 1..N local
+subscriber processes (optionally one deliberately slow) and reports
+publish cost, throughput and per-subscriber drops
+"""
+from detection_stream import DetectionPublisher, DetectionSubscriber
+import argparse
+import multiprocessing
+import time
+import numpy as np
+
+SUBSCRIBER_COUNTS = [0, 1, 4, 16]
+DURATION = 5.0
+DETECTIONS_PER_RECORD = 3
+SLOW_SUBSCRIBER_DELAY = 0.01    # s per record for the --slow consumer
+
+
+def subscriber(address, delay, results):
+    """Consume until the publisher closes, then report counts"""
+    sub = DetectionSubscriber(address)
+    received, latencies = 0, []
+    for seq, timestamp, classes, confidences, boxes in sub:
+        received += 1
+        if received % 100 == 0:
+            latencies.append((time.time() - timestamp) * 1000)
+        if delay:
+            time.sleep(delay)
+    sub.close()
+    results.put({'slow': bool(delay), 'received': received, 'gaps': sub.gaps,
+                 'p99_latency_ms': float(np.percentile(latencies, 99)) if latencies else 0.0})
+
+
+def run(count, slow, duration, address):
+    ctx = multiprocessing.get_context('spawn')
+    publisher = DetectionPublisher(address)
+    results = ctx.Queue()
+    delays = [SLOW_SUBSCRIBER_DELAY if slow and i == 0 else 0 for i in range(count)]
+    procs = [ctx.Process(target=subscriber, args=(publisher.address, d, results)) for d in delays]
+    for p in procs:
+        p.start()
+    # Wait for everyone to connect so all subscribers see the same stream
+    deadline = time.time() + 30
+    while len(publisher.subscribers) < count and time.time() < deadline:
+        publisher._accept()
+        time.sleep(0.01)
+
+    rng = np.random.default_rng(0)
+    classes = rng.integers(0, 2, DETECTIONS_PER_RECORD)
+    confidences = rng.random(DETECTIONS_PER_RECORD).astype(np.float32)
+    boxes = (rng.random((DETECTIONS_PER_RECORD, 4)) * 1280).astype(np.float32)
+
+    publish_us = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        t = time.perf_counter()
+        publisher.publish(classes, confidences, boxes)
+        publish_us.append((time.perf_counter() - t) * 1e6)
+    elapsed = time.perf_counter() - start
+    stats = publisher.stats()
+    publisher.close()
+
+    consumers = [results.get(timeout=30) for _ in procs]
+    for p in procs:
+        p.join()
+    publish_us = np.array(publish_us)
+    return {
+        'subscribers': count,
+        'records_per_s': stats['records'] / elapsed,
+        'publish_p50_us': float(np.percentile(publish_us, 50)),
+        'publish_p99_us': float(np.percentile(publish_us, 99)),
+        'dropped': stats['dropped'],
+        'consumers': consumers,
+        'records': stats['records'],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Detection pub/sub throughput')
+    parser.add_argument('--counts', type=int, nargs='+', default=SUBSCRIBER_COUNTS)
+    parser.add_argument('--duration', type=float, default=DURATION)
+    parser.add_argument('--slow', action='store_true', help='Make the first subscriber a slow consumer')
+    parser.add_argument('--address', default='tcp:127.0.0.1:0', help='Port 0 = any free loopback port')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("DETECTION STREAM BENCHMARK")
+    print("="*80)
+    print(f"{DETECTIONS_PER_RECORD} detections/record | {args.duration:.0f}s per run | {args.address}"
+          f"{' | first subscriber slow' if args.slow else ''}")
+
+    rows = []
+    for count in args.counts:
+        print(f"\n▶️  {count} subscriber(s)...")
+        rows.append(run(count, args.slow, args.duration, args.address))
+
+    print(f"\n{'='*80}")
+    print("📊 RESULTS")
+    print("="*80)
+    print(f"{'Subs':<6} {'Records/s':<12} {'Publish p50':<14} {'Publish p99':<14} {'Dropped':<10} {'Fast min recv':<15} {'Slow recv':<10}")
+    print("-"*80)
+    for r in rows:
+        fast = [c['received'] for c in r['consumers'] if not c['slow']]
+        slow = [c['received'] for c in r['consumers'] if c['slow']]
+        fast_text = f"{min(fast) / r['records']:.1%}" if fast else '-'
+        slow_text = f"{slow[0] / r['records']:.1%}" if slow else '-'
+        p50_text = f"{r['publish_p50_us']:.1f} µs"
+        p99_text = f"{r['publish_p99_us']:.1f} µs"
+        print(f"{r['subscribers']:<6} {r['records_per_s']:<12.0f} {p50_text:<14} {p99_text:<14} {r['dropped']:<10} {fast_text:<15} {slow_text:<10}")
+    print("="*80)
+    print("Recv columns are the share of published records each consumer received.")
@@ -0,0 +1,85 @@
+"""
+Warm-up Benchmark - First-Frame Latency
+Times the first 100 frames in a fresh process, cold (plain model(frame))
+vs warmed up with preallocated buffers, and reports the p99/p50 ratio
+"""
+import argparse
+import multiprocessing
+import time
+import numpy as np
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+FRAMES = 100
+FRAME_SHAPE = (720, 1280, 3)
+CONF_THRESHOLD = 0.60
+INFERENCE_IMGSZ = 640
+WARMUP_RUNS = 10
+
+
+def load_frames(replay_path, count):
+    """Frames from a replay source, or seeded noise frames when none is given"""
+    if replay_path:
+        from frame_sources import ReplaySource
+        source = ReplaySource(replay_path, size=(FRAME_SHAPE[1], FRAME_SHAPE[0]))
+        return [source.read()[1] for _ in range(count)]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, FRAME_SHAPE, dtype=np.uint8) for _ in range(count)]
+
+
+def timing_worker(mode, replay_path, queue):
+    """Fresh interpreter: import, load, (warm), then time the first FRAMES frames"""
+    from ultralytics import YOLO
+    from inference_buffers import LetterboxBuffers, warm_up
+
+    frames = load_frames(replay_path, FRAMES)
+    model = YOLO(MODEL_PATH)
+    warmup_time = 0.0
+    buffers = None
+    if mode == 'warm':
+        buffers = LetterboxBuffers(FRAME_SHAPE, INFERENCE_IMGSZ)
+        warmup_time = warm_up(model, buffers, WARMUP_RUNS)
+
+    latencies = []
+    for frame in frames:
+        start = time.perf_counter()
+        if buffers is None:
+            results = model(frame, conf=CONF_THRESHOLD, imgsz=INFERENCE_IMGSZ, verbose=False)
+            results[0].boxes.xyxy.cpu().numpy()
+        else:
+            results = model(buffers.prepare(frame), conf=CONF_THRESHOLD, verbose=False)
+            buffers.scale_boxes(results[0].boxes.xyxy.cpu().numpy())
+        latencies.append((time.perf_counter() - start) * 1000)
+    queue.put((latencies, warmup_time))
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='First-frame latency: cold vs warmed up')
+    parser.add_argument('--replay', help='Video or image folder to use instead of noise frames')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("WARM-UP BENCHMARK - FIRST 100 FRAMES")
+    print("="*80)
+
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for mode in ('cold', 'warm'):
+        print(f"\n▶️  {mode} start (fresh process)...")
+        queue = ctx.Queue()
+        worker = ctx.Process(target=timing_worker, args=(mode, args.replay, queue))
+        worker.start()
+        results[mode] = queue.get()
+        worker.join()
+
+    print(f"\n{'='*80}")
+    print("⏱️  LATENCY OVER THE FIRST 100 FRAMES (ms)")
+    print("="*80)
+    print(f"{'Mode':<8} {'Frame 1':<10} {'p50':<9} {'p99':<9} {'Max':<9} {'p99/p50':<9} {'Warm-up':<10}")
+    print("-"*80)
+    for mode, (latencies, warmup_time) in results.items():
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{mode:<8} {latencies[0]:<10.1f} {p50:<9.1f} {p99:<9.1f} {max(latencies):<9.1f} "
+              f"{p99 / p50:<9.2f} {warmup_time:<10.1f}s")
+    print("="*80)
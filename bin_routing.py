@@ -0,0 +1,188 @@
+"""
+Bin Routing Table
+Declarative class → node → servo → angles → dwell mapping (bin_routes.yaml),
+loaded once into a dict for O(1) dispatch. Each ESP node gets its own
+keep-alive connection pool and worker threads, so several boards (a row
+of bins) are driven concurrently without code changes.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import time
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+
+ROUTES_FILE = 'bin_routes.yaml'
+
+Route = namedtuple('Route', 'name classes node servo open_angle close_angle dwell label color emoji voice')
+
+
+class Node:
+    """One ESP8266 board: base URL, pooled HTTP session and its own workers"""
+
+    def __init__(self, name, host, port=80, timeout=5, pool_size=2):
+        self.name = name
+        self.host = host
+        self.base_url = f"http://{host}" if int(port) == 80 else f"http://{host}:{port}"
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix=f"node-{name}")
+        self.online = False
+
+    def check(self, timeout=3):
+        """Connection test at startup; offline nodes run in demo mode"""
+        try:
+            response = self.session.get(self.base_url, timeout=timeout)
+            print(f"✅ {self.name} ({self.host}) responded: {response.status_code}")
+            self.online = True
+        except requests.exceptions.Timeout:
+            print(f"❌ {self.name} ({self.host}) timeout - ESP8266 not responding")
+            self.online = False
+        except requests.exceptions.ConnectionError:
+            print(f"❌ {self.name} ({self.host}) connection failed - check IP, network and web server")
+            self.online = False
+        except Exception as e:
+            print(f"❌ {self.name} ({self.host}) error: {e}")
+            self.online = False
+        return self.online
+
+    def servo_url(self, servo):
+        return f"{self.base_url}/{servo}"
+
+    def set_angle(self, servo, angle):
+        return self.session.get(self.servo_url(servo), params={'angle': angle}, timeout=self.timeout)
+
+
+class BinRouter:
+    """Class name (or voice keyword) → Route, plus per-node execution"""
+
+    def __init__(self, nodes, routes):
+        self.nodes = nodes
+        self.routes = routes
+        self.by_class = {}
+        for route in routes:
+            if route.node not in nodes:
+                raise ValueError(f"Route '{route.name}' uses unknown node '{route.node}'")
+            for key in (route.name,) + route.classes:
+                if key in self.by_class and self.by_class[key] is not route:
+                    raise ValueError(f"'{key}' is routed to both '{self.by_class[key].name}' and '{route.name}'")
+                self.by_class[key] = route
+
+    @classmethod
+    def load(cls, path=ROUTES_FILE, hosts=None):
+        """`hosts` (node name → host) points the same routes at another board, e.g. a second chute"""
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f)
+        hosts = hosts or {}
+        for name in hosts:
+            if name not in config['nodes']:
+                raise ValueError(f"Host override for unknown node '{name}'")
+        nodes = {name: Node(name, **{**settings, 'host': hosts.get(name, settings['host'])})
+                 for name, settings in config['nodes'].items()}
+        routes = [
+            Route(
+                name=r['name'],
+                classes=tuple(r.get('classes', [r['name']])),
+                node=r['node'],
+                servo=r['servo'],
+                open_angle=r['open_angle'],
+                close_angle=r['close_angle'],
+                dwell=float(r.get('dwell', 6)),
+                label=r.get('label', r['name'].upper()),
+                color=tuple(r.get('color', (255, 255, 255))),
+                emoji=r.get('emoji', '🗑️'),
+                voice=tuple(r.get('voice', [])),
+            )
+            for r in config['routes']
+        ]
+        return cls(nodes, routes)
+
+    def __contains__(self, class_name):
+        return class_name in self.by_class
+
+    def __getitem__(self, class_name):
+        return self.by_class[class_name]
+
+    def get(self, class_name):
+        return self.by_class.get(class_name)
+
+    def check_nodes(self, timeout=3):
+        """Test every node; returns the number online"""
+        return sum(node.check(timeout) for node in self.nodes.values())
+
+    def colors(self):
+        """Colour per routed key (for drawing boxes)"""
+        return {key: route.color for key, route in self.by_class.items()}
+
+    def describe(self):
+        for node in self.nodes.values():
+            print(f"  Node {node.name}: {node.base_url} (timeout {node.timeout}s)")
+        for route in self.routes:
+            print(f"  {route.emoji} {route.name:<10} {', '.join(route.classes):<25} → {route.node}/{route.servo} "
+                  f"open={route.open_angle}° close={route.close_angle}° dwell={route.dwell:g}s")
+
+    def cycle(self, route, on_event=None):
+        """Open, wait `dwell`, close (blocking). Returns (success, seconds, message).
+
+        Offline nodes print what would be sent. `on_event(event, route)` is
+        called with 'opened' and 'closed' (e.g. for speech feedback).
+        """
+        node = self.nodes[route.node]
+        url = node.servo_url(route.servo)
+        start = time.time()
+        if not node.online:
+            print(f"\n🎬 DEMO MODE: Would send:")
+            print(f"   Open: GET {url}?angle={route.open_angle}")
+            print(f"   Wait {route.dwell:g} seconds...")
+            print(f"   Close: GET {url}?angle={route.close_angle}")
+            if on_event:
+                on_event('opened', route)
+                on_event('closed', route)
+            return True, time.time() - start, 'demo'
+
+        try:
+            print(f"\n📤 Opening {route.label}: {url}?angle={route.open_angle}")
+            response = node.set_angle(route.servo, route.open_angle)
+            if response.status_code != 200:
+                return False, time.time() - start, f"open failed: {response.status_code}"
+            print(f"✅ Lid opened! (Servo at {route.open_angle}°)")
+            if on_event:
+                on_event('opened', route)
+
+            print(f"⏳ Waiting for waste to drop ({route.dwell:g}s)...")
+            time.sleep(route.dwell)
+
+            print(f"📤 Closing {route.label}: {url}?angle={route.close_angle}")
+            response = node.set_angle(route.servo, route.close_angle)
+            if response.status_code != 200:
+                return False, time.time() - start, f"close failed: {response.status_code}"
+            print(f"✅ Lid closed! (Servo at {route.close_angle}°)")
+            if on_event:
+                on_event('closed', route)
+            return True, time.time() - start, 'ok'
+        except Exception as e:
+            return False, time.time() - start, str(e)
+
+    def dispatch(self, class_name, on_done=None, on_event=None):
+        """Run the cycle on the route's node pool; returns a Future (None if unrouted)
+
+        `on_done(route, success, seconds, message)` runs on the node's worker.
+        """
+        route = self.by_class.get(class_name)
+        if route is None:
+            return None
+
+        def run():
+            result = self.cycle(route, on_event)
+            if on_done:
+                on_done(route, *result)
+            return result
+
+        return self.nodes[route.node].executor.submit(run)
+
+    def close(self):
+        for node in self.nodes.values():
+            node.executor.shutdown(wait=False)
+            node.session.close()
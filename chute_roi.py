@@ -0,0 +1,143 @@
+"""
+Chute Region of Interest
+Only the bin opening is sent to the model; boxes are mapped back to full
+frame coordinates for display. Run this file once to calibrate:
+
+    python chute_roi.py            (camera 0)
+    python chute_roi.py clip.mp4   (recorded footage)
+"""
+import json
+import sys
+import cv2
+import numpy as np
+
+ROI_FILE = 'chute_roi.json'
+PAD_VALUE = 114                 # Grey outside the polygon (matches letterbox padding)
+ROI_COLOR = (0, 255, 255)
+
+
+class ChuteROI:
+    """Polygon (or rectangle) ROI with preallocated crop buffers"""
+
+    def __init__(self, points, frame_shape):
+        self.points = np.array(points, dtype=np.int32).reshape(-1, 2)
+        self.frame_shape = tuple(frame_shape[:2])
+        height, width = self.frame_shape
+        self.points[:, 0] = self.points[:, 0].clip(0, width - 1)
+        self.points[:, 1] = self.points[:, 1].clip(0, height - 1)
+
+        x, y, w, h = cv2.boundingRect(self.points)
+        self.x1, self.y1, self.x2, self.y2 = x, y, x + w, y + h
+        self.offset = np.array([x, y, x, y], dtype=np.float32)
+        self.crop_shape = (h, w, 3)
+
+        # Rectangles are a plain slice; polygons need a mask over the bounding box
+        self.is_rect = (len(self.points) == 4 and len(set(self.points[:, 0])) == 2
+                        and len(set(self.points[:, 1])) == 2)
+        if not self.is_rect:
+            self.mask = np.zeros((h, w), dtype=np.uint8)
+            cv2.fillPoly(self.mask, [self.points - [x, y]], 255)
+            self.outside = self.mask == 0
+            self.buffer = np.empty(self.crop_shape, dtype=np.uint8)
+
+    @classmethod
+    def load(cls, path, frame_shape):
+        """Load a saved ROI, rescaling if the camera resolution changed"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        points = np.array(data['points'], dtype=np.float32)
+        saved_w, saved_h = data.get('frame_size', (frame_shape[1], frame_shape[0]))
+        points[:, 0] *= frame_shape[1] / saved_w
+        points[:, 1] *= frame_shape[0] / saved_h
+        return cls(points.round(), frame_shape)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'type': 'rect' if self.is_rect else 'polygon',
+                'points': self.points.tolist(),
+                'frame_size': [self.frame_shape[1], self.frame_shape[0]],
+            }, f, indent=2)
+
+    def crop(self, frame):
+        """Pixels the model should see (a view for rectangles, masked copy for polygons)"""
+        region = frame[self.y1:self.y2, self.x1:self.x2]
+        if self.is_rect:
+            return region
+        np.copyto(self.buffer, region)
+        self.buffer[self.outside] = PAD_VALUE
+        return self.buffer
+
+    def to_frame(self, xyxy):
+        """Crop coordinates → full frame coordinates"""
+        return np.asarray(xyxy, dtype=np.float32) + self.offset
+
+    def area_fraction(self):
+        height, width = self.frame_shape
+        return (self.x2 - self.x1) * (self.y2 - self.y1) / (width * height)
+
+    def draw(self, frame):
+        cv2.polylines(frame, [self.points], True, ROI_COLOR, 2)
+
+
+def calibrate(source=0, path=ROI_FILE):
+    """One-time UI: click polygon corners (or press R to drag a rectangle), S to save"""
+    cap = cv2.VideoCapture(int(source)) if str(source).isdigit() else cv2.VideoCapture(str(source))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        print("❌ Could not read a frame for calibration")
+        return None
+
+    points = []
+    window = 'Chute ROI Calibration'
+
+    def on_mouse(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            points.append((x, y))
+
+    cv2.namedWindow(window)
+    cv2.setMouseCallback(window, on_mouse)
+    print("\nCONTROLS:")
+    print("  Click - Add polygon corner")
+    print("  R     - Drag a rectangle instead")
+    print("  C     - Clear points")
+    print("  S     - Save and exit")
+    print("  Q     - Quit without saving")
+
+    roi = None
+    while True:
+        view = frame.copy()
+        for p in points:
+            cv2.circle(view, p, 5, ROI_COLOR, -1)
+        if len(points) > 1:
+            cv2.polylines(view, [np.array(points, dtype=np.int32)], len(points) > 2, ROI_COLOR, 2)
+        cv2.putText(view, f"Points: {len(points)} | S=save R=rect C=clear Q=quit", (15, 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.imshow(window, view)
+        key = cv2.waitKey(20) & 0xFF
+        if key == ord('c'):
+            points.clear()
+        elif key == ord('r'):
+            x, y, w, h = cv2.selectROI(window, frame, showCrosshair=False)
+            if w and h:
+                points[:] = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        elif key == ord('s') and len(points) >= 3:
+            roi = ChuteROI(points, frame.shape)
+            roi.save(path)
+            print(f"✅ ROI saved to {path} ({roi.area_fraction():.0%} of the frame)")
+            break
+        elif key == ord('q'):
+            print("ROI not saved")
+            break
+    cv2.destroyAllWindows()
+    return roi
+
+
+if __name__ == '__main__':
+    print("="*80)
+    print("CHUTE ROI CALIBRATION")
+    print("="*80)
+    calibrate(sys.argv[1] if len(sys.argv) > 1 else 0)
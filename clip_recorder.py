@@ -0,0 +1,241 @@
+"""
+Trigger Clip Recorder
+Keeps the last few seconds of frames in a fixed-size shared-memory ring and,
+on each servo trigger, hands the pre/post window to a background encoder
+process that writes a video (or JPEG sequence) plus detection metadata.
+The detection loop only ever does a frame copy and a non-blocking enqueue.
+"""
+from frame_bus import FrameRing
+from pathlib import Path
+import argparse
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+
+OUTPUT_DIR = 'runs/clips'
+PRE_SECONDS = 3.0
+POST_SECONDS = 3.0
+RECORD_FPS = 15                 # Frames kept per second (camera frames in between are skipped)
+RECORD_SIZE = (640, 360)        # Stored resolution (width, height) - bounds ring memory
+MARGIN_SECONDS = 2.0            # Extra ring capacity so the encoder can read before overwrite
+QUOTA_MB = 2048
+CLIP_FORMAT = 'mp4'             # 'mp4' (H.264 if available, else MPEG-4) or 'jpeg'
+MAX_PENDING_JOBS = 8
+
+
+class ClipRecorder:
+    """Main-process side: ring writer + trigger bookkeeping"""
+
+    def __init__(self, output_dir=OUTPUT_DIR, pre_seconds=PRE_SECONDS, post_seconds=POST_SECONDS,
+                 record_fps=RECORD_FPS, size=RECORD_SIZE, quota_mb=QUOTA_MB, clip_format=CLIP_FORMAT):
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.record_fps = record_fps
+        self.size = tuple(size)
+        slots = int((pre_seconds + post_seconds + MARGIN_SECONDS) * record_fps)
+        self.ring = FrameRing(slots=slots, shape=(self.size[1], self.size[0], 3), create=True)
+        self.small = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self.last_write = 0.0
+        self.pending = []               # Triggers waiting for their post window
+        self.jobs = queue.Queue(maxsize=MAX_PENDING_JOBS)
+        self.clips_queued = 0
+        self.clips_dropped = 0
+
+        # Separate interpreter (not fork/spawn of the app script) running encoder_main()
+        self.encoder = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()),
+             '--ring', self.ring.name, '--slots', str(slots),
+             '--width', str(self.size[0]), '--height', str(self.size[1]),
+             '--fps', str(record_fps), '--output', str(output_dir),
+             '--quota-mb', str(quota_mb), '--format', clip_format],
+            stdin=subprocess.PIPE, text=True,
+        )
+        self.feeder = threading.Thread(target=self._feed, name='clip-feeder', daemon=True)
+        self.feeder.start()
+        print(f"🎞️  Clip recorder: {pre_seconds:.0f}s + {post_seconds:.0f}s @ {record_fps} fps, "
+              f"{slots} slots ({slots * self.small.nbytes / 1e6:.0f} MB ring)")
+
+    def _feed(self):
+        """Writes jobs to the encoder's stdin so the main loop never touches the pipe"""
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    self.encoder.stdin.close()
+                    return
+                self.encoder.stdin.write(json.dumps(job) + '\n')
+                self.encoder.stdin.flush()
+            except (BrokenPipeError, OSError):
+                return
+
+    def add(self, frame):
+        """Store a (downscaled) copy of the raw frame; call once per loop iteration"""
+        now = time.perf_counter()
+        if now - self.last_write >= 1.0 / self.record_fps:
+            cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+            self.ring.write(self.small, now)
+            self.last_write = now
+        # Hand off every trigger whose post-trigger window is complete
+        while self.pending and now - self.pending[0]['trigger_time'] >= self.post_seconds:
+            self._hand_off(self.pending.pop(0))
+
+    def trigger(self, metadata):
+        """Mark a trigger; the clip is queued once POST_SECONDS have been recorded"""
+        now = time.perf_counter()
+        self.pending.append({'trigger_time': now, 'wall_time': time.time(), 'metadata': metadata})
+
+    def _hand_off(self, trigger):
+        headers = self.ring.headers
+        valid = headers['seq'] >= 0
+        window_start = trigger['trigger_time'] - self.pre_seconds
+        in_window = valid & (headers['timestamp'] >= window_start)
+        if not in_window.any():
+            return
+        job = {
+            'first_seq': int(headers['seq'][in_window].min()),
+            'last_seq': int(headers['seq'][valid].max()),
+            'trigger_time': trigger['trigger_time'],
+            'wall_time': trigger['wall_time'],
+            'metadata': trigger['metadata'],
+        }
+        try:
+            self.jobs.put_nowait(job)
+            self.clips_queued += 1
+        except queue.Full:
+            self.clips_dropped += 1
+            print("⚠️  Clip encoder busy - clip dropped")
+
+    def close(self, timeout=10.0):
+        """Flush triggers that already have their pre-window, then stop the encoder"""
+        for trigger in self.pending:
+            self._hand_off(trigger)
+        self.pending = []
+        self.jobs.put(None)
+        self.feeder.join(timeout)
+        try:
+            self.encoder.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.encoder.kill()
+        self.ring.close()
+
+
+def enforce_quota(output_dir, quota_bytes):
+    """Delete the oldest clips (and their metadata) until under quota"""
+    clips = sorted((p for p in Path(output_dir).iterdir() if p.suffix != '.json'), key=lambda p: p.stat().st_mtime)
+
+    def size_of(path):
+        if path.is_dir():
+            return sum(f.stat().st_size for f in path.iterdir())
+        return path.stat().st_size
+
+    sizes = {p: size_of(p) for p in clips}
+    total = sum(sizes.values())
+    while clips and total > quota_bytes:
+        oldest = clips.pop(0)
+        total -= sizes[oldest]
+        if oldest.is_dir():
+            for f in oldest.iterdir():
+                f.unlink()
+            oldest.rmdir()
+        else:
+            oldest.unlink()
+        meta = oldest.with_suffix('.json')
+        if meta.exists():
+            meta.unlink()
+
+
+def open_writer(path, fps, size):
+    """H.264 if the OpenCV build has it, otherwise MPEG-4 Part 2"""
+    for fourcc in ('avc1', 'mp4v'):
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if writer.isOpened():
+            return writer, fourcc
+    raise RuntimeError("No usable video codec")
+
+
+def encode_clip(ring, job, output_dir, fps, size, clip_format):
+    """Copy the window out of the ring frame by frame and encode it"""
+    stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(job['wall_time']))
+    label = str(job['metadata'].get('class_name', 'trigger')).replace(' ', '_')
+    name = f"{stamp}_{job['first_seq']}_{label}"
+    frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    timestamps, skipped = [], 0
+
+    if clip_format == 'jpeg':
+        target = Path(output_dir) / name
+        target.mkdir(parents=True, exist_ok=True)
+        writer, codec = None, 'jpeg'
+    else:
+        target = Path(output_dir) / f"{name}.mp4"
+        writer, codec = open_writer(target, fps, size)
+
+    for seq in range(job['first_seq'], job['last_seq'] + 1):
+        view = ring.get(seq)
+        if view is None:
+            skipped += 1
+            continue
+        np.copyto(frame, view)
+        timestamp = float(ring.headers['timestamp'][seq % ring.slots])
+        if not ring.is_current(seq):     # Overwritten while copying
+            skipped += 1
+            continue
+        if writer is not None:
+            writer.write(frame)
+        else:
+            cv2.imwrite(str(target / f"{len(timestamps):05d}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        timestamps.append(round(timestamp - job['trigger_time'], 3))
+
+    if writer is not None:
+        writer.release()
+
+    with open(target.with_suffix('.json'), 'w') as f:
+        json.dump({
+            'clip': target.name,
+            'codec': codec,
+            'trigger_wall_time': job['wall_time'],
+            'frames': len(timestamps),
+            'skipped_frames': skipped,
+            'frame_offsets_s': timestamps,     # Relative to the trigger
+            'detection': job['metadata'],
+        }, f, indent=2)
+    return target, len(timestamps), skipped
+
+
+def encoder_main():
+    """Background encoder process: reads jobs (JSON lines) from stdin"""
+    parser = argparse.ArgumentParser(description='Clip encoder (started by ClipRecorder)')
+    parser.add_argument('--ring', required=True)
+    parser.add_argument('--slots', type=int, required=True)
+    parser.add_argument('--width', type=int, required=True)
+    parser.add_argument('--height', type=int, required=True)
+    parser.add_argument('--fps', type=float, default=RECORD_FPS)
+    parser.add_argument('--output', default=OUTPUT_DIR)
+    parser.add_argument('--quota-mb', type=float, default=QUOTA_MB)
+    parser.add_argument('--format', choices=['mp4', 'jpeg'], default=CLIP_FORMAT)
+    args = parser.parse_args()
+
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+    ring = FrameRing(args.ring, slots=args.slots, shape=(args.height, args.width, 3))
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            try:
+                target, frames, skipped = encode_clip(ring, job, args.output, args.fps,
+                                                      (args.width, args.height), args.format)
+                print(f"🎞️  Clip saved: {target} ({frames} frames, {skipped} skipped)")
+                enforce_quota(args.output, args.quota_mb * 1024 * 1024)
+            except Exception as e:
+                print(f"❌ Clip encode failed: {e}")
+    finally:
+        ring.close()
+
+
+if __name__ == '__main__':
+    encoder_main()
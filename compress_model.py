@@ -0,0 +1,338 @@
+"""
+Model Compression - Distillation and Structured Pruning
+Shrinks the trained YOLOv11n paper/plastic detector for CPU deployment
+Reports FLOPs, parameters, CPU latency and mAP deltas vs the teacher
+"""
+from ultralytics import YOLO
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.nn.modules import C2f, C2PSA
+from ultralytics.nn.tasks import DetectionModel, yaml_model_load
+from ultralytics.utils.torch_utils import get_flops
+from benchmark_pareto import load_test_images, measure_accuracy, measure_latency, set_thread_count
+from pathlib import Path
+import argparse
+import copy
+import multiprocessing
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+TEACHER_WEIGHTS = 'runs/train/roboflow_fresh/weights/best.pt'
+DATA_YAML = 'data_roboflow.yaml'
+PROJECT = 'runs/compress'
+
+# Student architecture: YOLOv11 with a narrower width multiplier (n = 0.25)
+STUDENT_CFG = 'yolo11n.yaml'
+STUDENT_WIDTH = 0.125
+
+# Distillation settings
+KD_WEIGHT = 1.0
+KD_TEMPERATURE = 2.0
+DISTILL_EPOCHS = 60
+
+# Pruning settings
+PRUNE_RATIO = 0.5               # Fraction of channels removed per prunable layer
+FINETUNE_EPOCHS = 15
+
+# Deployment target
+TARGET_SPEEDUP = 2.0
+MAX_MAP50_DROP = 2.0            # percentage points
+
+BENCH_IMGSZ = 640
+BENCH_THREADS = 4
+BENCH_IMAGES = 100
+
+
+def head_outputs(preds):
+    """Raw per-level head tensors from a train-mode or eval-mode forward"""
+    if isinstance(preds, dict):
+        preds = preds.get('one2many', preds)
+    if isinstance(preds, tuple):
+        preds = preds[1]
+    return list(preds)
+
+
+class DistillationLoss:
+    """Detection loss plus logit distillation against a frozen teacher"""
+
+    def __init__(self, student, teacher, kd_weight, temperature):
+        self.base = student.init_criterion()
+        self.teacher = teacher
+        self.kd_weight = kd_weight
+        self.temperature = temperature
+        self.reg_max = student.model[-1].reg_max
+
+    def distill(self, student_out, teacher_out):
+        """Classification BCE + box-distribution KL, weighted by teacher confidence"""
+        T = self.temperature
+        total = 0.0
+        for s, t in zip(student_out, teacher_out):
+            if s.shape != t.shape:
+                raise ValueError(f"Student/teacher head shapes differ: {tuple(s.shape)} vs {tuple(t.shape)}")
+            box_ch = 4 * self.reg_max
+            s_box, s_cls = s[:, :box_ch].float(), s[:, box_ch:].float()
+            t_box, t_cls = t[:, :box_ch].float(), t[:, box_ch:].float()
+
+            cls_loss = F.binary_cross_entropy_with_logits(s_cls / T, torch.sigmoid(t_cls / T))
+
+            b, _, h, w = s.shape
+            s_dist = s_box.view(b, 4, self.reg_max, h * w)
+            t_dist = t_box.view(b, 4, self.reg_max, h * w)
+            kl = F.kl_div(F.log_softmax(s_dist / T, dim=2), F.softmax(t_dist / T, dim=2),
+                          reduction='none').sum(dim=2).mean(dim=1)
+            fg_weight = torch.sigmoid(t_cls).amax(dim=1).view(b, h * w)
+            box_loss = (kl * fg_weight).sum() / fg_weight.sum().clamp(min=1.0)
+
+            total = total + (cls_loss + box_loss) * T * T
+        return total
+
+    def __call__(self, preds, batch):
+        loss, loss_items = self.base(preds, batch)
+        with torch.no_grad():
+            teacher_out = head_outputs(self.teacher(batch['img']))
+        kd = self.distill(head_outputs(preds), teacher_out)
+        return loss + self.kd_weight * kd * batch['img'].shape[0], loss_items
+
+
+class DistillationTrainer(DetectionTrainer):
+    """Trains a narrow student from scratch with the teacher's logits as extra targets"""
+
+    teacher_weights = TEACHER_WEIGHTS
+    student_width = STUDENT_WIDTH
+    kd_weight = KD_WEIGHT
+    kd_temperature = KD_TEMPERATURE
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        student_cfg = yaml_model_load(STUDENT_CFG)
+        depth, _, max_channels = student_cfg['scales'][student_cfg.get('scale', 'n')]
+        student_cfg['scales'] = {'n': [depth, self.student_width, max_channels]}
+        student_cfg['scale'] = 'n'
+        return DetectionModel(student_cfg, nc=self.data['nc'], verbose=verbose)
+
+    def preprocess_batch(self, batch):
+        batch = super().preprocess_batch(batch)
+        # Attach the distillation criterion lazily so the EMA copy (and the
+        # saved checkpoint) never carries the teacher
+        if not isinstance(getattr(self.model, 'criterion', None), DistillationLoss):
+            teacher = YOLO(self.teacher_weights).model.to(batch['img'].device).float().eval()
+            for p in teacher.parameters():
+                p.requires_grad_(False)
+            self.model.criterion = DistillationLoss(self.model, teacher, self.kd_weight, self.kd_temperature)
+        return batch
+
+
+class PrunedTrainer(DetectionTrainer):
+    """Fine-tunes an already pruned model instead of rebuilding it from YAML"""
+
+    pruned_model = None
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        return self.pruned_model
+
+
+def split_conv(conv, start, stop):
+    """Copy of an ultralytics Conv keeping output channels [start, stop)"""
+    part = copy.deepcopy(conv)
+    part.conv.weight = nn.Parameter(conv.conv.weight.data[start:stop].clone())
+    part.conv.out_channels = stop - start
+    if getattr(part, 'bn', None) is not None:
+        for name in ('weight', 'bias'):
+            setattr(part.bn, name, nn.Parameter(getattr(conv.bn, name).data[start:stop].clone()))
+        part.bn.running_mean = conv.bn.running_mean[start:stop].clone()
+        part.bn.running_var = conv.bn.running_var[start:stop].clone()
+        part.bn.num_features = stop - start
+    return part
+
+
+class SplitFreeC2(nn.Module):
+    """C3k2 (C2f) / C2PSA with cv1's two halves as separate convs
+
+    torch-pruning can't follow the chunk()/split() of cv1's output, so the
+    halves become cv0 and cv1 with identical weights and outputs.
+    """
+
+    def __init__(self, block):
+        super().__init__()
+        self.chained = isinstance(block, C2PSA)     # C2PSA: m is one Sequential on b
+        self.cv0 = split_conv(block.cv1, 0, block.c)
+        self.cv1 = split_conv(block.cv1, block.c, 2 * block.c)
+        self.m = block.m
+        self.cv2 = block.cv2
+        for attr in ('i', 'f', 'type', 'np'):       # Set by parse_model, used by the forward graph
+            if hasattr(block, attr):
+                setattr(self, attr, getattr(block, attr))
+
+    def forward(self, x):
+        a, b = self.cv0(x), self.cv1(x)
+        if self.chained:
+            return self.cv2(torch.cat((a, self.m(b)), 1))
+        y = [a, b]
+        y.extend(m(y[-1]) for m in self.m)
+        return self.cv2(torch.cat(y, 1))
+
+
+def make_split_free(model):
+    """Swap every C3k2/C2f and C2PSA block for SplitFreeC2 (in place)"""
+    for index, block in enumerate(model.model):
+        if isinstance(block, (C2f, C2PSA)):
+            model.model[index] = SplitFreeC2(block)
+    return model
+
+
+def head_shapes(model, example):
+    model.eval()
+    with torch.no_grad():
+        out = model(example)
+    out = out[0] if isinstance(out, (list, tuple)) else out
+    return tuple(out.shape)
+
+
+def prune_channels(weights, ratio, imgsz):
+    """L2-magnitude structured channel pruning (requires torch-pruning)"""
+    try:
+        import torch_pruning as tp
+    except ImportError:
+        print("❌ torch-pruning not installed - run: python -m pip install torch-pruning")
+        return None
+
+    model = YOLO(weights).model.float().cpu()
+    example = torch.randn(1, 3, imgsz, imgsz)
+    expected = head_shapes(model, example)
+    make_split_free(model)
+    if head_shapes(model, example) != expected:
+        raise ValueError("Split-free blocks changed the model output")
+
+    # Attention inside C2PSA reshapes channels into heads - keep it whole,
+    # along with the Detect head
+    ignored = [model.model[-1]]
+    ignored += [block.m for block in model.model if isinstance(block, SplitFreeC2) and block.chained]
+    for p in model.parameters():
+        p.requires_grad_(True)
+    pruner = tp.pruner.MagnitudePruner(
+        model, example,
+        importance=tp.importance.MagnitudeImportance(p=2),
+        pruning_ratio=ratio,
+        ignored_layers=ignored,
+    )
+    pruner.step()
+
+    pruned = head_shapes(model, example)
+    if pruned != expected:
+        raise ValueError(f"Pruned model output {pruned} != {expected}")
+    model.train()
+    return model
+
+
+def model_width(weights):
+    """Width multiplier of a YOLO checkpoint, from its model yaml"""
+    cfg = YOLO(weights).model.yaml
+    scales = cfg.get('scales')
+    if scales:
+        return scales[cfg.get('scale') or next(iter(scales))][1]
+    return cfg.get('width_multiple', 1.0)
+
+
+def train_config(name, epochs):
+    """Shared training arguments (mirrors train_roboflow.py)"""
+    return {
+        'data': DATA_YAML,
+        'epochs': epochs,
+        'batch': 32,
+        'imgsz': 640,
+        'device': 0 if torch.cuda.is_available() else 'cpu',
+        'workers': 0,
+        'patience': 20,
+        'project': PROJECT,
+        'name': name,
+        'exist_ok': True,
+        'seed': 42,
+        'cos_lr': True,
+        'close_mosaic': 10,
+        'amp': True,
+        'plots': True,
+    }
+
+
+def profile(weights, images):
+    """Params, GFLOPs, CPU latency and test mAP for one set of weights"""
+    model = YOLO(weights)
+    set_thread_count(BENCH_THREADS)
+    latencies = measure_latency(model, images, BENCH_IMGSZ)
+    map50, map50_95 = measure_accuracy(model, DATA_YAML, BENCH_IMGSZ)
+    return {
+        'params': sum(p.numel() for p in model.model.parameters()),
+        'gflops': get_flops(model.model, BENCH_IMGSZ),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'map50': map50,
+        'map50_95': map50_95,
+    }
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Distill and/or prune the dustbin detector')
+    parser.add_argument('--mode', choices=['distill', 'prune', 'both'], default='both')
+    parser.add_argument('--teacher', default=TEACHER_WEIGHTS)
+    parser.add_argument('--width', type=float, default=STUDENT_WIDTH, help='Student width multiplier')
+    parser.add_argument('--prune-ratio', type=float, default=PRUNE_RATIO)
+    parser.add_argument('--distill-epochs', type=int, default=DISTILL_EPOCHS)
+    parser.add_argument('--finetune-epochs', type=int, default=FINETUNE_EPOCHS)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("MODEL COMPRESSION - DISTILLATION & PRUNING")
+    print("="*80)
+    print(f"\n🎓 Teacher: {args.teacher}")
+    print(f"🎯 Target: ≥{TARGET_SPEEDUP:.1f}x CPU speedup, ≤{MAX_MAP50_DROP:.1f} pt mAP50 drop")
+
+    candidates = {}
+
+    if args.mode in ('distill', 'both'):
+        print(f"\n{'='*80}")
+        print(f"DISTILLING → student width {args.width} (teacher width {model_width(args.teacher)})")
+        print("="*80)
+        DistillationTrainer.teacher_weights = args.teacher
+        DistillationTrainer.student_width = args.width
+        student = YOLO(STUDENT_CFG)
+        student.train(trainer=DistillationTrainer, **train_config('distilled', args.distill_epochs))
+        candidates['distilled'] = f"{PROJECT}/distilled/weights/best.pt"
+
+    if args.mode in ('prune', 'both'):
+        print(f"\n{'='*80}")
+        print(f"PRUNING {args.prune_ratio:.0%} of channels + {args.finetune_epochs} epoch fine-tune")
+        print("="*80)
+        # Through the imported module so the pruned checkpoint pickles
+        # compress_model.SplitFreeC2, not __main__.SplitFreeC2
+        import compress_model
+        pruned = compress_model.prune_channels(args.teacher, args.prune_ratio, 640)
+        if pruned is not None:
+            PrunedTrainer.pruned_model = pruned
+            finetune = YOLO(args.teacher)
+            finetune.train(trainer=PrunedTrainer, **train_config('pruned', args.finetune_epochs))
+            candidates['pruned'] = f"{PROJECT}/pruned/weights/best.pt"
+
+    # Compare against the teacher
+    print(f"\n{'='*80}")
+    print("BENCHMARKING ON TEST SET (CPU)")
+    print("="*80)
+    images = load_test_images(DATA_YAML, BENCH_IMAGES)
+    baseline = profile(args.teacher, images)
+    results = {'teacher': baseline}
+    for name, weights in candidates.items():
+        if Path(weights).exists():
+            results[name] = profile(weights, images)
+
+    print(f"\n{'Model':<12} {'Params':<10} {'GFLOPs':<8} {'p50 ms':<9} {'Speedup':<9} "
+          f"{'mAP50':<8} {'ΔmAP50':<9} {'mAP50-95':<9} {'Target':<8}")
+    print("-"*90)
+    for name, r in results.items():
+        speedup = baseline['p50_ms'] / r['p50_ms']
+        delta = (r['map50'] - baseline['map50']) * 100
+        met = speedup >= TARGET_SPEEDUP and -delta <= MAX_MAP50_DROP
+        target = '-' if name == 'teacher' else ('✅' if met else '❌')
+        print(f"{name:<12} {r['params']/1e6:<10.2f} {r['gflops']:<8.2f} {r['p50_ms']:<9.1f} "
+              f"{speedup:<9.2f} {r['map50']*100:<8.2f} {delta:<+9.2f} {r['map50_95']*100:<9.2f} {target:<8}")
+    print("="*80)
+    print(f"\nDeploy a passing model by pointing the app's YOLO(...) path at its best.pt")
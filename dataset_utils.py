@@ -0,0 +1,18 @@
+"""
+Dataset Helpers
+Split → image list lookup shared by the dataset tools (finetune.py,
+packed_dataset.py, benchmark_dataset.py) without importing one another
+"""
+from pathlib import Path
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def split_images(data, split):
+    """Image paths of a split given as a folder or a .txt list (dedup_dataset.py output)"""
+    entry = Path(data[split])
+    if not entry.is_absolute():
+        entry = Path(data['path']) / entry
+    if entry.suffix == '.txt':
+        return [Path(line.strip()) for line in entry.read_text().splitlines() if line.strip()]
+    return sorted(p for p in entry.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
@@ -0,0 +1,55 @@
+"""
+Detection Decision Logic
+Size filter and best-detection selection used by smart_dustbin_smooth.py,
+shared with evaluate_decisions.py so offline results match the live bin
+"""
+
+CONF_THRESHOLD = 0.60
+MIN_SIZE = 0.03
+MAX_SIZE = 1.0
+
+
+def filter_detections(classes, confidences, boxes, names, routed, frame_shape,
+                      min_size=MIN_SIZE, max_size=MAX_SIZE, conf_threshold=None):
+    """Model output (full-frame xyxy) → {class_name: [{'box', 'conf', 'size'}]} for routed classes
+
+    `conf_threshold` is only needed when the detections were produced at a
+    lower confidence than the one being evaluated (the app filters in the
+    model call, which keeps boxes with conf > threshold).
+    """
+    detections = {name: [] for name in routed}
+    frame_area = frame_shape[0] * frame_shape[1]
+
+    for cls, conf, xyxy in zip(classes, confidences, boxes):
+        conf = float(conf)
+        if conf_threshold is not None and conf <= conf_threshold:
+            continue
+        class_name = names[int(cls)]
+        if class_name not in detections:
+            continue  # No bin routed for this class
+
+        x1, y1, x2, y2 = map(int, xyxy)
+
+        # Size filtering
+        size_ratio = (x2 - x1) * (y2 - y1) / frame_area
+        if size_ratio < min_size or size_ratio > max_size:
+            continue
+
+        detections[class_name].append({
+            'box': (x1, y1, x2, y2),
+            'conf': conf,
+            'size': size_ratio
+        })
+    return detections
+
+
+def select_best(detections):
+    """Highest-confidence detection as (class_name, item), or None"""
+    best = None
+    best_conf = 0
+    for class_name, items in detections.items():
+        for item in items:
+            if item['conf'] > best_conf:
+                best_conf = item['conf']
+                best = (class_name, item)
+    return best
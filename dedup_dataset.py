@@ -0,0 +1,201 @@
+"""
+Dataset Deduplication - Perceptual Hash Index
+Finds near-duplicate clusters and train/valid/test leakage in the Roboflow export
+Writes a deduplicated dataset YAML for train_roboflow.py
+"""
+from dataset_utils import split_images
+from multiprocessing import Pool
+from pathlib import Path
+import argparse
+import csv
+import multiprocessing
+import os
+import time
+import cv2
+import numpy as np
+import yaml
+
+DATA_YAML = 'data_roboflow.yaml'
+OUTPUT_DIR = 'runs/dedup'
+HAMMING_THRESHOLD = 6           # bits (of 64) - 0 = exact perceptual match
+CHUNK_SIZE = 256                # Query rows per vectorized Hamming block
+
+# When a cluster spans splits, evaluation splits win (metrics stay honest)
+SPLIT_PRIORITY = ['test', 'val', 'train']
+
+
+# Popcount lookup table for numpy < 2.0 (no np.bitwise_count)
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def phash(path):
+    """64-bit DCT perceptual hash (None if the image can't be read)"""
+    image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def popcount(values):
+    """Per-element popcount of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return POPCOUNT_TABLE[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1)
+
+
+def near_duplicate_pairs(hashes, threshold):
+    """All (i, j), i < j, within `threshold` Hamming distance"""
+    pairs = []
+    n = len(hashes)
+    for start in range(0, n, CHUNK_SIZE):
+        block = hashes[start:start + CHUNK_SIZE]
+        # Only compare against later rows so each pair is found once
+        distances = popcount(block[:, None] ^ hashes[None, start:])
+        rows, cols = np.nonzero(distances <= threshold)
+        keep = cols > rows
+        pairs.append(np.stack([rows[keep] + start, cols[keep] + start], axis=1))
+    return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def cluster(n, pairs):
+    """Union-find over duplicate pairs → cluster id per image"""
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    return np.array([find(i) for i in range(n)])
+
+
+def list_split_images(data):
+    """{split: [image paths]} for every split defined in the data YAML (folders or .txt lists)"""
+    return {split: split_images(data, split) for split in ('train', 'val', 'test') if split in data}
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Perceptual-hash dedup and split leakage report')
+    parser.add_argument('--data', default=DATA_YAML)
+    parser.add_argument('--threshold', type=int, default=HAMMING_THRESHOLD)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print("="*80)
+    print("DATASET DEDUPLICATION - PERCEPTUAL HASH INDEX")
+    print("="*80)
+
+    with open(args.data, 'r') as f:
+        data = yaml.safe_load(f)
+    splits = list_split_images(data)
+
+    paths, split_of = [], []
+    for split, images in splits.items():
+        print(f"  {split:<6} {len(images):>6} images")
+        paths.extend(images)
+        split_of.extend([split] * len(images))
+
+    # Step 1: hash every image in parallel
+    start = time.time()
+    with Pool(args.workers) as pool:
+        raw_hashes = pool.map(phash, paths, chunksize=64)
+    valid = [i for i, h in enumerate(raw_hashes) if h is not None]
+    if len(valid) < len(paths):
+        print(f"⚠️  {len(paths) - len(valid)} unreadable images skipped")
+    paths = [paths[i] for i in valid]
+    split_of = np.array([split_of[i] for i in valid])
+    hashes = np.array([raw_hashes[i] for i in valid], dtype=np.uint64)
+    print(f"\n✓ Hashed {len(hashes)} images in {time.time() - start:.1f}s ({args.workers} workers)")
+
+    # Step 2: vectorized Hamming search + clustering
+    start = time.time()
+    pairs = near_duplicate_pairs(hashes, args.threshold)
+    labels = cluster(len(hashes), pairs)
+    print(f"✓ Found {len(pairs)} near-duplicate pairs in {time.time() - start:.1f}s "
+          f"(≤{args.threshold} bits)")
+
+    cluster_ids, cluster_sizes = np.unique(labels, return_counts=True)
+    dup_clusters = cluster_ids[cluster_sizes > 1]
+
+    # Step 3: decide what to keep - one image per cluster, from the highest-priority split
+    keep = np.ones(len(hashes), dtype=bool)
+    leakage = {}
+    rows = []
+    for cid in dup_clusters:
+        members = np.nonzero(labels == cid)[0]
+        member_splits = set(split_of[members])
+        if len(member_splits) > 1:
+            key = '+'.join(s for s in SPLIT_PRIORITY if s in member_splits)
+            leakage[key] = leakage.get(key, 0) + 1
+        winner_split = next(s for s in SPLIT_PRIORITY if s in member_splits)
+        winner = members[split_of[members] == winner_split][0]
+        keep[members] = False
+        keep[winner] = True
+        for m in members:
+            rows.append({'cluster': int(cid), 'split': split_of[m], 'image': str(paths[m]),
+                         'kept': bool(m == winner)})
+
+    # Report
+    print(f"\n{'='*80}")
+    print("🔍 DUPLICATE REPORT")
+    print("="*80)
+    print(f"{'Metric':<40} {'Value':<20}")
+    print("-"*80)
+    print(f"{'Duplicate clusters':<40} {len(dup_clusters)}")
+    print(f"{'Images in duplicate clusters':<40} {int(cluster_sizes[cluster_sizes > 1].sum())}")
+    if len(dup_clusters):
+        print(f"{'Largest cluster':<40} {int(cluster_sizes.max())}")
+    print(f"{'Images removed':<40} {int((~keep).sum())} ({(~keep).mean():.1%})")
+    print("="*80)
+
+    print(f"\n{'Split':<10} {'Before':<10} {'After':<10} {'Removed':<10}")
+    print("-"*80)
+    for split in splits:
+        mask = split_of == split
+        print(f"{split:<10} {int(mask.sum()):<10} {int((mask & keep).sum()):<10} {int((mask & ~keep).sum()):<10}")
+    print("="*80)
+
+    print(f"\n⚠️  CROSS-SPLIT LEAKAGE (clusters spanning splits)")
+    print("-"*80)
+    if leakage:
+        for key, count in sorted(leakage.items()):
+            print(f"  {key:<30} {count} clusters")
+    else:
+        print("  None found ✅")
+    print("="*80)
+
+    # Outputs: cluster CSV, per-split image lists and a dataset YAML
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(Path(OUTPUT_DIR) / 'duplicate_clusters.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['cluster', 'split', 'image', 'kept'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    dedup_data = {'path': data['path'], 'nc': data['nc'], 'names': data['names']}
+    for split in splits:
+        list_path = Path(OUTPUT_DIR).resolve() / f"{split}.txt"
+        with open(list_path, 'w') as f:
+            for i in np.nonzero((split_of == split) & keep)[0]:
+                f.write(f"{Path(paths[i]).resolve()}\n")
+        dedup_data[split] = str(list_path)
+
+    dedup_yaml = Path(OUTPUT_DIR) / 'data_roboflow_dedup.yaml'
+    with open(dedup_yaml, 'w') as f:
+        f.write("# Deduplicated dataset generated by dedup_dataset.py\n")
+        f.write(f"# Hamming threshold: {args.threshold} bits\n")
+        yaml.safe_dump(dedup_data, f, sort_keys=False)
+
+    print(f"\n✓ Cluster report: {OUTPUT_DIR}/duplicate_clusters.csv")
+    print(f"✓ Dedup dataset: {dedup_yaml}")
+    print(f"\nTrain on it by setting 'data' in train_roboflow.py to {dedup_yaml}")
+    print("="*80)
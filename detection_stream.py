@@ -0,0 +1,212 @@
+"""
+Detection Stream - Local Publish/Subscribe
+Publishes one compact binary record per inferred frame to any number of
+local subscribers (dashboards, conveyor controllers) over TCP or a Unix
+socket. Sends are non-blocking: a subscriber that can't keep up has
+records dropped instead of stalling the detection loop.
+
+Addresses:  tcp:127.0.0.1:8765   unix:/tmp/dustbin_detections.sock
+"""
+import errno
+import os
+import socket
+import struct
+import time
+import numpy as np
+
+DEFAULT_ADDRESS = 'tcp:127.0.0.1:8765'
+MAX_DETECTIONS = 32             # Extra detections in one frame are dropped
+SEND_BUFFER_BYTES = 64 * 1024   # Kernel buffer per subscriber before records are dropped
+
+# Record = header + packed arrays (little-endian):
+#   magic u4 | seq u8 | timestamp f8 | count u2 | classes i2[count] | confidences f4[count] | boxes f4[count, 4]
+MAGIC = 0x44455431              # 'DET1'
+HEADER = struct.Struct('<IQdH')
+
+
+def pack_record(seq, timestamp, classes, confidences, boxes):
+    """One frame's detections → bytes (boxes are full-frame pixel xyxy)"""
+    count = min(len(classes), MAX_DETECTIONS)
+    return b''.join((
+        HEADER.pack(MAGIC, seq, timestamp, count),
+        np.asarray(classes[:count], dtype='<i2').tobytes(),
+        np.asarray(confidences[:count], dtype='<f4').tobytes(),
+        np.asarray(boxes[:count], dtype='<f4').reshape(-1, 4).tobytes(),
+    ))
+
+
+def unpack_record(data):
+    """bytes → (seq, timestamp, classes, confidences, boxes) as zero-copy array views"""
+    magic, seq, timestamp, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a detection record")
+    offset = HEADER.size
+    classes = np.frombuffer(data, dtype='<i2', count=count, offset=offset)
+    offset += 2 * count
+    confidences = np.frombuffer(data, dtype='<f4', count=count, offset=offset)
+    offset += 4 * count
+    boxes = np.frombuffer(data, dtype='<f4', count=count * 4, offset=offset).reshape(count, 4)
+    return seq, timestamp, classes, confidences, boxes
+
+
+def record_size(data, offset=0):
+    """Total length of the record starting at `offset`, or None if the header is incomplete"""
+    if len(data) - offset < HEADER.size:
+        return None
+    count = struct.unpack_from('<H', data, offset + HEADER.size - 2)[0]
+    return HEADER.size + count * (2 + 4 + 16)
+
+
+def parse_address(address):
+    """'tcp:host:port' / 'unix:path' → (family, sockaddr)"""
+    kind, _, rest = address.partition(':')
+    if kind == 'unix':
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix sockets are not available on this platform - use tcp:")
+        return socket.AF_UNIX, rest
+    if kind == 'tcp':
+        host, _, port = rest.rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unknown stream address: {address}")
+
+
+class DetectionPublisher:
+    """Non-blocking publisher, driven from the detection loop (no threads)"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, send_buffer=SEND_BUFFER_BYTES):
+        self.family, sockaddr = parse_address(address)
+        if self.family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+        self.server = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(sockaddr)
+        self.server.listen(16)
+        self.server.setblocking(False)
+        self.send_buffer = send_buffer
+
+        bound = self.server.getsockname()
+        self.address = f"unix:{bound}" if self.family == socket.AF_UNIX else f"tcp:{bound[0]}:{bound[1]}"
+        self.subscribers = {}           # socket → unsent tail of a partially written record
+        self.seq = 0
+        self.published = 0
+        self.dropped = 0
+        self.disconnects = 0
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            conn.setblocking(False)
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+            if self.family == socket.AF_INET:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.subscribers[conn] = b''
+
+    def _send(self, conn, data):
+        """Returns the unsent tail; raises OSError if the subscriber went away"""
+        try:
+            sent = conn.send(data)
+        except (BlockingIOError, InterruptedError):
+            return data
+        return data[sent:]
+
+    def publish(self, classes, confidences, boxes, timestamp=None):
+        """Send one record to every subscriber; returns the record's seq"""
+        self._accept()
+        seq = self.seq
+        self.seq += 1
+        if not self.subscribers:
+            return seq
+        record = pack_record(seq, time.time() if timestamp is None else timestamp, classes, confidences, boxes)
+
+        for conn, pending in list(self.subscribers.items()):
+            try:
+                if pending:
+                    # Finish the half-sent record first; a stream can't skip mid-record
+                    pending = self._send(conn, pending)
+                    if pending:
+                        self.subscribers[conn] = pending
+                        self.dropped += 1
+                        continue
+                self.subscribers[conn] = self._send(conn, record)
+                self.published += 1
+            except OSError as e:
+                if e.errno not in (errno.EPIPE, errno.ECONNRESET, errno.ENOTCONN, None):
+                    print(f"⚠️  Detection stream subscriber error: {e}")
+                conn.close()
+                del self.subscribers[conn]
+                self.disconnects += 1
+        return seq
+
+    def stats(self):
+        return {
+            'subscribers': len(self.subscribers),
+            'records': self.seq,
+            'published': self.published,
+            'dropped': self.dropped,
+            'disconnects': self.disconnects,
+        }
+
+    def close(self):
+        for conn in self.subscribers:
+            conn.close()
+        self.subscribers.clear()
+        sockaddr = self.server.getsockname()
+        self.server.close()
+        if self.family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+
+
+class DetectionSubscriber:
+    """Blocking reader for consumers; iterate it to get decoded records"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None, recv_bytes=64 * 1024):
+        family, sockaddr = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(sockaddr)
+        self.recv_bytes = recv_bytes
+        self.buffer = bytearray()
+        self.last_seq = None
+        self.gaps = 0                   # Records dropped by the publisher for this subscriber
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            size = record_size(self.buffer)
+            if size is not None and len(self.buffer) >= size:
+                record = unpack_record(bytes(self.buffer[:size]))
+                del self.buffer[:size]
+                if self.last_seq is not None and record[0] > self.last_seq + 1:
+                    self.gaps += record[0] - self.last_seq - 1
+                self.last_seq = record[0]
+                return record
+            chunk = self.sock.recv(self.recv_bytes)
+            if not chunk:
+                raise StopIteration
+            self.buffer += chunk
+
+    def close(self):
+        self.sock.close()
+
+
+if __name__ == '__main__':
+    # Minimal consumer: python detection_stream.py [address]
+    import sys
+    address = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ADDRESS
+    print(f"📡 Listening to {address} (Ctrl+C to stop)")
+    subscriber = DetectionSubscriber(address)
+    try:
+        for seq, timestamp, classes, confidences, boxes in subscriber:
+            latency = (time.time() - timestamp) * 1000
+            items = ', '.join(f"{c}:{p:.0%}" for c, p in zip(classes, confidences))
+            print(f"#{seq:<8} {latency:6.1f} ms  [{items}]  (gaps {subscriber.gaps})")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
@@ -0,0 +1,285 @@
+"""
+Offline Decision-Logic Evaluator
+Runs the bin's real trigger pipeline (size filter, best-confidence pick,
+busy-skip timer) over labeled clips and scores what the bin would have done:
+trigger precision/recall, wrong-bin rate and time-to-trigger, per config.
+
+The detector runs once per clip at a low confidence and is cached; every
+config is then replayed from the cache, so a threshold grid takes seconds.
+
+Labels: next to each clip (video file or image folder) put <clip>.events.json:
+    {"fps": 30, "events": [{"class": "paper", "start": 3.2, "end": 6.0}, ...]}
+with times in seconds from the first frame ("fps" only needed for image folders).
+"""
+from frame_sources import ReplaySource
+from chute_roi import ChuteROI
+from bin_routing import BinRouter, ROUTES_FILE
+from servo_timing import ServoTimer
+from decision_logic import filter_detections, select_best, CONF_THRESHOLD, MIN_SIZE, MAX_SIZE
+from pathlib import Path
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+OUTPUT_DIR = 'runs/decisions'
+CACHE_CONF = 0.25               # Detector confidence for the cache (lowest threshold you can evaluate)
+INFERENCE_IMGSZ = 640
+BATCH_SIZE = 16
+TRIGGER_GRACE = 1.0             # s after an event ends that a trigger still counts for it
+
+# Current app timing (smart_dustbin_smooth.py)
+APP_OPERATION_TIME = 4.0
+APP_COOLDOWN_TIME = 0.5
+
+
+def load_events(clip):
+    """(fps or None, start[], end[], class names[]) from <clip>.events.json"""
+    clip = Path(clip)
+    label_path = Path(str(clip).rstrip('/\\') + '.events.json')
+    if not label_path.exists() and clip.is_dir():
+        label_path = clip / 'events.json'
+    with open(label_path, 'r') as f:
+        labels = json.load(f)
+    events = labels.get('events', [])
+    return (labels.get('fps'),
+            np.array([e['start'] for e in events], dtype=np.float64),
+            np.array([e['end'] for e in events], dtype=np.float64),
+            [e['class'] for e in events])
+
+
+def cache_path(clip, weights, imgsz, roi_file):
+    # ROI by content: re-drawing chute_roi.json under the same name must not reuse old detections
+    roi_key = hashlib.sha1(Path(roi_file).read_bytes()).hexdigest() if roi_file else ''
+    key = f"{Path(clip).resolve()}|{Path(weights).resolve()}|{os.path.getmtime(weights)}|{imgsz}|{CACHE_CONF}|{roi_key}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return Path(OUTPUT_DIR) / 'cache' / f"{Path(clip).stem}_{digest}.npz"
+
+
+def detect_clip(model, clip, imgsz=INFERENCE_IMGSZ, roi_file=None):
+    """Every frame through the detector once → flat arrays (full-frame boxes)"""
+    source = ReplaySource(clip, loop=False)
+    fps = source.capture.get(cv2.CAP_PROP_FPS) if source.capture is not None else 0
+    frame_ids, classes, confidences, boxes = [], [], [], []
+    batch, batch_ids = [], []
+    roi = None
+    frame_shape = None
+    n_frames = 0
+
+    def flush():
+        results = model(batch, conf=CACHE_CONF, imgsz=imgsz, verbose=False)
+        for index, result in zip(batch_ids, results):
+            xyxy = result.boxes.xyxy.cpu().numpy()
+            if roi is not None and len(xyxy):
+                xyxy = roi.to_frame(xyxy)
+            frame_ids.append(np.full(len(xyxy), index, dtype=np.int32))
+            classes.append(result.boxes.cls.cpu().numpy().astype(np.int16))
+            confidences.append(result.boxes.conf.cpu().numpy().astype(np.float32))
+            boxes.append(np.asarray(xyxy, dtype=np.float32).reshape(-1, 4))
+        batch.clear()
+        batch_ids.clear()
+
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        if frame_shape is None:
+            frame_shape = frame.shape
+            if roi_file:
+                roi = ChuteROI.load(roi_file, frame_shape)
+        # Copy: the ROI crop is a view / shared buffer
+        batch.append(roi.crop(frame).copy() if roi is not None else frame)
+        batch_ids.append(n_frames)
+        n_frames += 1
+        if len(batch) == BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    return {
+        'frame': np.concatenate(frame_ids) if frame_ids else np.zeros(0, np.int32),
+        'cls': np.concatenate(classes) if classes else np.zeros(0, np.int16),
+        'conf': np.concatenate(confidences) if confidences else np.zeros(0, np.float32),
+        'boxes': np.concatenate(boxes) if boxes else np.zeros((0, 4), np.float32),
+        'n_frames': n_frames,
+        'fps': fps,
+        'frame_shape': np.array(frame_shape or (720, 1280, 3)),
+        'names': np.array([model.names[i] for i in sorted(model.names)]),
+    }
+
+
+def replay(cache, fps, names, routed, config):
+    """The live loop's decisions on cached detections → (trigger times, trigger classes, busy skips)"""
+    clock_now = [0.0]
+    timer = ServoTimer(config['operation_time'], config['cooldown_time'], clock=lambda: clock_now[0])
+    frame_shape = tuple(cache['frame_shape'])
+
+    # Vectorised pre-mask: only frames with something above threshold can trigger
+    keep = cache['conf'] > config['conf']
+    frames = cache['frame'][keep]
+    classes, confidences, boxes = cache['cls'][keep], cache['conf'][keep], cache['boxes'][keep]
+    candidate_frames, starts = np.unique(frames, return_index=True)
+    ends = np.append(starts[1:], len(frames))
+
+    trigger_times, trigger_classes, skipped = [], [], 0
+    for frame_index, a, b in zip(candidate_frames, starts, ends):
+        clock_now[0] = frame_index / fps
+        timer.update()
+        detections = filter_detections(classes[a:b], confidences[a:b], boxes[a:b], names, routed, frame_shape,
+                                       config['min_size'], config['max_size'])
+        best = select_best(detections)
+        if best is None:
+            continue
+        if timer.state['active']:
+            skipped += 1
+            continue
+        timer.try_start(best[0])
+        trigger_times.append(clock_now[0])
+        trigger_classes.append(best[0])
+    return np.array(trigger_times), trigger_classes, skipped
+
+
+def score(trigger_times, trigger_routes, starts, ends, event_routes, grace=TRIGGER_GRACE):
+    """One-to-one trigger ↔ event matching; returns counts for aggregation
+
+    Events are taken in start order and each claims the earliest unused
+    trigger in its window, so one trigger never counts for two overlapping
+    events and later triggers in the same window stay unmatched (double opens).
+    """
+    n_triggers, n_events = len(trigger_times), len(starts)
+    result = {'triggers': n_triggers, 'events': n_events, 'matched_triggers': 0,
+              'hit_events': 0, 'wrong_bin': 0, 'time_to_trigger': np.zeros(0)}
+    if not n_triggers or not n_events:
+        return result
+    in_window = (trigger_times[:, None] >= starts[None, :]) & (trigger_times[:, None] <= ends[None, :] + grace)
+    used = np.zeros(n_triggers, dtype=bool)
+    first = np.full(n_events, -1)               # Trigger matched to each event
+    for event in np.argsort(starts, kind='stable'):
+        candidates = np.flatnonzero(in_window[:, event] & ~used)
+        if len(candidates):
+            first[event] = candidates[0]
+            used[candidates[0]] = True
+    hit = first >= 0
+    result['matched_triggers'] = int(used.sum())
+    result['hit_events'] = int(hit.sum())
+    result['wrong_bin'] = int((trigger_routes[first[hit]] != event_routes[hit]).sum())
+    result['time_to_trigger'] = trigger_times[first[hit]] - starts[hit]
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate the trigger decision logic on labeled clips')
+    parser.add_argument('clips', nargs='+', help='Video files or image folders with <clip>.events.json labels')
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--conf', type=float, nargs='+', default=[CONF_THRESHOLD])
+    parser.add_argument('--min-size', type=float, nargs='+', default=[MIN_SIZE])
+    parser.add_argument('--max-size', type=float, nargs='+', default=[MAX_SIZE])
+    parser.add_argument('--operation-time', type=float, nargs='+', default=[APP_OPERATION_TIME])
+    parser.add_argument('--cooldown', type=float, nargs='+', default=[APP_COOLDOWN_TIME])
+    parser.add_argument('--roi', help='Chute ROI file to apply (as the app does when chute_roi.json exists)')
+    parser.add_argument('--imgsz', type=int, default=INFERENCE_IMGSZ)
+    parser.add_argument('--grace', type=float, default=TRIGGER_GRACE)
+    parser.add_argument('--routes', default=ROUTES_FILE)
+    args = parser.parse_args()
+
+    if min(args.conf) < CACHE_CONF:
+        parser.error(f"--conf values must be ≥ the cache confidence {CACHE_CONF}")
+
+    print("="*80)
+    print("DECISION-LOGIC EVALUATION")
+    print("="*80)
+
+    router = BinRouter.load(args.routes)
+    router.close()
+    model = None                # Only loaded when a clip has no cache yet
+
+    # Detector pass (cached per clip + weights)
+    clips = []
+    for clip in args.clips:
+        path = cache_path(clip, args.weights, args.imgsz, args.roi)
+        cache = dict(np.load(path)) if path.exists() else None
+        if cache is not None and 'names' in cache:
+            print(f"  ✓ {clip}: cached detections ({int(cache['n_frames'])} frames)")
+        else:
+            if model is None:
+                from ultralytics import YOLO
+                model = YOLO(args.weights)
+            start = time.time()
+            cache = detect_clip(model, clip, args.imgsz, args.roi)
+            elapsed = time.time() - start
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(path, **cache)
+            print(f"  🔍 {clip}: {cache['n_frames']} frames in {elapsed:.1f}s "
+                  f"({cache['n_frames'] / max(elapsed, 1e-6):.0f} fps)")
+        label_fps, starts, ends, event_classes = load_events(clip)
+        fps = float(cache['fps']) or label_fps or 30.0
+        event_routes = np.array([router[c].name for c in event_classes])
+        clips.append((cache, fps, starts, ends, event_routes))
+
+    # Class names travel with the cache, so a fully cached run never imports a model
+    names = dict(enumerate(clips[0][0]['names'].tolist()))
+    routed = [name for name in names.values() if name in router]
+
+    # Replay every config over every clip
+    configs = [
+        {'conf': c, 'min_size': lo, 'max_size': hi, 'operation_time': o, 'cooldown_time': cd}
+        for c, lo, hi, o, cd in itertools.product(args.conf, args.min_size, args.max_size,
+                                                  args.operation_time, args.cooldown)
+    ]
+    rows = []
+    start = time.perf_counter()
+    for config in configs:
+        totals = {'triggers': 0, 'events': 0, 'matched_triggers': 0, 'hit_events': 0, 'wrong_bin': 0, 'skipped': 0}
+        delays = []
+        for cache, fps, starts, ends, event_routes in clips:
+            times, trigger_classes, skipped = replay(cache, fps, names, routed, config)
+            trigger_routes = np.array([router[c].name for c in trigger_classes])
+            result = score(times, trigger_routes, starts, ends, event_routes, args.grace)
+            for key in totals:
+                totals[key] += skipped if key == 'skipped' else result[key]
+            delays.append(result['time_to_trigger'])
+        delays = np.concatenate(delays)
+        precision = totals['matched_triggers'] / totals['triggers'] if totals['triggers'] else 0.0
+        recall = totals['hit_events'] / totals['events'] if totals['events'] else 0.0
+        rows.append({
+            **config,
+            'triggers': totals['triggers'],
+            'events': totals['events'],
+            'precision': precision,
+            'recall': recall,
+            'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            'wrong_bin_rate': totals['wrong_bin'] / totals['hit_events'] if totals['hit_events'] else 0.0,
+            'ttt_p50_s': float(np.percentile(delays, 50)) if len(delays) else None,
+            'ttt_p95_s': float(np.percentile(delays, 95)) if len(delays) else None,
+            'busy_skips': totals['skipped'],
+        })
+    replay_time = time.perf_counter() - start
+
+    rows.sort(key=lambda r: (-r['f1'], r['wrong_bin_rate']))
+    print(f"\n{'='*80}")
+    print("📊 TRIGGER QUALITY PER CONFIG (best F1 first)")
+    print("="*80)
+    print(f"{'Conf':<6} {'MinSz':<7} {'MaxSz':<6} {'Oper':<5} {'Cool':<5} {'Prec':<7} {'Recall':<7} {'WrongBin':<9} {'TTT p50':<8} {'TTT p95':<8} {'Skips':<6}")
+    print("-"*80)
+    for r in rows:
+        p50_text = f"{r['ttt_p50_s']:.2f}s" if r['ttt_p50_s'] is not None else '-'
+        p95_text = f"{r['ttt_p95_s']:.2f}s" if r['ttt_p95_s'] is not None else '-'
+        print(f"{r['conf']:<6.2f} {r['min_size']:<7.3f} {r['max_size']:<6.2f} {r['operation_time']:<5g} {r['cooldown_time']:<5g} "
+              f"{r['precision']:<7.1%} {r['recall']:<7.1%} {r['wrong_bin_rate']:<9.1%} {p50_text:<8} {p95_text:<8} {r['busy_skips']:<6}")
+    print("="*80)
+    print(f"{len(configs)} configs × {len(clips)} clips replayed in {replay_time:.1f}s")
+    print("Precision counts double opens within one event as false triggers; TTT = event start → trigger.")
+
+    out = Path(OUTPUT_DIR) / f"decisions_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results: {out}")
@@ -0,0 +1,244 @@
+"""
+Incremental Fine-Tune - Field Captures + Replay Buffer
+Starts from the deployed best.pt and trains a few epochs on the reviewed
+samples from review_queue.py, mixed with a random replay buffer of the
+original training images so old classes/scenes aren't forgotten. The
+backbone stays frozen. A fraction of the work of the full 100-epoch run.
+
+The candidate is then checked against the current model on the test split
+(overall and per-class mAP); only if it doesn't regress is it copied to
+models/incoming/, where the running apps hot-swap it.
+
+    python finetune.py
+    python finetune.py --replay 3000 --epochs 20 --no-promote
+"""
+from dataset_utils import IMAGE_SUFFIXES, split_images
+from pathlib import Path
+import argparse
+import json
+import multiprocessing
+import random
+import shutil
+import time
+import yaml
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+DATA_YAML = 'data_roboflow.yaml'
+ACCEPTED_DIR = 'review/accepted'
+OUTPUT_DIR = 'runs/finetune'
+PROMOTE_DIR = 'models/incoming'     # Watched by ModelReloader in the apps and the inference server
+
+REPLAY_SIZE = 1500                  # Old training images mixed in
+FIELD_REPEAT = 2                    # Reviewed samples appear this many times per epoch
+FIELD_HOLDOUT = 0.2                 # Share of reviewed samples kept out for the before/after check
+MIN_HOLDOUT_SOURCE = 10             # Need at least this many reviewed samples to hold any out
+EPOCHS = 15
+FREEZE_LAYERS = 10                  # YOLO11 backbone
+LR0 = 0.002
+
+MAX_MAP_DROP = 0.005                # Allowed mAP50-95 drop on the test split
+MAX_CLASS_DROP = 0.02               # Allowed per-class mAP50-95 drop
+
+FULL_RUN_IMAGES = 11639
+FULL_RUN_EPOCHS = 100
+
+def write_list(path, images):
+    path.write_text(''.join(f"{Path(image).resolve()}\n" for image in images))
+    return str(path.resolve())
+
+
+def holdout_split(images, share, seed):
+    """Deterministic field train/holdout split (same images held out on every run with the same seed)"""
+    if len(images) < MIN_HOLDOUT_SOURCE:
+        return images, []
+    shuffled = sorted(images)
+    random.Random(seed).shuffle(shuffled)
+    count = max(1, int(len(shuffled) * share))
+    return shuffled[count:], shuffled[:count]
+
+
+def evaluate(weights, data_yaml, split):
+    """mAP50, mAP50-95 and per-class mAP50-95 of a weights file"""
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    results = model.val(data=data_yaml, split=split, plots=False, verbose=False)
+    return {
+        'map50': float(results.box.map50),
+        'map50_95': float(results.box.map),
+        'per_class': {model.names[i]: float(m) for i, m in enumerate(results.box.maps)},
+    }
+
+
+def regression_check(baseline, candidate, max_drop=MAX_MAP_DROP, max_class_drop=MAX_CLASS_DROP):
+    """(passed, reasons) - candidate may not lose more than the allowed mAP overall or per class"""
+    reasons = []
+    if candidate['map50_95'] < baseline['map50_95'] - max_drop:
+        reasons.append(f"mAP50-95 {baseline['map50_95']:.3f} → {candidate['map50_95']:.3f}")
+    for name, value in baseline['per_class'].items():
+        new = candidate['per_class'].get(name, 0.0)
+        if new < value - max_class_drop:
+            reasons.append(f"{name} mAP50-95 {value:.3f} → {new:.3f}")
+    return not reasons, reasons
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Incremental fine-tune from reviewed field captures')
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--data', default=DATA_YAML)
+    parser.add_argument('--accepted', default=ACCEPTED_DIR)
+    parser.add_argument('--replay', type=int, default=REPLAY_SIZE)
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--freeze', type=int, default=FREEZE_LAYERS)
+    parser.add_argument('--device', default=None, help='Default: GPU 0 if available, else cpu')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-promote', action='store_true', help="Don't copy a passing model to models/incoming/")
+    args = parser.parse_args()
+
+    import torch
+    from ultralytics import YOLO
+
+    print("="*80)
+    print("INCREMENTAL FINE-TUNE - FIELD CAPTURES + REPLAY BUFFER")
+    print("="*80)
+
+    with open(args.data, 'r') as f:
+        data = yaml.safe_load(f)
+    field = sorted(p for p in (Path(args.accepted) / 'images').glob('*') if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not field:
+        print(f"\n❌ No reviewed samples in {args.accepted}/images - run review_queue.py first")
+        exit(1)
+    field_train, field_holdout = holdout_split(field, FIELD_HOLDOUT, args.seed)
+
+    old_train = split_images(data, 'train')
+    replay = random.Random(args.seed).sample(old_train, min(args.replay, len(old_train)))
+
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    run_dir = Path(OUTPUT_DIR) / stamp
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    # Ultralytics finds labels by swapping /images/ for /labels/, which both
+    # the Roboflow export and review/accepted/ follow
+    finetune_data = {'nc': data['nc'], 'names': data['names'],
+                     'train': write_list(run_dir / 'train.txt', field_train * FIELD_REPEAT + replay),
+                     'val': write_list(run_dir / 'val.txt', split_images(data, 'val')),
+                     'test': write_list(run_dir / 'test.txt', split_images(data, 'test'))}
+    finetune_yaml = run_dir / 'data_finetune.yaml'
+    with open(finetune_yaml, 'w') as f:
+        f.write("# Fine-tune dataset generated by finetune.py\n")
+        yaml.safe_dump(finetune_data, f, sort_keys=False)
+
+    field_yaml = None
+    if field_holdout:
+        field_yaml = run_dir / 'data_field.yaml'
+        holdout_list = write_list(run_dir / 'field_holdout.txt', field_holdout)
+        # Val-only, but Ultralytics' dataset check requires a train entry too
+        with open(field_yaml, 'w') as f:
+            yaml.safe_dump({'nc': data['nc'], 'names': data['names'],
+                            'train': holdout_list, 'val': holdout_list}, f, sort_keys=False)
+
+    device = args.device or (0 if torch.cuda.is_available() else 'cpu')
+    train_images = len(field_train) * FIELD_REPEAT + len(replay)
+    work_share = train_images * args.epochs / (FULL_RUN_IMAGES * FULL_RUN_EPOCHS)
+    print(f"\n📊 Data:")
+    print(f"  Field samples: {len(field)} ({len(field_train)} train ×{FIELD_REPEAT}, {len(field_holdout)} held out)")
+    print(f"  Replay buffer: {len(replay)} of {len(old_train)} original training images")
+    print(f"  Work vs full retrain: {work_share:.1%} ({train_images} images × {args.epochs} epochs)")
+    print(f"  Device: {device} | frozen layers: {args.freeze}")
+
+    # Train
+    print(f"\n{'='*80}")
+    print("FINE-TUNING...")
+    print("="*80)
+    start = time.time()
+    model = YOLO(args.weights)
+    model.train(
+        data=str(finetune_yaml),
+        epochs=args.epochs,
+        batch=32,
+        imgsz=640,
+        device=device,
+        workers=0,                  # Windows fix
+        freeze=args.freeze,
+        optimizer='SGD',            # Fixed low LR - 'auto' would restart from a high one
+        lr0=LR0,
+        lrf=0.1,
+        warmup_epochs=1,
+        close_mosaic=max(1, args.epochs // 4),
+        patience=5,
+        seed=args.seed,
+        project=OUTPUT_DIR,
+        name=f"{stamp}_train",
+        exist_ok=True,
+        plots=False,
+        verbose=False,
+    )
+    train_time = time.time() - start
+    candidate_path = Path(OUTPUT_DIR) / f"{stamp}_train" / 'weights' / 'best.pt'
+
+    # Regression check on the untouched test split (+ field holdout before/after)
+    print(f"\n{'='*80}")
+    print("REGRESSION CHECK (test split)")
+    print("="*80)
+    baseline = evaluate(args.weights, str(finetune_yaml), 'test')
+    candidate = evaluate(str(candidate_path), str(finetune_yaml), 'test')
+    passed, reasons = regression_check(baseline, candidate)
+
+    print(f"{'Metric':<25} {'Current':<12} {'Fine-tuned':<12} {'Change':<10}")
+    print("-"*80)
+    rows = [('mAP50', baseline['map50'], candidate['map50']),
+            ('mAP50-95', baseline['map50_95'], candidate['map50_95'])]
+    rows += [(f"{name} mAP50-95", value, candidate['per_class'].get(name, 0.0))
+             for name, value in baseline['per_class'].items()]
+    for label, before, after in rows:
+        print(f"{label:<25} {before:<12.3f} {after:<12.3f} {after - before:<+10.3f}")
+
+    # Informational only: a failure here must not block promotion or the report
+    field_before = field_after = field_error = None
+    if field_yaml:
+        try:
+            field_before = evaluate(args.weights, str(field_yaml), 'val')
+            field_after = evaluate(str(candidate_path), str(field_yaml), 'val')
+            print(f"{'Field holdout mAP50':<25} {field_before['map50']:<12.3f} {field_after['map50']:<12.3f} "
+                  f"{field_after['map50'] - field_before['map50']:<+10.3f}")
+        except Exception as e:
+            field_before = field_after = None
+            field_error = f"{type(e).__name__}: {e}"
+            print(f"⚠️  Field holdout check failed ({field_error})")
+    print("="*80)
+
+    promoted = None
+    if passed:
+        print(f"✅ No regression (limits: {MAX_MAP_DROP} overall, {MAX_CLASS_DROP} per class)")
+        if not args.no_promote:
+            Path(PROMOTE_DIR).mkdir(parents=True, exist_ok=True)
+            promoted = Path(PROMOTE_DIR) / f"finetune_{stamp}.pt"
+            shutil.copy2(candidate_path, promoted)
+            print(f"🔄 Copied to {promoted} - running bins will hot-swap it")
+    else:
+        print("❌ Regression - not promoted:")
+        for reason in reasons:
+            print(f"   {reason}")
+
+    report = {
+        'base_weights': args.weights,
+        'candidate': str(candidate_path),
+        'field_samples': len(field),
+        'replay_images': len(replay),
+        'epochs': args.epochs,
+        'train_seconds': round(train_time, 1),
+        'work_vs_full_retrain': round(work_share, 4),
+        'test_baseline': baseline,
+        'test_candidate': candidate,
+        'field_baseline': field_before,
+        'field_candidate': field_after,
+        'field_error': field_error,
+        'passed': passed,
+        'regressions': reasons,
+        'promoted': str(promoted) if promoted else None,
+    }
+    with open(run_dir / 'report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n⏱️  Fine-tune time: {train_time / 60:.1f} min")
+    print(f"✓ Report: {run_dir / 'report.json'}")
@@ -0,0 +1,151 @@
+"""
+Shared-Memory Frame Bus
+Preallocated ring of NumPy frame buffers + compact detection records in
+multiprocessing.shared_memory, so capture, inference and UI processes can
+exchange data without pickling or copying frames
+"""
+from multiprocessing import shared_memory
+import time
+import numpy as np
+
+MAX_DETECTIONS = 32             # Detection slots per record
+
+# Per-slot header: sequence number (-1 while being written) + capture time
+SLOT_HEADER = np.dtype([('seq', np.int64), ('timestamp', np.float64)])
+
+# One record per inferred frame
+DETECTION_RECORD = np.dtype([
+    ('seq', np.int64),                  # Frame sequence number (-1 while being written)
+    ('capture_time', np.float64),       # Written by capture
+    ('pickup_time', np.float64),        # Inference read the frame
+    ('done_time', np.float64),          # Inference finished post-processing
+    ('count', np.int32),
+    ('classes', np.int16, MAX_DETECTIONS),
+    ('confidences', np.float32, MAX_DETECTIONS),
+    ('boxes', np.float32, (MAX_DETECTIONS, 4)),
+])
+
+
+def attach_shared_memory(name):
+    """Open an existing block without letting this process's tracker unlink it"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class FrameRing:
+    """Single-writer ring of fixed-shape uint8 frames
+
+    The writer marks a slot with seq=-1, copies the frame in and then
+    publishes the new seq (a seqlock). Readers get zero-copy views and can
+    check `is_current(seq)` afterwards to detect that the slot was reused.
+    """
+
+    def __init__(self, name=None, slots=8, shape=(720, 1280, 3), create=False):
+        self.slots = slots
+        self.shape = tuple(shape)
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = SLOT_HEADER.itemsize * slots
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=header_bytes + frame_bytes * slots)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.owner = create
+        self.headers = np.ndarray((slots,), dtype=SLOT_HEADER, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self.headers['seq'] = -1
+        self.next_seq = 0
+
+    def write(self, frame, timestamp=None):
+        """Copy one frame into the next slot (writer side)"""
+        seq = self.next_seq
+        slot = seq % self.slots
+        self.headers['seq'][slot] = -1
+        np.copyto(self.frames[slot], frame)
+        self.headers['timestamp'][slot] = time.perf_counter() if timestamp is None else timestamp
+        self.headers['seq'][slot] = seq
+        self.next_seq += 1
+        return seq
+
+    def latest(self, newer_than=-1):
+        """(seq, timestamp, zero-copy view) of the newest complete frame, or None"""
+        seqs = self.headers['seq']
+        slot = int(np.argmax(seqs))
+        seq = int(seqs[slot])
+        if seq <= newer_than:
+            return None
+        return seq, float(self.headers['timestamp'][slot]), self.frames[slot]
+
+    def get(self, seq):
+        """Zero-copy view of frame `seq` if it is still in the ring"""
+        slot = seq % self.slots
+        if int(self.headers['seq'][slot]) != seq:
+            return None
+        return self.frames[slot]
+
+    def is_current(self, seq):
+        """True if frame `seq` has not been overwritten"""
+        return int(self.headers['seq'][seq % self.slots]) == seq
+
+    def close(self):
+        # Views must go before the buffer can be released
+        del self.headers, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class DetectionRing:
+    """Single-writer ring of fixed-size detection records"""
+
+    def __init__(self, name=None, slots=64, create=False):
+        self.slots = slots
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=DETECTION_RECORD.itemsize * slots)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.owner = create
+        self.records = np.ndarray((slots,), dtype=DETECTION_RECORD, buffer=self.shm.buf)
+        if create:
+            self.records['seq'] = -1
+        self.next_index = 0
+
+    def publish(self, seq, capture_time, pickup_time, classes, confidences, boxes):
+        """Write one record (writer side); extra detections beyond MAX_DETECTIONS are dropped"""
+        record = self.records[self.next_index % self.slots]
+        record['seq'] = -1
+        n = min(len(classes), MAX_DETECTIONS)
+        record['capture_time'] = capture_time
+        record['pickup_time'] = pickup_time
+        record['count'] = n
+        record['classes'][:n] = classes[:n]
+        record['confidences'][:n] = confidences[:n]
+        record['boxes'][:n] = boxes[:n]
+        record['done_time'] = time.perf_counter()
+        record['seq'] = seq
+        self.next_index += 1
+
+    def latest(self, newer_than=-1):
+        """Copy of the newest complete record, or None"""
+        seqs = self.records['seq']
+        index = int(np.argmax(seqs))
+        if int(seqs[index]) <= newer_than:
+            return None
+        record = self.records[index].copy()
+        # Re-check: the writer may have started reusing this slot while we copied
+        if int(self.records['seq'][index]) != int(record['seq']):
+            return None
+        return record
+
+    def close(self):
+        del self.records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
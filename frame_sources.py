@@ -0,0 +1,391 @@
+"""
+Frame Sources
+Opens live cameras or replays recorded footage behind the same read() interface
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import platform
+import threading
+import time
+import cv2
+import numpy as np
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_SUFFIXES = ('.mp4', '.avi', '.mkv', '.mov')
+RELEASE_TIMEOUT = 2.0           # s to wait for the grab thread to leave grab()/retrieve()
+
+
+class ReplaySource:
+    """Replays a video file or image folder like a cv2.VideoCapture
+
+    Loops forever by default so benchmarks can run for any number of frames.
+    With `fps` set, read() paces itself to real time; otherwise it returns
+    frames as fast as they can be decoded.
+    """
+
+    def __init__(self, path, fps=None, loop=True, preload=False, size=None):
+        self.path = Path(path)
+        self.fps = fps
+        self.loop = loop
+        self.size = size                # (width, height) or None for native
+        self.frame_index = 0
+        self.next_time = None
+        self.capture = None
+        self.images = None
+        self.frames = None
+
+        if self.path.is_dir():
+            self.images = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+            if not self.images:
+                raise FileNotFoundError(f"No images in {self.path}")
+        elif self.path.suffix.lower() in VIDEO_SUFFIXES:
+            self.capture = cv2.VideoCapture(str(self.path))
+            if not self.capture.isOpened():
+                raise FileNotFoundError(f"Cannot open video {self.path}")
+        else:
+            raise ValueError(f"Unsupported replay source: {self.path}")
+
+        # Preloading keeps disk/decode cost out of throughput measurements
+        if preload:
+            self.loop = False
+            self.frames = []
+            while True:
+                ret, frame = self._decode()
+                if not ret:
+                    break
+                self.frames.append(frame)
+            self.loop = loop
+            self.frame_index = 0
+
+    def _resize(self, frame):
+        if self.size and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+            frame = cv2.resize(frame, tuple(self.size))
+        return frame
+
+    def _decode(self):
+        """Next frame from disk (wrapping at the end when looping)"""
+        if self.images is not None:
+            if self.frame_index >= len(self.images):
+                if not self.loop:
+                    return False, None
+                self.frame_index = 0
+            frame = cv2.imread(str(self.images[self.frame_index]))
+            self.frame_index += 1
+            if frame is None:
+                return False, None
+            return True, self._resize(frame)
+
+        ret, frame = self.capture.read()
+        if not ret and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        if ret:
+            self.frame_index += 1
+            frame = self._resize(frame)
+        return ret, frame
+
+    def read(self):
+        """(ret, frame) - same contract as cv2.VideoCapture.read()"""
+        if self.fps:
+            now = time.perf_counter()
+            if self.next_time is None:
+                self.next_time = now
+            if now < self.next_time:
+                time.sleep(self.next_time - now)
+            self.next_time += 1.0 / self.fps
+
+        if self.frames is not None:
+            if self.frame_index >= len(self.frames):
+                if not self.loop:
+                    return False, None
+                self.frame_index = 0
+            frame = self.frames[self.frame_index]
+            self.frame_index += 1
+            return True, frame.copy()
+        return self._decode()
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        return 0.0
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+def default_backend():
+    """Capture backend that honours FOURCC/buffer settings on this OS"""
+    system = platform.system()
+    if system == 'Windows':
+        return cv2.CAP_DSHOW        # MSMF tends to ignore MJPG requests
+    if system == 'Linux':
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+class FakeCameraDevice:
+    """File-backed stand-in for a USB camera
+
+    Produces JPEG frames from a video/image folder at a fixed rate and keeps
+    the last `buffer_size` frames like a driver queue, so buffering and
+    decode latency can be measured without hardware.
+    """
+
+    def __init__(self, path, fps=30, buffer_size=4):
+        frames = ReplaySource(path, preload=True, loop=False).frames
+        self.jpegs = [cv2.imencode('.jpg', frame)[1] for frame in frames]
+        height, width = frames[0].shape[:2]
+        self.props = {
+            cv2.CAP_PROP_FPS: float(fps),
+            cv2.CAP_PROP_BUFFERSIZE: float(buffer_size),
+            cv2.CAP_PROP_CONVERT_RGB: 1.0,
+            cv2.CAP_PROP_FOURCC: float(cv2.VideoWriter_fourcc(*'MJPG')),
+            cv2.CAP_PROP_FRAME_WIDTH: float(width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(height),
+        }
+        self.start_time = time.perf_counter()
+        self.next_index = 0
+        self.current = 0
+        self.opened = True
+
+    def _produced(self):
+        return int((time.perf_counter() - self.start_time) * self.props[cv2.CAP_PROP_FPS])
+
+    def grab(self):
+        """Dequeue the oldest buffered frame, waiting for the sensor if empty"""
+        buffer_size = max(1, int(self.props[cv2.CAP_PROP_BUFFERSIZE]))
+        produced = self._produced()
+        index = max(self.next_index, produced - buffer_size)
+        if index >= produced:
+            time.sleep(max(0.0, self.frame_timestamp(index + 1) - time.perf_counter()))
+        self.current = index
+        self.next_index = index + 1
+        return self.opened
+
+    def frame_timestamp(self, index=None):
+        """perf_counter() time at which frame `index` left the sensor"""
+        index = self.current if index is None else index
+        return self.start_time + index / self.props[cv2.CAP_PROP_FPS]
+
+    def retrieve(self):
+        jpeg = self.jpegs[self.current % len(self.jpegs)]
+        if self.props[cv2.CAP_PROP_CONVERT_RGB]:
+            return True, cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+        return True, jpeg.reshape(1, -1)
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return False            # Fixed by the recorded footage
+        self.props[prop] = float(value)
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+
+class CameraCapture:
+    """Camera with explicit MJPEG/FPS/buffer negotiation and threaded decode
+
+    A grab thread pulls frames from the driver as soon as they arrive. When
+    the backend can hand over raw MJPEG bytes, JPEG decode runs on a small
+    thread pool (cv2.imdecode releases the GIL). read() always returns the
+    newest decoded frame; older ones are dropped instead of queueing.
+    """
+
+    def __init__(self, source=0, width=1280, height=720, fps=30, fourcc='MJPG',
+                 buffer_size=1, decode_threads=2, backend=None, device=None):
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.decode_threads = decode_threads
+        self.backend = default_backend() if backend is None else backend
+        self.cap = device
+        self.raw = False
+        self.negotiated = {}
+
+        self.cond = threading.Condition()
+        self.latest = None
+        self.latest_seq = -1
+        self.read_seq = -1
+        self.running = False
+        self.pending = 0
+        self.requested = {}                     # prop → value, applied by the grab thread
+        self.pool = None
+        self.grab_thread = None
+        self.latencies = deque(maxlen=10000)     # capture → available (ms)
+        self.frames = 0
+        self.dropped = 0
+        self.start_time = None
+
+    def open(self):
+        """Negotiate format with the driver and start the grab thread"""
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(int(self.source), self.backend)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open camera {self.source}")
+
+        # FOURCC must be set before size on V4L2/DirectShow to take effect
+        if self.fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        # Ask for undecoded MJPEG; fall back to in-driver decode if unsupported
+        if self.decode_threads > 0 and self.fourcc == 'MJPG' and self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+            ok, probe = self.cap.read()
+            self.raw = ok and probe is not None and probe.ndim <= 2 and probe.shape[0] == 1
+            if not self.raw:
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        self.negotiated = {
+            'fourcc': ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)) if fourcc else '?',
+            'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': self.cap.get(cv2.CAP_PROP_FPS),
+            'buffer_size': int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+            'decode': f"thread pool ({self.decode_threads})" if self.raw else 'driver',
+        }
+
+        if self.raw:
+            self.pool = ThreadPoolExecutor(max_workers=self.decode_threads, thread_name_prefix='jpeg-decode')
+        self.running = True
+        self.start_time = time.perf_counter()
+        self.grab_thread = threading.Thread(target=self._grab_loop, name='camera-grab', daemon=True)
+        self.grab_thread.start()
+        return self
+
+    def _grab_loop(self):
+        seq = 0
+        while self.running:
+            if self.requested:
+                # The driver isn't safe to reconfigure mid-grab, so changes land between grabs
+                with self.cond:
+                    for prop, value in self.requested.items():
+                        self.cap.set(prop, value)
+                    self.requested.clear()
+            if not self.cap.grab():
+                break
+            grabbed = time.perf_counter()
+            # File-backed fakes know when the frame actually left the sensor
+            captured = self.cap.frame_timestamp() if hasattr(self.cap, 'frame_timestamp') else grabbed
+            ok, data = self.cap.retrieve()
+            if not self.running:
+                break               # Released while we were in the driver: the pool may be shut down
+            if not ok:
+                continue
+            if self.raw:
+                # Don't let decode work pile up - a newer frame will replace it anyway
+                if self.pending >= self.decode_threads * 2:
+                    self.dropped += 1
+                else:
+                    with self.cond:
+                        self.pending += 1
+                    self.pool.submit(self._decode, data, captured, seq)
+            else:
+                self._publish(data, captured, seq)
+            seq += 1
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def _decode(self, data, captured, seq):
+        frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        with self.cond:
+            self.pending -= 1
+        if frame is not None:
+            self._publish(frame, captured, seq)
+
+    def _publish(self, frame, captured, seq):
+        with self.cond:
+            if seq <= self.latest_seq:
+                self.dropped += 1           # Finished after a newer frame
+                return
+            self.latest = frame
+            self.latest_seq = seq
+            self.frames += 1
+            self.latencies.append((time.perf_counter() - captured) * 1000)
+            self.cond.notify_all()
+
+    def read(self, timeout=2.0):
+        """(ret, frame) - waits for a frame newer than the last one returned"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.latest_seq > self.read_seq or not self.running, timeout):
+                return False, None
+            if self.latest_seq <= self.read_seq:
+                return False, None
+            self.read_seq = self.latest_seq
+            return True, self.latest
+
+    def stats(self):
+        """Capture-to-availability latency percentiles (ms), fps and drops"""
+        samples = np.array(self.latencies) if self.latencies else np.zeros(1)
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+        return {
+            'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'frames': self.frames, 'dropped': self.dropped,
+        }
+
+    def isOpened(self):
+        return self.running
+
+    def set(self, prop, value):
+        """Forward to the driver; while capturing, queued for the grab thread (returns True)"""
+        with self.cond:
+            if self.running:
+                self.requested[prop] = value
+                return True
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        """Stop the grab thread first, then the decode pool and the device"""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        # Releasing the device mid-grab/retrieve crashes some V4L2/MSMF drivers
+        if self.grab_thread is not None and self.grab_thread is not threading.current_thread():
+            self.grab_thread.join(timeout=RELEASE_TIMEOUT)
+            if self.grab_thread.is_alive():
+                print(f"⚠️  Camera {self.source}: grab thread still blocked after {RELEASE_TIMEOUT:g}s, releasing anyway")
+        if self.pool:
+            self.pool.shutdown(wait=False)
+        if self.cap is not None:
+            self.cap.release()
+
+
+def open_source(source, width=1280, height=720, replay_fps=None):
+    """Camera index (int or digit string) → CameraCapture, path → ReplaySource"""
+    if isinstance(source, int) or str(source).isdigit():
+        return CameraCapture(int(source), width, height).open()
+    return ReplaySource(source, fps=replay_fps, size=(width, height))
@@ -0,0 +1,95 @@
+"""
+Inference Buffers and Warm-up
+Preallocated letterbox canvas + input tensor reused every frame, and an
+explicit warm-up so the first real frame runs at steady-state speed
+"""
+import time
+import cv2
+import numpy as np
+import torch
+
+PAD_VALUE = 114                 # Same grey padding ultralytics uses
+
+
+class LetterboxBuffers:
+    """Letterboxes frames into a fixed canvas and a reusable BCHW tensor
+
+    The canvas size is the frame scaled to `imgsz` on its long side and
+    padded to a stride multiple (the same rectangle ultralytics would pick),
+    so a 1280x720 frame becomes 640x384 rather than 640x640.
+    """
+
+    def __init__(self, frame_shape=(720, 1280, 3), imgsz=640, stride=32, device='cpu', half=False):
+        self.imgsz = imgsz
+        self.stride = stride
+        self.device = torch.device(device)
+        self.dtype = torch.float16 if half else torch.float32
+        self._allocate(frame_shape)
+
+    def _allocate(self, frame_shape):
+        height, width = frame_shape[:2]
+        self.frame_shape = (height, width)
+        self.ratio = min(self.imgsz / height, self.imgsz / width)
+        self.new_w, self.new_h = round(width * self.ratio), round(height * self.ratio)
+        canvas_w = self.new_w + (-self.new_w % self.stride)
+        canvas_h = self.new_h + (-self.new_h % self.stride)
+        self.left = (canvas_w - self.new_w) // 2
+        self.top = (canvas_h - self.new_h) // 2
+
+        self.canvas = np.full((canvas_h, canvas_w, 3), PAD_VALUE, dtype=np.uint8)
+        self.resized = self.canvas[self.top:self.top + self.new_h, self.left:self.left + self.new_w]
+        self.staging = torch.from_numpy(self.canvas)                     # Shares memory with canvas
+        self.tensor = torch.empty((1, 3, canvas_h, canvas_w), dtype=self.dtype, device=self.device)
+        self.offset = np.array([self.left, self.top, self.left, self.top], dtype=np.float32)
+
+    def bind(self, model):
+        """Match device/precision of a model whose predictor has been set up"""
+        predictor = getattr(model, 'predictor', None)
+        if predictor is None:
+            return self
+        device = predictor.device
+        dtype = torch.float16 if getattr(predictor.model, 'fp16', False) else torch.float32
+        if device != self.device or dtype != self.dtype:
+            self.device, self.dtype = device, dtype
+            self._allocate(self.frame_shape + (3,))
+        return self
+
+    def prepare(self, frame):
+        """BGR uint8 frame → normalized RGB tensor, without new allocations"""
+        if frame.shape[:2] != self.frame_shape:
+            self._allocate(frame.shape)
+        cv2.resize(frame, (self.new_w, self.new_h), dst=self.resized, interpolation=cv2.INTER_LINEAR)
+        for c in range(3):
+            # BGR → RGB while converting to float on the target device
+            self.tensor[0, c].copy_(self.staging[:, :, 2 - c])
+        self.tensor.mul_(1.0 / 255.0)
+        return self.tensor
+
+    def scale_boxes(self, xyxy):
+        """Canvas coordinates → original frame coordinates"""
+        boxes = (np.asarray(xyxy, dtype=np.float32) - self.offset) / self.ratio
+        boxes[..., 0::2] = boxes[..., 0::2].clip(0, self.frame_shape[1])
+        boxes[..., 1::2] = boxes[..., 1::2].clip(0, self.frame_shape[0])
+        return boxes
+
+
+def warm_up(model, buffers, runs=10):
+    """Run dummy frames of the deployed size through the full predict path
+
+    A very low confidence threshold makes NMS and box post-processing do
+    real work, so their lazy initialisation also happens here. Returns the
+    warm-up wall time in seconds.
+    """
+    start = time.time()
+    height, width = buffers.frame_shape
+    rng = np.random.default_rng(0)
+    dummy = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+    # First call builds the predictor (device selection, fusing, AutoBackend)
+    model(dummy, conf=0.001, verbose=False)
+    buffers.bind(model)
+    for _ in range(runs):
+        model(buffers.prepare(dummy), conf=0.001, verbose=False)
+    if buffers.device.type == 'cuda':
+        torch.cuda.synchronize()
+    return time.time() - start
@@ -0,0 +1,293 @@
+"""
+Persistent Inference Server
+Loads best.pt once, keeps it warm and serves detections to any number of
+local clients over a Unix socket (TCP on Windows). Frames travel through a
+per-client shared-memory block, so a request is just a small header.
+Concurrent requests are batched opportunistically into one model call.
+
+    python inference_server.py                 (start the server)
+
+Clients (webcam_fresh.py, smart_dustbin_smooth.py, ...) only need
+InferenceClient - importing this module does not import torch/ultralytics.
+"""
+from detection_stream import HEADER, parse_address, pack_record, unpack_record, record_size
+from multiprocessing import shared_memory
+import json
+import os
+import socket
+import struct
+import time
+import numpy as np
+
+SERVER_ADDRESS = 'tcp:127.0.0.1:8766' if os.name == 'nt' else 'unix:/tmp/dustbin_inference.sock'
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+MODEL_WATCH_DIR = 'models/incoming'
+INFERENCE_IMGSZ = 640
+MAX_BATCH = 8                   # Frames per model call
+BATCH_WINDOW_MS = 2.0           # How long the first request waits for company
+WARMUP_RUNS = 5
+
+# Client → server: op | request id | height | width | conf | path/name length
+# followed by `length` bytes (ATTACH: shared-memory name, RELOAD: weights path)
+REQUEST = struct.Struct('<BQHHfH')
+OP_DETECT, OP_ATTACH, OP_RELOAD = 1, 2, 3
+# Server → client after connect: JSON info (names, weights, imgsz)
+INFO_LENGTH = struct.Struct('<I')
+
+
+def recv_exact(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if not n:
+            raise ConnectionError("peer closed")
+        received += n
+    return data
+
+
+class InferenceClient:
+    """Thin client: one synchronous request at a time per instance"""
+
+    def __init__(self, address=SERVER_ADDRESS, timeout=10.0):
+        family, sockaddr = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(sockaddr)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        length = INFO_LENGTH.unpack(recv_exact(self.sock, INFO_LENGTH.size))[0]
+        info = json.loads(bytes(recv_exact(self.sock, length)))
+        self.names = {int(k): v for k, v in info['names'].items()}
+        self.weights = info['weights']
+        self.shm = None
+        self.request_id = 0
+
+    def _attach(self, frame):
+        """(Re)create the shared frame block when the frame size grows"""
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+        self.shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        name = self.shm.name.encode()
+        self.sock.sendall(REQUEST.pack(OP_ATTACH, 0, 0, 0, 0.0, len(name)) + name)
+
+    def _response(self):
+        data = recv_exact(self.sock, HEADER.size)
+        size = record_size(data)
+        if size > HEADER.size:
+            data += recv_exact(self.sock, size - HEADER.size)
+        return unpack_record(bytes(data))
+
+    def predict(self, frame, conf=0.25):
+        """BGR uint8 frame → (classes, confidences, xyxy boxes in frame pixels)"""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if self.shm is None or self.shm.size < frame.nbytes:
+            self._attach(frame)
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf)
+        np.copyto(view, frame)
+        del view
+        self.request_id += 1
+        height, width = frame.shape[:2]
+        self.sock.sendall(REQUEST.pack(OP_DETECT, self.request_id, height, width, conf, 0))
+        seq, timestamp, classes, confidences, boxes = self._response()
+        return classes.astype(np.int64), confidences, boxes
+
+    def reload(self, path=None):
+        """Ask the server to load new weights (in the background, with rollback)"""
+        data = str(path or '').encode()
+        self.request_id += 1
+        self.sock.sendall(REQUEST.pack(OP_RELOAD, self.request_id, 0, 0, 0.0, len(data)) + data)
+        self._response()
+
+    def close(self):
+        self.sock.close()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def serve(address=SERVER_ADDRESS, weights=MODEL_PATH, imgsz=INFERENCE_IMGSZ,
+          max_batch=MAX_BATCH, window_ms=BATCH_WINDOW_MS, layout=''):
+    """Run the server until Ctrl+C"""
+    from thread_affinity import AffinityManager
+    affinity = AffinityManager(layout).apply()     # Before the model: torch workers inherit the cores
+    from ultralytics import YOLO
+    from model_reloader import ModelReloader
+    from frame_bus import attach_shared_memory
+    import queue
+    import threading
+
+    model = YOLO(weights)
+    dummy = np.zeros((720, 1280, 3), dtype=np.uint8)
+    start = time.time()
+    for _ in range(WARMUP_RUNS):
+        model([dummy] * max_batch, imgsz=imgsz, verbose=False)
+    print(f"✓ Model loaded and warmed up ({time.time() - start:.1f}s) - classes: {model.names}")
+    reloader = ModelReloader(model, weights, watch_dir=MODEL_WATCH_DIR,
+                             expected_classes=model.names.values()).start()
+
+    family, sockaddr = parse_address(address)
+    if family != socket.AF_INET and os.path.exists(sockaddr):
+        os.unlink(sockaddr)
+    server = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(sockaddr)
+    server.listen(32)
+    server.settimeout(0.5)
+
+    jobs = queue.Queue()
+    stop = threading.Event()
+    batch_sizes, latencies = [], []
+
+    def client_loop(conn):
+        """Reads requests from one client and queues them for the batcher"""
+        shm = frame = None
+        try:
+            info = json.dumps({'names': reloader.model.names, 'weights': reloader.weights_path,
+                               'imgsz': imgsz}).encode()
+            conn.sendall(INFO_LENGTH.pack(len(info)) + info)
+            while not stop.is_set():
+                op, request_id, height, width, conf, length = REQUEST.unpack(recv_exact(conn, REQUEST.size))
+                extra = bytes(recv_exact(conn, length)).decode() if length else ''
+                if op == OP_ATTACH:
+                    frame = None
+                    if shm is not None:
+                        try:
+                            shm.close()
+                        except BufferError:
+                            pass    # Last batch still referenced; unmapped when collected
+                    shm = attach_shared_memory(extra)
+                elif op == OP_RELOAD:
+                    print(f"\n🔄 Reload requested by client: {extra or reloader.weights_path}")
+                    reloader.request_reload(extra or None)
+                    conn.sendall(pack_record(request_id, time.time(), [], [], []))
+                elif op == OP_DETECT:
+                    if shm is None or height * width * 3 > shm.size:
+                        # No block attached yet, or the frame doesn't fit it: answer with no detections
+                        print(f"⚠️  Bad DETECT {height}x{width} (shared block: {shm.size if shm else 'none'})")
+                        conn.sendall(pack_record(request_id, time.time(), [], [], []))
+                        continue
+                    frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf)
+                    # The client blocks until the reply, so the block isn't rewritten meanwhile
+                    jobs.put((conn, request_id, frame, conf, time.perf_counter()))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+            frame = None
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:
+                    pass        # A queued job still holds a view; freed with it
+
+    def accept_loop():
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            threading.Thread(target=client_loop, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    print(f"🚀 Serving on {address} (batch ≤ {max_batch}, window {window_ms:g} ms) - Ctrl+C to stop")
+
+    try:
+        while True:
+            affinity.maybe_refresh()    # Client reader threads count as I/O
+            message = reloader.swap_if_ready()
+            if message:
+                print(message)
+            try:
+                batch = [jobs.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            # Opportunistic batching: take whatever arrives within the window
+            deadline = time.perf_counter() + window_ms / 1000
+            while len(batch) < max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(jobs.get(timeout=remaining) if remaining > 0 else jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            frames = [job[2] for job in batch]
+            min_conf = min(job[3] for job in batch)
+            reloader.remember_frame(frames[0])
+            results = None
+            try:
+                results = reloader.model(frames, conf=min_conf, imgsz=imgsz, verbose=False)
+                reloader.confirm()
+            except Exception as e:
+                error = e
+                message = reloader.rollback(e)
+                if message is not None:
+                    print(message)
+                    try:
+                        results = reloader.model(frames, conf=min_conf, imgsz=imgsz, verbose=False)
+                    except Exception as retry_error:
+                        error = retry_error
+                if results is None:
+                    # One bad batch must not take the server down for every client
+                    print(f"❌ Inference failed for {len(batch)} request(s): {type(error).__name__}: {error}")
+
+            done = time.time()
+            for index, (conn, request_id, frame, conf, received) in enumerate(batch):
+                try:
+                    if results is None:
+                        conn.sendall(pack_record(request_id, done, [], [], []))
+                    else:
+                        boxes = results[index].boxes
+                        confidences = boxes.conf.cpu().numpy()
+                        keep = confidences > conf    # Same as the model's own conf filter
+                        conn.sendall(pack_record(request_id, done, boxes.cls.cpu().numpy()[keep].astype(np.int16),
+                                                 confidences[keep], boxes.xyxy.cpu().numpy()[keep]))
+                except OSError:
+                    pass        # Client went away mid-request
+                latencies.append((time.perf_counter() - received) * 1000)
+            batch_sizes.append(len(batch))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        reloader.stop()
+        server.close()
+        if family != socket.AF_INET and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+
+    if batch_sizes:
+        sizes = np.array(batch_sizes)
+        latency = np.array(latencies)
+        print(f"\n{'='*80}")
+        print("📊 INFERENCE SERVER SUMMARY")
+        print("="*80)
+        print(f"{'Requests':<30} {len(latency)}")
+        print(f"{'Model calls':<30} {len(sizes)}")
+        print(f"{'Average batch size':<30} {sizes.mean():.2f} (max {sizes.max()})")
+        print(f"{'Request latency p50/p99':<30} {np.percentile(latency, 50):.1f} / {np.percentile(latency, 99):.1f} ms")
+        print(f"{'Final Model':<30} {reloader.weights_path}")
+        print("="*80)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Persistent YOLO inference server')
+    parser.add_argument('--address', default=SERVER_ADDRESS)
+    parser.add_argument('--weights', default=MODEL_PATH)
+    parser.add_argument('--imgsz', type=int, default=INFERENCE_IMGSZ)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--window-ms', type=float, default=BATCH_WINDOW_MS)
+    parser.add_argument('--layout', default='', help="Thread/core layout, e.g. 'torch=3;inference=1-3;io=0'")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("SMART DUSTBIN - INFERENCE SERVER")
+    print("="*80)
+    serve(args.address, args.weights, args.imgsz, args.max_batch, args.window_ms, args.layout)
@@ -0,0 +1,178 @@
+"""
+Hot Model Reloader
+Loads and warms new YOLO weights on a background thread, then swaps them in
+between frames - the detection loop never stops
+"""
+from ultralytics import YOLO
+from pathlib import Path
+import os
+import threading
+import time
+import numpy as np
+
+
+class ModelReloader:
+    """Background weight loading with sanity check, atomic swap and rollback"""
+
+    def __init__(self, model, weights_path, watch_dir=None, expected_classes=None,
+                 frame_shape=(720, 1280, 3), conf=0.25, poll_interval=2.0, warmup_runs=3):
+        self.model = model
+        self.weights_path = str(weights_path)
+        self.watch_dir = Path(watch_dir) if watch_dir else None
+        self.expected_classes = set(expected_classes) if expected_classes else None
+        self.frame_shape = frame_shape
+        self.conf = conf
+        self.poll_interval = poll_interval
+        self.warmup_runs = warmup_runs
+
+        self.lock = threading.Lock()
+        self.staged = None              # (model, path) ready to swap in
+        self.previous = None            # (model, path) kept for rollback
+        self.pending_check = False      # First live inference after a swap not yet seen
+        self.loading = False
+        self.last_frame = None
+        self.want_frame = False         # Loader is waiting for a real frame to check against
+        self.stop_event = threading.Event()
+        self.reload_event = threading.Event()
+        self.requested_path = None
+        self.seen_mtimes = {}
+        self.swap_count = 0
+        self.rollback_count = 0
+
+    def start(self):
+        """Start the loader (and directory watcher) thread"""
+        thread = threading.Thread(target=self._run, name='model-reload', daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.reload_event.set()
+
+    def request_reload(self, path=None):
+        """Reload command - `path` defaults to the configured weights file"""
+        self.requested_path = str(path) if path else self.weights_path
+        self.reload_event.set()
+
+    def remember_frame(self, frame):
+        """Offer the current inference input (frame or ROI crop) for the next sanity inference
+
+        Only copied while a candidate is loading - the caller draws on its
+        frame afterwards, and the loader must not see the overlay.
+        """
+        if self.want_frame:
+            self.last_frame = frame.copy()
+            self.want_frame = False
+
+    def swap_if_ready(self):
+        """Call between frames: swap in a staged model. Returns a status message or None"""
+        with self.lock:
+            if self.staged is None:
+                return None
+            new_model, new_path = self.staged
+            self.staged = None
+            self.previous = (self.model, self.weights_path)
+            self.model = new_model
+            self.weights_path = new_path
+            self.pending_check = True
+            self.swap_count += 1
+        return f"🔄 Model swapped → {new_path}"
+
+    def confirm(self):
+        """First live inference with the new model succeeded - drop the old one"""
+        if self.pending_check:
+            with self.lock:
+                self.pending_check = False
+                self.previous = None
+
+    def rollback(self, reason):
+        """Restore the previous model after a failed live inference"""
+        with self.lock:
+            if self.previous is None:
+                return None
+            failed_path = self.weights_path
+            self.model, self.weights_path = self.previous
+            self.previous = None
+            self.pending_check = False
+            self.rollback_count += 1
+        return f"↩️  Rolled back from {failed_path}: {reason}"
+
+    def _newest_candidate(self):
+        """Newest fully-written .pt in the watch dir that hasn't been tried yet"""
+        candidates = []
+        for path in self.watch_dir.glob('*.pt'):
+            try:
+                mtime = path.stat().st_mtime
+                size = path.stat().st_size
+            except OSError:
+                continue
+            previous = self.seen_mtimes.get(str(path))
+            if previous == (mtime, size, True):
+                continue
+            # Wait for one stable poll so we don't load a half-written file
+            if previous == (mtime, size, False):
+                candidates.append((mtime, path))
+            else:
+                self.seen_mtimes[str(path)] = (mtime, size, False)
+        if not candidates:
+            return None
+        mtime, path = max(candidates)
+        stat = path.stat()
+        self.seen_mtimes[str(path)] = (stat.st_mtime, stat.st_size, True)
+        return str(path)
+
+    def _prime_watch_dir(self):
+        """Mark files already present at startup as seen"""
+        for path in self.watch_dir.glob('*.pt'):
+            stat = path.stat()
+            self.seen_mtimes[str(path)] = (stat.st_mtime, stat.st_size, True)
+
+    def _run(self):
+        if self.watch_dir:
+            self.watch_dir.mkdir(parents=True, exist_ok=True)
+            self._prime_watch_dir()
+        while not self.stop_event.is_set():
+            triggered = self.reload_event.wait(self.poll_interval)
+            if self.stop_event.is_set():
+                break
+            path = None
+            if triggered:
+                self.reload_event.clear()
+                path = self.requested_path
+            elif self.watch_dir:
+                path = self._newest_candidate()
+            if path:
+                self._load_and_stage(path)
+
+    def _load_and_stage(self, path):
+        """Load, warm and sanity-check weights off the main thread"""
+        self.loading = True
+        self.last_frame = None
+        self.want_frame = True
+        start = time.time()
+        try:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            candidate = YOLO(path)
+            names = set(candidate.names.values())
+            if self.expected_classes and not names <= self.expected_classes:
+                raise ValueError(f"unexpected classes {sorted(names - self.expected_classes)}")
+
+            dummy = np.zeros(self.frame_shape, dtype=np.uint8)
+            for _ in range(self.warmup_runs):
+                candidate(dummy, conf=self.conf, verbose=False)
+
+            frame = self.last_frame if self.last_frame is not None else dummy
+            results = candidate(frame, conf=self.conf, verbose=False)
+            boxes = results[0].boxes
+            if len(boxes) and not np.isfinite(boxes.xyxy.cpu().numpy()).all():
+                raise ValueError("non-finite box coordinates")
+
+            with self.lock:
+                self.staged = (candidate, path)
+            print(f"\n✅ New model ready: {path} (loaded + warmed in {time.time() - start:.1f}s)")
+        except Exception as e:
+            print(f"\n❌ Model reload rejected ({path}): {e} - keeping current model")
+        finally:
+            self.want_frame = False
+            self.loading = False
@@ -0,0 +1,316 @@
+"""
+Packed Dataset - Memory-Mapped Splits for Training and Validation
+Packs each split of a YOLO dataset into one fixed-resolution uint8 array
+file plus a packed label index, so training and `model.val()` stop
+re-reading and re-decoding thousands of JPEG and label files every epoch.
+
+    packed/<name>_<imgsz>/<split>/
+        images.npy      (N, imgsz, imgsz, 3) BGR, resized like Ultralytics (long side = imgsz), top-left aligned
+        shapes.npy      (N, 4) original h, w and resized h, w
+        labels.npy      (M, 5) cls cx cy w h, normalized to the image (unchanged from the .txt files)
+        offsets.npy     (N + 1) image i owns labels[offsets[i]:offsets[i + 1]]
+        meta.json       source file names, unreadable images, imgsz
+    packed/<name>_<imgsz>/data_packed.yaml
+
+    python packed_dataset.py                                     (pack data_roboflow.yaml at 640)
+    python packed_dataset.py --data runs/dedup/data_roboflow_dedup.yaml --splits train val
+
+Images are read back as views into the mapped file (no decode, no copy);
+train with PackedTrainer and validate with PackedValidator. Pack at the
+imgsz you train at - ~1.2 MB per image at 640 (~16 GB for the Roboflow
+export), so put it on a local SSD.
+"""
+from multiprocessing import Pool
+from pathlib import Path
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import time
+import cv2
+import numpy as np
+import yaml
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer, DetectionValidator
+from ultralytics.utils import colorstr
+from dataset_utils import split_images
+
+DATA_YAML = 'data_roboflow.yaml'
+OUTPUT_DIR = 'packed'
+IMGSZ = 640
+SPLITS = ('train', 'val', 'test')
+
+IMAGES_FILE = 'images.npy'
+SHAPES_FILE = 'shapes.npy'
+LABELS_FILE = 'labels.npy'
+OFFSETS_FILE = 'offsets.npy'
+META_FILE = 'meta.json'
+PACKED_YAML = 'data_packed.yaml'
+
+
+def label_path(image_path):
+    """Ultralytics convention: last /images/ → /labels/, suffix → .txt"""
+    image_path = Path(image_path)
+    parts = list(image_path.parts)
+    if 'images' in parts:
+        parts[len(parts) - 1 - parts[::-1].index('images')] = 'labels'
+    return Path(*parts).with_suffix('.txt')
+
+
+def read_label_rows(path):
+    """(n, 5) cls cx cy w h from a YOLO label file; polygon lines become their bounding box"""
+    rows = []
+    if path.exists():
+        for line in path.read_text().splitlines():
+            values = [float(v) for v in line.split()]
+            if len(values) == 5:
+                rows.append(values)
+            elif len(values) > 5:
+                xs, ys = values[1::2], values[2::2]
+                x1, x2, y1, y2 = min(xs), max(xs), min(ys), max(ys)
+                rows.append([values[0], (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def resize_long_side(image, imgsz):
+    """Same resize as BaseDataset.load_image: long side to imgsz, INTER_LINEAR"""
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz)
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR)
+    return image
+
+
+_target = None
+
+
+def open_target(images_path):
+    """Pool initializer: every worker writes straight into the mapped output file"""
+    global _target
+    _target = np.load(images_path, mmap_mode='r+')
+
+
+def pack_image(task):
+    """Decode, resize and store one image; (index, label rows, shape row or None if unreadable)"""
+    index, image_path = task
+    image = cv2.imread(str(image_path))
+    if image is None:
+        return index, np.zeros((0, 5), dtype=np.float32), None
+    h0, w0 = image.shape[:2]
+    resized = resize_long_side(image, _target.shape[1])
+    h, w = resized.shape[:2]
+    _target[index, :h, :w] = resized
+    return index, read_label_rows(label_path(image_path)), (h0, w0, h, w)
+
+
+def pack_split(images, output_dir, imgsz, workers):
+    """Write one split; returns (images packed, labels, unreadable)"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / META_FILE).unlink(missing_ok=True)          # Incomplete until meta.json is written
+    target = np.lib.format.open_memmap(output_dir / IMAGES_FILE, mode='w+', dtype=np.uint8,
+                                       shape=(len(images), imgsz, imgsz, 3))
+    del target
+
+    shapes = np.zeros((len(images), 4), dtype=np.int32)
+    rows = [None] * len(images)
+    missing = []
+    with Pool(workers, initializer=open_target, initargs=(str(output_dir / IMAGES_FILE),)) as pool:
+        for index, labels, shape in pool.imap_unordered(pack_image, enumerate(images), chunksize=16):
+            rows[index] = labels
+            if shape is None:
+                missing.append(index)
+            else:
+                shapes[index] = shape
+
+    offsets = np.zeros(len(images) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rows])
+    labels = np.concatenate(rows) if rows else np.zeros((0, 5), dtype=np.float32)
+    np.save(output_dir / SHAPES_FILE, shapes)
+    np.save(output_dir / LABELS_FILE, labels)
+    np.save(output_dir / OFFSETS_FILE, offsets)
+    (output_dir / META_FILE).write_text(json.dumps({
+        'imgsz': imgsz,
+        'files': [str(Path(p).resolve()) for p in images],
+        'missing': sorted(missing),
+    }))
+    return len(images) - len(missing), len(labels), len(missing)
+
+
+class PackedSplit:
+    """One packed split opened for reading: images mapped from disk, labels in RAM"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / META_FILE).read_text())
+        self.imgsz = meta['imgsz']
+        self.files = meta['files']
+        missing = set(meta['missing'])
+        self.keep = [i for i in range(len(self.files)) if i not in missing]
+        self.shapes = np.load(self.directory / SHAPES_FILE)
+        self.labels = np.load(self.directory / LABELS_FILE)
+        self.offsets = np.load(self.directory / OFFSETS_FILE)
+        self.images = np.load(self.directory / IMAGES_FILE, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.files)
+
+    def image(self, i):
+        """Resized image as a read-only view into the mapped file - nothing decoded or copied"""
+        h, w = self.shapes[i, 2:]
+        return self.images[i, :h, :w]
+
+    def boxes(self, i):
+        """(n, 5) cls cx cy w h"""
+        return self.labels[self.offsets[i]:self.offsets[i + 1]]
+
+    def shape(self, i):
+        """Original (h, w)"""
+        return int(self.shapes[i, 0]), int(self.shapes[i, 1])
+
+    def nbytes(self):
+        return sum(f.stat().st_size for f in self.directory.iterdir())
+
+    # DataLoader workers on Windows get the dataset pickled - reopen the map
+    # instead of pickling its contents
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['images'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.images = np.load(self.directory / IMAGES_FILE, mmap_mode='r')
+
+
+class PackedDataset(YOLODataset):
+    """YOLODataset whose img_path is a packed split directory"""
+
+    def get_img_files(self, img_path):
+        self.pack = PackedSplit(img_path)
+        if self.pack.imgsz != self.imgsz:
+            raise ValueError(f"{img_path} is packed at imgsz={self.pack.imgsz}, not {self.imgsz} "
+                             f"- re-run packed_dataset.py --imgsz {self.imgsz}")
+        indices = self.pack.keep
+        count = self.fraction if isinstance(self.fraction, int) else max(1, round(len(indices) * self.fraction))
+        self.pack_indices = indices[:count]
+        # set_rectangle() reorders im_files/labels, so images are looked up by file
+        self.pack_index = {self.pack.files[i]: i for i in self.pack_indices}
+        return [self.pack.files[i] for i in self.pack_indices]
+
+    def get_labels(self):
+        labels = []
+        for i in self.pack_indices:
+            rows = self.pack.boxes(i)
+            labels.append({
+                'im_file': self.pack.files[i],
+                'shape': self.pack.shape(i),
+                'cls': rows[:, 0:1],
+                'bboxes': rows[:, 1:5],
+                'segments': [],
+                'keypoints': None,
+                'normalized': True,
+                'bbox_format': 'xywh',
+            })
+        return labels
+
+    def load_image(self, i, rect_mode=True, resize_short=False):
+        """(image, original hw, resized hw) straight from the map - already resized at pack time"""
+        index = self.pack_index[self.im_files[i]]
+        # Read-only view: an augmentation that wrote into its input would fail
+        # loudly instead of changing the packed file (the stock ones copy first)
+        image = self.pack.image(index)
+        if self.augment:
+            self.buffer.append(i)       # Mosaic picks its other tiles from recently loaded images
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                self.buffer.pop(0)
+        return image, self.pack.shape(index), image.shape[:2]
+
+
+def build_packed_dataset(cfg, img_path, batch, data, mode='train', rect=False, stride=32):
+    """build_yolo_dataset() for a packed split"""
+    return PackedDataset(
+        img_path=img_path,
+        imgsz=cfg.imgsz,
+        batch_size=batch,
+        augment=mode == 'train',
+        hyp=cfg,
+        rect=cfg.rect or rect,
+        cache=None,                     # Already a mapped array - nothing to cache
+        single_cls=cfg.single_cls or False,
+        stride=int(stride),
+        pad=0.0 if mode == 'train' else 0.5,
+        prefix=colorstr(f"{mode}: "),
+        task=cfg.task,
+        classes=cfg.classes,
+        data=data,
+        fraction=cfg.fraction if mode == 'train' else 1.0,
+    )
+
+
+class PackedTrainer(DetectionTrainer):
+    """model.train(trainer=PackedTrainer, data='packed/.../data_packed.yaml', ...)"""
+
+    def build_dataset(self, img_path, mode='train', batch=None):
+        model = getattr(self.model, 'module', self.model)
+        stride = max(int(model.stride.max()), 32)
+        return build_packed_dataset(self.args, img_path, batch, self.data, mode=mode, rect=mode == 'val', stride=stride)
+
+
+class PackedValidator(DetectionValidator):
+    """model.val(validator=PackedValidator, data='packed/.../data_packed.yaml', ...)"""
+
+    def build_dataset(self, img_path, mode='val', batch=None):
+        return build_packed_dataset(self.args, img_path, batch, self.data, mode=mode, stride=self.stride)
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Pack YOLO dataset splits into memory-mapped arrays')
+    parser.add_argument('--data', default=DATA_YAML)
+    parser.add_argument('--imgsz', type=int, default=IMGSZ, help='Must match the training/validation imgsz')
+    parser.add_argument('--splits', nargs='+', default=list(SPLITS))
+    parser.add_argument('--output', default=None, help=f"Default: {OUTPUT_DIR}/<dataset>_<imgsz>")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with open(args.data, 'r') as f:
+        data = yaml.safe_load(f)
+    name = Path(args.data).stem.removeprefix('data_')
+    output = Path(args.output or Path(OUTPUT_DIR) / f"{name}_{args.imgsz}")
+    splits = {split: split_images(data, split) for split in args.splits if split in data}
+
+    print("="*80)
+    print("PACKED DATASET - MEMORY-MAPPED SPLITS")
+    print("="*80)
+    total = sum(len(images) for images in splits.values())
+    needed = total * args.imgsz * args.imgsz * 3
+    print(f"  Source: {args.data} ({', '.join(f'{s}: {len(i)}' for s, i in splits.items())})")
+    print(f"  Output: {output} at {args.imgsz}px (~{needed / 1024**3:.1f} GB)")
+    output.mkdir(parents=True, exist_ok=True)
+    free = shutil.disk_usage(output).free
+    if free < needed * 1.05:
+        print(f"\n❌ Not enough disk space: {free / 1024**3:.1f} GB free")
+        exit(1)
+
+    for split, images in splits.items():
+        start = time.time()
+        packed, labels, missing = pack_split(images, output / split, args.imgsz, args.workers)
+        size = PackedSplit(output / split).nbytes()
+        print(f"\n✓ {split}: {packed} images, {labels} labels, {size / 1024**3:.2f} GB "
+              f"in {time.time() - start:.0f}s")
+        if missing:
+            print(f"  ⚠️  {missing} unreadable images skipped")
+
+    packed_yaml = output / PACKED_YAML
+    with open(packed_yaml, 'w') as f:
+        f.write(f"# Packed dataset generated by packed_dataset.py from {args.data}\n")
+        f.write("# Train with trainer=PackedTrainer and validate with validator=PackedValidator\n")
+        yaml.safe_dump({'path': str(output.resolve()), **{split: split for split in splits},
+                        'nc': data['nc'], 'names': data['names']}, f, sort_keys=False)
+    print(f"\n✓ Dataset YAML: {packed_yaml}")
+    print(f"  Set PACKED_DATA in train_roboflow.py to it, or compare with: python benchmark_dataset.py")
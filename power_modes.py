@@ -0,0 +1,190 @@
+"""
+Adaptive Power Modes
+Idle / armed / active scheduler for capture and inference rate, with
+per-mode wall/CPU time export and a wake-up latency bound
+"""
+from pathlib import Path
+import json
+import time
+import cv2
+import numpy as np
+
+IDLE, ARMED, ACTIVE = 'idle', 'armed', 'active'
+
+# Per-mode capture rate and detector cadence (run detector on every Nth processed frame)
+MODE_SETTINGS = {
+    IDLE:   {'fps': 4,  'detect_every': 0},     # Motion check only
+    ARMED:  {'fps': 15, 'detect_every': 1},
+    ACTIVE: {'fps': 30, 'detect_every': 1},
+}
+
+ARMED_TIMEOUT = 15.0            # s without motion/detections before dropping to idle
+ACTIVE_HOLD = 3.0               # s to stay active after a servo cycle finishes
+WAKE_LATENCY_BOUND_MS = 500     # Idle motion → first detection result
+MOTION_SIZE = (64, 36)          # Motion check resolution
+MOTION_PIXEL_DELTA = 25         # Grey-level change that counts as motion
+MOTION_FRACTION = 0.01          # Fraction of changed pixels that wakes the bin
+
+
+class PowerScheduler:
+    """Decides capture rate and whether to run the detector on each frame"""
+
+    def __init__(self, cap=None, settings=MODE_SETTINGS, armed_timeout=ARMED_TIMEOUT,
+                 active_hold=ACTIVE_HOLD, wake_bound_ms=WAKE_LATENCY_BOUND_MS, expected_detect_ms=80):
+        self.cap = cap
+        self.settings = settings
+        self.armed_timeout = armed_timeout
+        self.active_hold = active_hold
+        self.wake_bound_ms = wake_bound_ms
+
+        self.mode = None
+        self.mode_since = time.perf_counter()
+        self.cpu_since = time.process_time()
+        self.wall_time = {m: 0.0 for m in settings}
+        self.cpu_time = {m: 0.0 for m in settings}
+        self.transitions = []
+        self.last_activity = time.perf_counter()
+        self.servo_active = False
+        self.servo_done_at = None
+        self.next_frame_time = 0.0
+        self.frame_index = 0
+        self.previous_gray = None
+        self.wake_started = None
+        self.wake_latencies = []
+        self.detector_frames = {m: 0 for m in settings}
+
+        # Worst case: motion lands just after an idle frame, then one detector run
+        worst_case = 1000 / settings[IDLE]['fps'] + expected_detect_ms
+        if worst_case > wake_bound_ms:
+            print(f"⚠️  Idle rate {settings[IDLE]['fps']} fps can exceed the {wake_bound_ms} ms wake bound "
+                  f"(worst case ~{worst_case:.0f} ms) - raise idle fps")
+        self._set_mode(IDLE, 'start')
+
+    def _set_mode(self, mode, reason):
+        now = time.perf_counter()
+        cpu_now = time.process_time()
+        if self.mode is not None:
+            if mode == self.mode:
+                return
+            self.wall_time[self.mode] += now - self.mode_since
+            self.cpu_time[self.mode] += cpu_now - self.cpu_since
+        self.transitions.append({'time': time.time(), 'from': self.mode, 'to': mode, 'reason': reason})
+        if self.mode is not None:
+            print(f"🔋 Power mode: {self.mode.upper()} → {mode.upper()} ({reason})")
+        self.mode = mode
+        self.mode_since = now
+        self.cpu_since = cpu_now
+        # Lower the camera rate too; CameraCapture applies it on its grab thread between grabs
+        if self.cap is not None:
+            self.cap.set(cv2.CAP_PROP_FPS, self.settings[mode]['fps'])
+
+    def throttle(self):
+        """Sleep until the next frame slot for the current mode (call before reading)"""
+        now = time.perf_counter()
+        if now < self.next_frame_time:
+            time.sleep(self.next_frame_time - now)
+            now = self.next_frame_time
+        self.next_frame_time = now + 1.0 / self.settings[self.mode]['fps']
+
+    def motion(self, frame):
+        """Cheap frame-difference motion check on a tiny grey image"""
+        gray = cv2.cvtColor(cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        previous, self.previous_gray = self.previous_gray, gray
+        if previous is None:
+            return False
+        changed = cv2.absdiff(gray, previous) > MOTION_PIXEL_DELTA
+        return changed.mean() > MOTION_FRACTION
+
+    def notify_voice_activity(self):
+        """Hook for entry points with a microphone: speech arms the bin"""
+        self.last_activity = time.perf_counter()
+        if self.mode == IDLE:
+            self.wake_started = time.perf_counter()
+            self._set_mode(ARMED, 'voice')
+
+    def should_detect(self, frame):
+        """Update the mode from this frame; True if the detector should run"""
+        now = time.perf_counter()
+        moving = self.motion(frame)
+        if moving:
+            self.last_activity = now
+
+        if self.mode == IDLE:
+            if not moving:
+                return False
+            self.wake_started = now
+            self._set_mode(ARMED, 'motion')
+        elif self.mode == ACTIVE:
+            if not self.servo_active and self.servo_done_at and now - self.servo_done_at > self.active_hold:
+                self._set_mode(ARMED, 'servo cycle finished')
+        elif self.mode == ARMED and now - self.last_activity > self.armed_timeout:
+            self._set_mode(IDLE, f"no activity for {self.armed_timeout:.0f}s")
+            return False
+
+        self.frame_index += 1
+        every = self.settings[self.mode]['detect_every']
+        run = every > 0 and (self.wake_started is not None or self.frame_index % every == 0)
+        if run:
+            self.detector_frames[self.mode] += 1
+        return run
+
+    def detection_done(self, found):
+        """Call after each detector run; closes the wake-up latency measurement"""
+        now = time.perf_counter()
+        if found:
+            self.last_activity = now
+        if self.wake_started is not None:
+            latency = (now - self.wake_started) * 1000
+            self.wake_latencies.append(latency)
+            if latency > self.wake_bound_ms:
+                print(f"⚠️  Wake-up latency {latency:.0f} ms exceeded bound {self.wake_bound_ms} ms")
+            self.wake_started = None
+
+    def servo_started(self):
+        self.servo_active = True
+        self.last_activity = time.perf_counter()
+        self._set_mode(ACTIVE, 'servo cycle')
+
+    def servo_finished(self):
+        self.servo_active = False
+        self.servo_done_at = time.perf_counter()
+
+    def summary(self):
+        """Wall/CPU time per mode and wake-up latency statistics"""
+        now = time.perf_counter()
+        wall = dict(self.wall_time)
+        cpu = dict(self.cpu_time)
+        wall[self.mode] += now - self.mode_since
+        cpu[self.mode] += time.process_time() - self.cpu_since
+        total = sum(wall.values()) or 1.0
+        modes = {
+            m: {
+                'wall_s': wall[m],
+                'share': wall[m] / total,
+                'cpu_s': cpu[m],
+                'cpu_load': cpu[m] / wall[m] if wall[m] > 0 else 0.0,   # cores busy on average
+                'detector_frames': self.detector_frames[m],
+            }
+            for m in self.settings
+        }
+        wake = np.array(self.wake_latencies) if self.wake_latencies else None
+        return {
+            'modes': modes,
+            'wake_latency_ms': {
+                'count': len(self.wake_latencies),
+                'p50': float(np.percentile(wake, 50)) if wake is not None else None,
+                'p99': float(np.percentile(wake, 99)) if wake is not None else None,
+                'max': float(wake.max()) if wake is not None else None,
+                'bound': self.wake_bound_ms,
+                'violations': int((wake > self.wake_bound_ms).sum()) if wake is not None else 0,
+            },
+            'transitions': self.transitions,
+        }
+
+    def export(self, path):
+        """Write the summary as JSON (for dashboards / energy estimates)"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        return summary
@@ -0,0 +1,67 @@
+"""
+Presence Cascade - First Stage
+Tiny "waste item present / absent" classifier on a downscaled frame; the
+full detector only runs on frames it lets through
+"""
+from ultralytics import YOLO
+import time
+import cv2
+import numpy as np
+
+PRESENCE_MODEL_PATH = 'runs/presence/presence_cls/weights/best.pt'
+PRESENCE_IMGSZ = 96             # Classifier input size (square)
+PRESENCE_THRESHOLD = 0.35       # Favour recall: a false pass only costs one detector run
+HOLD_FRAMES = 5                 # Keep the detector on for N frames after a positive
+PRESENT_CLASS = 'present'
+
+
+class PresenceGate:
+    """Decides per frame whether the full detector needs to run"""
+
+    def __init__(self, weights=PRESENCE_MODEL_PATH, imgsz=PRESENCE_IMGSZ,
+                 threshold=PRESENCE_THRESHOLD, hold_frames=HOLD_FRAMES):
+        self.model = YOLO(weights, task='classify')
+        self.imgsz = imgsz
+        self.threshold = threshold
+        self.hold_frames = hold_frames
+        self.present_index = {name: i for i, name in self.model.names.items()}[PRESENT_CLASS]
+        self.hold = 0
+        self.frames = 0
+        self.passed = 0
+        self.gate_time = 0.0
+        self.last_score = 0.0
+
+    def warm_up(self, runs=5):
+        dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.model(dummy, imgsz=self.imgsz, verbose=False)
+        return self
+
+    def score(self, frame):
+        """Probability that a waste item is in view"""
+        small = cv2.resize(frame, (self.imgsz, self.imgsz), interpolation=cv2.INTER_AREA)
+        probs = self.model(small, imgsz=self.imgsz, verbose=False)[0].probs
+        return float(probs.data[self.present_index])
+
+    def should_detect(self, frame):
+        """True if the detector should run on this frame"""
+        start = time.perf_counter()
+        self.frames += 1
+        self.last_score = self.score(frame)
+        self.gate_time += time.perf_counter() - start
+        if self.last_score >= self.threshold:
+            self.hold = self.hold_frames
+        elif self.hold > 0:
+            self.hold -= 1
+        else:
+            return False
+        self.passed += 1
+        return True
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'passed': self.passed,
+            'pass_rate': self.passed / self.frames if self.frames else 0.0,
+            'avg_gate_ms': self.gate_time / self.frames * 1000 if self.frames else 0.0,
+        }
@@ -0,0 +1,277 @@
+"""
+Active-Learning Review Queue
+The running bin saves frames the model was unsure about into review/queue/
+(JPEG + YOLO-format pseudo labels + JSON metadata):
+
+    low_confidence  a box between REVIEW_CONF and the trigger threshold
+    disputed        two different classes on the same object
+    class_flip      the top box changed class since the previous frame
+
+Samples are rate limited and written on a background thread. Review them
+here, then fine-tune with finetune.py:
+
+    python review_queue.py              (review with OpenCV)
+    python review_queue.py --summary    (counts only)
+
+Boxes can also be corrected in place with any YOLO-format labeling tool
+(labelImg, CVAT, Roboflow upload) before reviewing.
+"""
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import json
+import shutil
+import threading
+import time
+import cv2
+import numpy as np
+
+QUEUE_DIR = 'review/queue'
+ACCEPTED_DIR = 'review/accepted'    # images/ + labels/ - the layout YOLO datasets use
+REVIEW_CONF = 0.25                  # Model confidence used while sampling
+DISPUTE_IOU = 0.5
+MIN_INTERVAL = 2.0                  # Seconds between saved samples
+MAX_PER_HOUR = 120
+MAX_PENDING = 4                     # Writes in flight before new samples are dropped
+JPEG_QUALITY = 95
+REASON_PRIORITY = ('disputed', 'class_flip', 'low_confidence')
+
+
+def pairwise_iou(a, b):
+    """IoU matrix between xyxy box arrays a (N, 4) and b (M, 4)"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def yolo_lines(classes, boxes, frame_shape):
+    """xyxy pixel boxes → 'cls cx cy w h' lines (normalized)"""
+    height, width = frame_shape[:2]
+    lines = []
+    for cls, (x1, y1, x2, y2) in zip(classes, boxes):
+        lines.append(f"{int(cls)} {(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+                     f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}")
+    return lines
+
+
+def read_labels(path, frame_shape):
+    """YOLO label file → (classes, xyxy pixel boxes)"""
+    height, width = frame_shape[:2]
+    rows = np.loadtxt(path, ndmin=2) if Path(path).stat().st_size else np.zeros((0, 5))
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    return rows[:, 0].astype(int), np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+class ReviewSampler:
+    """Picks uncertain frames from the live detection loop and queues them for review"""
+
+    def __init__(self, names, conf_threshold, low_conf=REVIEW_CONF, output_dir=QUEUE_DIR,
+                 min_interval=MIN_INTERVAL, max_per_hour=MAX_PER_HOUR, clock=time.time):
+        self.names = names
+        self.conf_threshold = conf_threshold
+        self.low_conf = low_conf
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.min_interval = min_interval
+        self.max_per_hour = max_per_hour
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='review-writer')
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        self.saved_times = deque()
+        self.last_saved = 0.0
+        self.previous_top = None        # (class, box) of the previous frame's top box
+        self.candidates = Counter()     # Frames that qualified, per reason
+        self.saved = Counter()
+        self.rate_limited = 0
+        self.dropped = 0
+
+    def classify(self, classes, confidences, boxes):
+        """Reason this frame is worth reviewing, or None"""
+        classes = np.asarray(classes, dtype=int)
+        confidences = np.asarray(confidences, dtype=np.float32)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        reasons = set()
+        if len(confidences) == 0:
+            self.previous_top = None
+            return None
+
+        if ((confidences >= self.low_conf) & (confidences < self.conf_threshold)).any():
+            reasons.add('low_confidence')
+
+        if len(classes) > 1:
+            iou = pairwise_iou(boxes, boxes)
+            different = classes[:, None] != classes[None, :]
+            if (np.triu(iou >= DISPUTE_IOU, 1) & different).any():
+                reasons.add('disputed')
+
+        top = int(confidences.argmax())
+        if (self.previous_top is not None and self.previous_top[0] != classes[top]
+                and pairwise_iou(boxes[top], self.previous_top[1])[0, 0] >= DISPUTE_IOU):
+            reasons.add('class_flip')
+        self.previous_top = (classes[top], boxes[top])
+
+        for reason in REASON_PRIORITY:
+            if reason in reasons:
+                return reason
+        return None
+
+    def observe(self, frame, classes, confidences, boxes, model_name=''):
+        """Call once per detector run with the raw model output (frame coordinates)"""
+        reason = self.classify(classes, confidences, boxes)
+        if reason is None:
+            return None
+        self.candidates[reason] += 1
+
+        now = self.clock()
+        while self.saved_times and now - self.saved_times[0] > 3600:
+            self.saved_times.popleft()
+        if now - self.last_saved < self.min_interval or len(self.saved_times) >= self.max_per_hour:
+            self.rate_limited += 1
+            return None
+        if self.pending >= MAX_PENDING:
+            self.dropped += 1
+            return None
+
+        self.last_saved = now
+        self.saved_times.append(now)
+        self.saved[reason] += 1
+        with self.pending_lock:
+            self.pending += 1
+        # The frame may be a reused ROI buffer - the copy is what the writer owns
+        self.executor.submit(self._write, frame.copy(), np.asarray(classes, dtype=int),
+                             np.asarray(confidences, dtype=np.float32),
+                             np.asarray(boxes, dtype=np.float32).reshape(-1, 4), reason, model_name, now)
+        return reason
+
+    def _write(self, frame, classes, confidences, boxes, reason, model_name, timestamp):
+        try:
+            milliseconds = int(timestamp * 1000) % 1000
+            stem = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))}_{milliseconds:03d}_{reason}"
+            base = self.output_dir / stem
+            cv2.imwrite(str(base.with_suffix('.jpg')), frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            keep = confidences >= self.low_conf
+            base.with_suffix('.txt').write_text('\n'.join(yolo_lines(classes[keep], boxes[keep], frame.shape)))
+            base.with_suffix('.json').write_text(json.dumps({
+                'reason': reason,
+                'timestamp': timestamp,
+                'model': str(model_name),
+                'detections': [{'class': self.names[int(c)], 'confidence': round(float(p), 4),
+                                'box': [round(float(v), 1) for v in b]}
+                               for c, p, b in zip(classes, confidences, boxes)],
+            }, indent=2))
+        finally:
+            with self.pending_lock:
+                self.pending -= 1
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def queue_summary(queue_dir=QUEUE_DIR, accepted_dir=ACCEPTED_DIR):
+    """Counts per reason in the queue, plus accepted images"""
+    reasons = Counter()
+    for meta in Path(queue_dir).glob('*.json'):
+        reasons[json.loads(meta.read_text()).get('reason', '?')] += 1
+    accepted = len(list((Path(accepted_dir) / 'images').glob('*.jpg')))
+    return reasons, accepted
+
+
+def accept(image, accepted_dir=ACCEPTED_DIR, lines=None):
+    """Move a reviewed sample into the accepted dataset (optionally with new label lines)"""
+    accepted = Path(accepted_dir)
+    for sub in ('images', 'labels', 'meta'):
+        (accepted / sub).mkdir(parents=True, exist_ok=True)
+    label = image.with_suffix('.txt')
+    if lines is not None:
+        label.write_text('\n'.join(lines))
+    shutil.move(str(image), accepted / 'images' / image.name)
+    shutil.move(str(label), accepted / 'labels' / label.name)
+    if image.with_suffix('.json').exists():
+        shutil.move(str(image.with_suffix('.json')), accepted / 'meta' / image.with_suffix('.json').name)
+
+
+def discard(image):
+    for suffix in ('.jpg', '.txt', '.json'):
+        image.with_suffix(suffix).unlink(missing_ok=True)
+
+
+def review(names, queue_dir=QUEUE_DIR, accepted_dir=ACCEPTED_DIR):
+    """Step through the queue: accept, relabel, mark as background or discard"""
+    images = sorted(Path(queue_dir).glob('*.jpg'))
+    print(f"\n{len(images)} samples to review")
+    print("  A/Enter - accept labels as shown     1-9 - set all boxes to class N")
+    print("  B       - accept as background       D   - discard")
+    print("  S       - skip (keep in queue)       Q   - quit")
+    counts = Counter()
+    for index, image_path in enumerate(images, 1):
+        frame = cv2.imread(str(image_path))
+        if frame is None:
+            continue
+        classes, boxes = read_labels(image_path.with_suffix('.txt'), frame.shape)
+        meta = json.loads(image_path.with_suffix('.json').read_text()) if image_path.with_suffix('.json').exists() else {}
+        while True:
+            view = frame.copy()
+            for cls, (x1, y1, x2, y2) in zip(classes, boxes.astype(int)):
+                cv2.rectangle(view, (x1, y1), (x2, y2), (0, 255, 255), 2)
+                cv2.putText(view, names.get(int(cls), str(cls)), (x1, max(20, y1 - 8)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            cv2.putText(view, f"[{index}/{len(images)}] {meta.get('reason', '')}", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+            cv2.imshow('Review Queue', view)
+            key = cv2.waitKey(0) & 0xFF
+            if ord('1') <= key < ord('1') + min(9, len(names)):
+                classes = np.full(len(classes), key - ord('1'))
+                continue
+            break
+        if key in (ord('a'), 13):
+            accept(image_path, accepted_dir, yolo_lines(classes, boxes, frame.shape))
+            counts['accepted'] += 1
+        elif key == ord('b'):
+            accept(image_path, accepted_dir, [])
+            counts['background'] += 1
+        elif key == ord('d'):
+            discard(image_path)
+            counts['discarded'] += 1
+        elif key == ord('q'):
+            break
+        else:
+            counts['skipped'] += 1
+    cv2.destroyAllWindows()
+    return counts
+
+
+if __name__ == '__main__':
+    import argparse
+    import yaml
+
+    parser = argparse.ArgumentParser(description='Review uncertain detections sampled from the bins')
+    parser.add_argument('--queue', default=QUEUE_DIR)
+    parser.add_argument('--accepted', default=ACCEPTED_DIR)
+    parser.add_argument('--data', default='data_roboflow.yaml', help='Dataset YAML (class names)')
+    parser.add_argument('--summary', action='store_true', help='Only print queue counts')
+    args = parser.parse_args()
+
+    with open(args.data, 'r') as f:
+        names = yaml.safe_load(f)['names']
+    names = dict(enumerate(names)) if isinstance(names, list) else names
+
+    reasons, accepted = queue_summary(args.queue, args.accepted)
+    print("="*80)
+    print("ACTIVE LEARNING - REVIEW QUEUE")
+    print("="*80)
+    for reason in REASON_PRIORITY:
+        print(f"  {reason:<20} {reasons.get(reason, 0)}")
+    print(f"  {'accepted so far':<20} {accepted}")
+
+    if not args.summary:
+        counts = review(names, args.queue, args.accepted)
+        print(f"\n✓ {dict(counts)}")
+        print(f"  Fine-tune with: python finetune.py")
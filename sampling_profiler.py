@@ -0,0 +1,159 @@
+"""
+Sampling Profiler
+A background thread snapshots every thread's Python stack a few dozen times
+a second (sys._current_frames, no tracing hooks), so it can stay on for a
+whole session. Stacks are aggregated per thread and written at the end in
+collapsed-stack format, one "thread;outer;...;leaf count" line per stack:
+
+    flamegraph.pl runs/profiles/smooth_*.folded > profile.svg
+    (or drop the .folded file into speedscope.app)
+
+Module-level frames and the leaf frame keep their line number, so time in
+the apps' main loops and time spent waiting on a lock (`with servo_lock:`)
+show up as separate bars.
+"""
+from collections import Counter
+from pathlib import Path
+import os
+import signal
+import sys
+import threading
+import time
+
+OUTPUT_DIR = 'runs/profiles'
+SAMPLE_INTERVAL = 0.02          # Seconds between samples (50 Hz)
+MAX_DEPTH = 64
+TOGGLE_SIGNAL = getattr(signal, 'SIGUSR1', None)
+
+
+class SamplingProfiler:
+    """Start/stop/toggle at runtime; write() dumps the aggregated stacks"""
+
+    def __init__(self, name='session', interval=SAMPLE_INTERVAL, output_dir=OUTPUT_DIR):
+        self.name = name
+        self.interval = interval
+        self.output_dir = output_dir
+        self.stacks = Counter()         # (thread name, ((code, line), ...)) → samples
+        self.labels = {}                # code → "function (file.py)"
+        self.thread_names = {}
+        self.lock = threading.Lock()    # Sampler vs. readers of `stacks`
+        self.enabled = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.samples = 0
+        self.sample_time = 0.0          # Seconds spent taking samples
+        self.active_time = 0.0          # Seconds the profiler was switched on
+        self.enabled_at = None
+
+    def start(self):
+        """Begin sampling (the sampler thread is created on first use)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+            self.thread.start()
+        if not self.enabled.is_set():
+            self.enabled_at = time.perf_counter()
+            self.enabled.set()
+        return self
+
+    def stop(self):
+        """Pause sampling; collected stacks are kept"""
+        if self.enabled.is_set():
+            self.enabled.clear()
+            self.active_time += time.perf_counter() - self.enabled_at
+        return self
+
+    def toggle(self):
+        """Start or stop; returns True if now sampling"""
+        if self.enabled.is_set():
+            self.stop()
+        else:
+            self.start()
+        return self.enabled.is_set()
+
+    def install_signal(self, signum=TOGGLE_SIGNAL):
+        """Toggle on a signal (kill -USR1 <pid>); no-op where the signal doesn't exist"""
+        if signum is None:
+            return False
+
+        def handler(received, stack):
+            print(f"\n🔥 Profiler {'ON' if self.toggle() else 'OFF'} ({self.samples} samples so far)")
+        signal.signal(signum, handler)
+        return True
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stopped.is_set():
+            if not self.enabled.wait(0.5):
+                continue
+            start = time.perf_counter()
+            with self.lock:
+                self._sample(own)
+            now = time.perf_counter()
+            self.sample_time += now - start
+            time.sleep(max(0.0, self.interval - (now - start)))
+
+    def _sample(self, own):
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            leaf = True
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                # Leaf and module-level frames keep their line; others merge per function
+                line = frame.f_lineno if leaf or code.co_name == '<module>' else 0
+                stack.append((code, line))
+                frame = frame.f_back
+                leaf = False
+            name = self.thread_names.get(ident)
+            if name is None:
+                self.thread_names = {t.ident: t.name for t in threading.enumerate()}
+                name = self.thread_names.get(ident, f"thread-{ident}")
+            self.stacks[(name, tuple(stack))] += 1
+        self.samples += 1
+
+    def _label(self, code, line):
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)})"
+            self.labels[code] = label
+        return f"{label[:-1]}:{line})" if line else label
+
+    def collapsed(self):
+        """Lines in collapsed-stack format, heaviest first"""
+        lines = []
+        for (thread_name, stack), count in self.stacks.most_common():
+            frames = [thread_name] + [self._label(code, line) for code, line in reversed(stack)]
+            lines.append(f"{';'.join(f.replace(';', ',') for f in frames)} {count}")
+        return lines
+
+    def top(self, n=10):
+        """Heaviest leaf frames (self time) as (thread, frame, share of samples)"""
+        leaves = Counter()
+        with self.lock:
+            for (thread_name, stack), count in self.stacks.items():
+                leaves[(thread_name, self._label(*stack[0]) if stack else '?')] += count
+        return [(thread_name, frame, count / self.samples)
+                for (thread_name, frame), count in leaves.most_common(n)]
+
+    def overhead(self):
+        """Share of wall time spent sampling while the profiler was on"""
+        active = self.active_time
+        if self.enabled.is_set():
+            active += time.perf_counter() - self.enabled_at
+        return self.sample_time / active if active > 0 else 0.0
+
+    def write(self, path=None):
+        """Stop and write the collapsed stacks; returns the path (None if nothing sampled)"""
+        self.stop()
+        self.stopped.set()
+        with self.lock:
+            lines = self.collapsed()
+        if not lines:
+            return None
+        if path is None:
+            Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+            path = Path(self.output_dir) / f"{self.name}_{time.strftime('%Y%m%d_%H%M%S')}.folded"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
@@ -0,0 +1,68 @@
+"""
+Servo Control Path
+trigger → ServoTimer gate under the servo lock → BinRouter node pool →
+open/dwell/close → stats, as used by smart_dustbin_smooth.py. Kept in one
+place so benchmark_servo.py drives exactly the code the bin runs.
+"""
+import threading
+from servo_timing import ServoTimer, DONE
+
+
+class ServoController:
+    """One-cycle-at-a-time trigger gate in front of a BinRouter
+
+    `stats` and `state` are the dicts the app's overlay and summary read;
+    hold `lock` when touching them from another thread.
+    """
+
+    def __init__(self, router, classes, operation_time, cooldown_time, lock=None,
+                 on_started=None, on_ready=None):
+        self.router = router
+        self.timer = ServoTimer(operation_time, cooldown_time)
+        self.state = self.timer.state
+        self.lock = lock or threading.Lock()
+        self.on_started = on_started
+        self.on_ready = on_ready
+        self.stats = {
+            name: {'count': 0, 'success': 0, 'failed': 0, 'confidences': [], 'response_times': []}
+            for name in classes
+        }
+
+    def cycle_done(self, route, success, operation_time, message, class_name):
+        """Runs on the node's worker thread when the open/dwell/close cycle ends"""
+        with self.lock:
+            if success:
+                self.stats[class_name]['success'] += 1
+                if message != 'demo':
+                    self.stats[class_name]['response_times'].append(operation_time)
+            else:
+                print(f"⚠️  {route.label}: {message}")
+                self.stats[class_name]['failed'] += 1
+
+    def trigger(self, class_name, on_event=None):
+        """Start a servo cycle in the background; False if one is already running"""
+        # Check if already processing, else mark as active
+        with self.lock:
+            if not self.timer.try_start(class_name):
+                print(f"⚠️  Servo already active, skipping...")
+                return False
+            self.stats[class_name]['count'] += 1
+
+        if self.on_started:
+            self.on_started()
+
+        # Run the cycle on the route's ESP node pool
+        self.router.dispatch(class_name, on_event=on_event,
+                             on_done=lambda route, *result: self.cycle_done(route, *result, class_name))
+        return True
+
+    def update(self):
+        """Advance countdown/message once per frame; True while operating or cooling down"""
+        with self.lock:
+            phase = self.timer.update()
+        if phase == DONE:
+            print(f"✅ Ready for next detection\n")
+            if self.on_ready:
+                self.on_ready()
+            return False
+        return phase is not None
@@ -0,0 +1,60 @@
+"""
+Servo Timing State Machine
+The trigger/servo state logic of smart_dustbin_smooth.py (operating →
+cooldown → ready), with an injectable clock so simulate_throughput.py can
+replay exactly the same logic on simulated time
+"""
+import time
+
+OPERATING, COOLDOWN, DONE = 'operating', 'cooldown', 'done'
+
+
+class ServoTimer:
+    """Single-bin-at-a-time trigger gate; `state` is the dict the overlay draws from"""
+
+    def __init__(self, operation_time, cooldown_time, clock=time.time):
+        self.operation_time = operation_time
+        self.cooldown_time = cooldown_time
+        self.clock = clock
+        self.state = {
+            'active': False,
+            'class_name': None,
+            'start_time': 0,
+            'message': '',
+            'countdown': 0
+        }
+
+    def try_start(self, class_name):
+        """Mark active; False if a cycle is already running ("Servo already active, skipping")"""
+        if self.state['active']:
+            return False
+        self.state['active'] = True
+        self.state['class_name'] = class_name
+        self.state['start_time'] = self.clock()
+        return True
+
+    def update(self):
+        """Advance countdown/message; returns OPERATING, COOLDOWN, DONE (just became ready) or None"""
+        state = self.state
+        if not state['active']:
+            return None
+        elapsed = self.clock() - state['start_time']
+        total_time = self.operation_time + self.cooldown_time
+
+        if elapsed < self.operation_time:
+            # Servo operating
+            remaining = self.operation_time - elapsed
+            state['countdown'] = int(remaining) + 1
+            state['message'] = f"SERVO OPERATING... {state['countdown']}s"
+            return OPERATING
+        if elapsed < total_time:
+            state['countdown'] = 0
+            state['message'] = "COOLDOWN..."
+            return COOLDOWN
+        state['active'] = False
+        state['message'] = "READY FOR NEXT DETECTION"
+        return DONE
+
+    def ready_at(self):
+        """Clock time at which update() will report DONE"""
+        return self.state['start_time'] + self.operation_time + self.cooldown_time
@@ -0,0 +1,280 @@
+"""
+Bin Throughput Simulator
+Discrete-event simulation of items arriving at the bin, replaying the app's
+real trigger/servo state machine (servo_timing.ServoTimer) on a simulated
+clock. Predicts throughput, dropped items, queueing delay and lid overlaps
+for candidate WASTE_DROP_DELAY / SERVO_OPERATION_TIME / COOLDOWN_TIME values.
+
+Distributions are given as specs:
+    const:2.0   exp:30   uniform:0.1,0.4   normal:0.2,0.05   lognormal:0.15,0.5
+    file:servo_latency.csv          (measured samples, seconds)
+    file_ms:benchmark.json          (measured samples, milliseconds)
+"""
+from bin_routing import BinRouter, ROUTES_FILE
+from servo_timing import ServoTimer
+from collections import deque
+from pathlib import Path
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import time
+import numpy as np
+
+OUTPUT_DIR = 'runs/simulation'
+
+# Current app settings (smart_dustbin_smooth.py / bin_routes.yaml)
+APP_OPERATION_TIME = 4.0
+APP_COOLDOWN_TIME = 0.5
+APP_FPS = 30
+
+ARRIVALS = 'exp:30'             # Seconds between items
+DETECT_LATENCY = 'lognormal:0.3,0.4'   # Item placed → first confident detection
+HTTP_LATENCY = 'lognormal:0.08,0.6'    # Per ESP8266 request
+HTTP_TIMEOUT = 5.0
+PATIENCE = 10.0                 # s a person holds an item before giving up (0 = every busy arrival is skipped)
+SIM_HOURS = 1000
+
+
+class SimClock:
+    """Stands in for time.time inside ServoTimer"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def load_samples(path):
+    """Numbers from .json (list or {key: list}), .csv (first numeric column) or one-per-line text"""
+    path = Path(path)
+    if path.suffix == '.json':
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = next(v for v in data.values() if isinstance(v, list))
+        return np.asarray(data, dtype=np.float64)
+    if path.suffix == '.csv':
+        with open(path, 'r', newline='') as f:
+            rows = list(csv.reader(f))
+        for column in range(len(rows[0])):
+            try:
+                return np.asarray([float(r[column]) for r in rows[1:] if r[column]], dtype=np.float64)
+            except ValueError:
+                continue
+        raise ValueError(f"No numeric column in {path}")
+    return np.asarray([float(line) for line in path.read_text().split() if line], dtype=np.float64)
+
+
+class Distribution:
+    """Vectorised sampler built from a spec string (see module docstring)"""
+
+    def __init__(self, spec, rng):
+        self.spec = spec
+        self.rng = rng
+        kind, _, args = spec.partition(':')
+        self.kind = kind
+        if kind in ('file', 'file_ms'):
+            self.samples = load_samples(args) / (1000.0 if kind == 'file_ms' else 1.0)
+            if not len(self.samples):
+                raise ValueError(f"{args} has no samples")
+        else:
+            self.params = [float(v) for v in args.split(',')]
+
+    def sample(self, n):
+        p = getattr(self, 'params', None)
+        if self.kind in ('file', 'file_ms'):
+            return self.rng.choice(self.samples, n)     # Bootstrap from measurements
+        if self.kind == 'const':
+            return np.full(n, p[0])
+        if self.kind == 'exp':
+            return self.rng.exponential(p[0], n)
+        if self.kind == 'uniform':
+            return self.rng.uniform(p[0], p[1], n)
+        if self.kind == 'normal':
+            return np.clip(self.rng.normal(p[0], p[1], n), 0, None)
+        if self.kind == 'lognormal':
+            return self.rng.lognormal(math.log(p[0]), p[1], n)      # median, sigma
+        raise ValueError(f"Unknown distribution: {self.spec}")
+
+
+def simulate(config, arrivals, detect_latency, http_latency, route_names, mix, hours,
+             fps=APP_FPS, patience=PATIENCE, timeout=HTTP_TIMEOUT, seed=0):
+    """One run; config = {'drop_delay', 'operation_time', 'cooldown_time'} (drop_delay None = per-route dwell)"""
+    # Same seed for every config → same item stream (common random numbers)
+    rng = np.random.default_rng(seed)
+    for distribution in (arrivals, detect_latency, http_latency):
+        distribution.rng = rng
+    horizon = hours * 3600.0
+    frame = 1.0 / fps
+
+    # Pre-sample everything in bulk
+    gaps = arrivals.sample(int(horizon / max(arrivals.sample(1000).mean(), 1e-3) * 1.2) + 100)
+    arrival = np.cumsum(gaps)
+    arrival = arrival[arrival < horizon]
+    n = len(arrival)
+    detect = arrival + detect_latency.sample(n)
+    routes = rng.choice(len(route_names), n, p=mix)
+    open_latency = http_latency.sample(n)
+    close_latency = http_latency.sample(n)
+
+    def tick(t):
+        """The main loop only looks at the state once per frame"""
+        return math.ceil(t / frame) * frame
+
+    clock = SimClock()
+    timer = ServoTimer(config['operation_time'], config['cooldown_time'], clock=clock)
+    dwell = [config['drop_delay'] if config['drop_delay'] is not None else d for d in config['dwell']]
+    lid_busy_until = [0.0] * len(route_names)
+    waiting = deque()
+    events = [(tick(t), 0, i) for i, t in enumerate(detect)]     # kind 0 = detection, 1 = timer ready
+    heapq.heapify(events)
+    counter = itertools.count(n)
+
+    served = failed = dropped = overlaps = 0
+    delays = []
+    busy_time = 0.0
+    cycle = -1                  # Id of the ready event for the running cycle
+
+    def start(i):
+        nonlocal served, failed, overlaps, busy_time, cycle
+        timer.try_start(route_names[routes[i]])
+        now = clock.now
+        delays.append(now - arrival[i])
+        r = routes[i]
+        if lid_busy_until[r] > now:
+            overlaps += 1       # Previous open/dwell/close on this servo still running
+        if open_latency[i] > timeout or close_latency[i] > timeout:
+            failed += 1
+            lid_busy_until[r] = max(lid_busy_until[r], now + timeout)
+        else:
+            served += 1
+            lid_busy_until[r] = max(lid_busy_until[r], now + open_latency[i] + dwell[r] + close_latency[i])
+        busy_time += config['operation_time'] + config['cooldown_time']
+        cycle = next(counter)
+        heapq.heappush(events, (tick(timer.ready_at()), 1, cycle))
+
+    while events:
+        t, kind, i = heapq.heappop(events)
+        if t > horizon:
+            break
+        clock.now = t
+        timer.update()
+        if kind == 1 and timer.state['active']:
+            if timer.ready_at() > t and i == cycle:
+                heapq.heappush(events, (t + frame, 1, i))    # Float edge: check again next frame
+            continue
+        if not timer.state['active']:
+            # Next frame after the cooldown: items already in view go first
+            while waiting:
+                j = waiting.popleft()
+                if t - detect[j] > patience:
+                    dropped += 1        # Gave up while the bin was busy
+                    continue
+                start(j)
+                break
+        if kind == 0:
+            if timer.state['active']:
+                waiting.append(i)
+            else:
+                start(i)
+    dropped += len(waiting)
+
+    delays = np.asarray(delays) if delays else np.zeros(1)
+    total = max(n, 1)
+    return {
+        'items': n,
+        'throughput_per_min': served / (horizon / 60),
+        'served': served,
+        'failed': failed,
+        'drop_rate': dropped / total,
+        'overlap_rate': overlaps / max(served + failed, 1),
+        'delay_p50_s': float(np.percentile(delays, 50)),
+        'delay_p95_s': float(np.percentile(delays, 95)),
+        'delay_p99_s': float(np.percentile(delays, 99)),
+        'utilisation': min(busy_time / horizon, 1.0),
+    }
+
+
+def parse_mix(text, route_names):
+    if not text:
+        return np.full(len(route_names), 1.0 / len(route_names))
+    weights = dict(item.split('=') for item in text.split(','))
+    mix = np.array([float(weights.get(name, 0)) for name in route_names])
+    return mix / mix.sum()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Discrete-event bin throughput simulator')
+    parser.add_argument('--arrivals', default=ARRIVALS, help='Seconds between items')
+    parser.add_argument('--detect-latency', default=DETECT_LATENCY, help='Item placed → confident detection (s)')
+    parser.add_argument('--http-latency', default=HTTP_LATENCY, help='Per ESP8266 request (s)')
+    parser.add_argument('--drop-delays', type=float, nargs='+', help='WASTE_DROP_DELAY candidates (default: route dwell)')
+    parser.add_argument('--operation-times', type=float, nargs='+', default=[APP_OPERATION_TIME])
+    parser.add_argument('--cooldowns', type=float, nargs='+', default=[APP_COOLDOWN_TIME])
+    parser.add_argument('--mix', help='Class mix, e.g. paper=0.6,plastic=0.4 (default: even)')
+    parser.add_argument('--patience', type=float, default=PATIENCE)
+    parser.add_argument('--timeout', type=float, default=HTTP_TIMEOUT)
+    parser.add_argument('--fps', type=float, default=APP_FPS)
+    parser.add_argument('--hours', type=float, default=SIM_HOURS)
+    parser.add_argument('--routes', default=ROUTES_FILE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    router = BinRouter.load(args.routes)
+    route_names = [r.name for r in router.routes]
+    route_dwell = [r.dwell for r in router.routes]
+    router.close()
+    mix = parse_mix(args.mix, route_names)
+
+    rng = np.random.default_rng(args.seed)
+    arrivals = Distribution(args.arrivals, rng)
+    detect_latency = Distribution(args.detect_latency, rng)
+    http_latency = Distribution(args.http_latency, rng)
+
+    print("="*80)
+    print("BIN THROUGHPUT SIMULATOR")
+    print("="*80)
+    print(f"Arrivals: {args.arrivals} | detection: {args.detect_latency} | HTTP: {args.http_latency}")
+    print(f"Bins: {', '.join(f'{n} ({m:.0%})' for n, m in zip(route_names, mix))} | "
+          f"patience {args.patience:g}s | {args.hours:g} simulated hours per config")
+
+    configs = [
+        {'drop_delay': d, 'operation_time': o, 'cooldown_time': c, 'dwell': route_dwell}
+        for d, o, c in itertools.product(args.drop_delays or [None], args.operation_times, args.cooldowns)
+    ]
+    rows = []
+    for config in configs:
+        start = time.perf_counter()
+        result = simulate(config, arrivals, detect_latency, http_latency, route_names, mix, args.hours,
+                          fps=args.fps, patience=args.patience, timeout=args.timeout, seed=args.seed)
+        result['wall_s'] = time.perf_counter() - start
+        rows.append({**{k: v for k, v in config.items() if k != 'dwell'}, **result})
+
+    rows.sort(key=lambda r: (-r['throughput_per_min'], r['drop_rate']))
+    print(f"\n{'='*80}")
+    print("📊 PREDICTED PERFORMANCE (best throughput first)")
+    print("="*80)
+    print(f"{'Drop':<7} {'Oper':<7} {'Cool':<7} {'Items/min':<11} {'Dropped':<9} {'Overlap':<9} {'Delay p50':<11} {'Delay p95':<11} {'Util':<7}")
+    print("-"*80)
+    for r in rows:
+        drop_text = 'route' if r['drop_delay'] is None else f"{r['drop_delay']:g}s"
+        marker = ' ◀ app' if (r['operation_time'] == APP_OPERATION_TIME and r['cooldown_time'] == APP_COOLDOWN_TIME
+                              and r['drop_delay'] is None) else ''
+        print(f"{drop_text:<7} {r['operation_time']:<7g} {r['cooldown_time']:<7g} {r['throughput_per_min']:<11.3f} "
+              f"{r['drop_rate']:<9.1%} {r['overlap_rate']:<9.1%} {r['delay_p50_s']:<11.2f} {r['delay_p95_s']:<11.2f} "
+              f"{r['utilisation']:<7.0%}{marker}")
+    print("="*80)
+    print("Overlap = a trigger while the previous lid cycle on that servo was still open/closing.")
+    print(f"Simulated {sum(r['items'] for r in rows)} items in {sum(r['wall_s'] for r in rows):.1f}s")
+
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+    out = Path(OUTPUT_DIR) / f"simulation_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results: {out}")
@@ -0,0 +1,260 @@
+"""
+Smart Dustbin - Multi-Camera Version
+One process serves several chutes: frames from every camera go through a
+single batched forward pass per tick, then post-processing and servo
+triggers run per stream
+"""
+from ultralytics import YOLO
+from frame_sources import ReplaySource, open_source
+from bin_routing import BinRouter, ROUTES_FILE
+from servo_control import ServoController
+from decision_logic import filter_detections, select_best, CONF_THRESHOLD, MIN_SIZE, MAX_SIZE
+import argparse
+import multiprocessing
+import os
+import time
+import cv2
+import numpy as np
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+
+# One entry per chute: camera source (index or replay path) and its routing table.
+# `hosts` points the table's nodes at this chute's own ESP8266 (node name → host)
+STREAMS = [
+    {
+        'name': 'Chute 1',
+        'source': 0,
+        'routes': ROUTES_FILE,
+    },
+    {
+        'name': 'Chute 2',
+        'source': 1,
+        'routes': ROUTES_FILE,
+        'hosts': {'esp_main': '192.168.138.134'},
+    },
+]
+
+# Timing settings (open/dwell/close per bin come from the routing table)
+SERVO_OPERATION_TIME = 4.0
+COOLDOWN_TIME = 0.5
+
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 720
+TILE_WIDTH = 640                # Per-stream tile size in the combined window
+TILE_HEIGHT = 360
+
+
+def decide(result, names, routed, frame_shape):
+    """One stream's result through the app's size filter and best pick (decision_logic.py)"""
+    boxes = result.boxes
+    detections = filter_detections(boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.xyxy.cpu().numpy(),
+                                   names, routed, frame_shape, MIN_SIZE, MAX_SIZE)
+    return detections, select_best(detections)
+
+
+class Stream:
+    """One camera + its bins: servo controller (state, stats, non-blocking triggers)"""
+
+    def __init__(self, config, router, classes):
+        self.name = config['name']
+        self.config = config
+        self.router = router
+        self.classes = classes
+        self.servo = ServoController(router, classes, SERVO_OPERATION_TIME, COOLDOWN_TIME)
+        self.state = self.servo.state
+        self.stats = self.servo.stats
+        self.cap = None
+
+    def open(self):
+        self.cap = open_source(self.config['source'], FRAME_WIDTH, FRAME_HEIGHT)
+        return self
+
+    def trigger(self, class_name, item):
+        route = self.router[class_name]
+        print(f"\n{route.emoji} [{self.name}] {class_name.upper()} DETECTED → Triggering {route.label}...")
+        with self.servo.lock:
+            self.stats[class_name]['confidences'].append(item['conf'])
+        self.servo.trigger(class_name)
+
+
+def draw_tile(frame, stream, detections):
+    """Draw boxes + status for one stream and shrink it to a tile"""
+    for class_name, items in detections.items():
+        color = stream.router[class_name].color
+        for item in items:
+            x1, y1, x2, y2 = item['box']
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+            cv2.putText(frame, f"{class_name.upper()}: {item['conf']:.0%}", (x1 + 5, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+    tile = cv2.resize(frame, (TILE_WIDTH, TILE_HEIGHT))
+    state_color = (0, 255, 255) if stream.state['active'] else (0, 255, 0)
+    cv2.rectangle(tile, (0, 0), (TILE_WIDTH, 30), (0, 0, 0), -1)
+    cv2.putText(tile, f"{stream.name} | {stream.state['message'] or 'READY'}", (10, 22),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, state_color, 2)
+    return tile
+
+
+def tile_grid(tiles):
+    """Arrange tiles in a 2-column grid"""
+    if len(tiles) % 2:
+        tiles = tiles + [np.zeros_like(tiles[0])]
+    rows = [np.hstack(tiles[i:i + 2]) for i in range(0, len(tiles), 2)]
+    return np.vstack(rows)
+
+
+def run_live(model, streams, show=True):
+    """Main loop: read every stream, one batched inference, per-stream triggers"""
+    frame_count = 0
+    session_start = time.time()
+    while True:
+        frames = []
+        for stream in streams:
+            ret, frame = stream.cap.read()
+            if not ret:
+                print(f"❌ [{stream.name}] Camera read failed")
+                return frame_count, time.time() - session_start
+            frames.append(frame)
+
+        # Single forward pass for all cameras
+        results = model(frames, conf=CONF_THRESHOLD, verbose=False)
+        frame_count += 1
+
+        tiles = []
+        for stream, frame, result in zip(streams, frames, results):
+            stream.servo.update()
+            detections, best_detection = decide(result, model.names, stream.classes, frame.shape)
+            if best_detection and not stream.state['active']:
+                stream.trigger(*best_detection)
+            if show:
+                tiles.append(draw_tile(frame, stream, detections))
+
+        if show:
+            cv2.imshow('Smart Dustbin - Multi-Camera', tile_grid(tiles))
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                return frame_count, time.time() - session_start
+
+
+def _separate_process_worker(frames, ticks, threads, routed, barrier, queue):
+    """Benchmark baseline: one process, one model, one stream"""
+    import torch
+    # Each process gets its share of the cores - torch's default (all cores
+    # per process) oversubscribes them and skews the per-stream numbers
+    torch.set_num_threads(threads)
+    load_start = time.time()
+    model = YOLO(MODEL_PATH)
+    model(frames[0], conf=CONF_THRESHOLD, verbose=False)
+    load_time = time.time() - load_start
+    barrier.wait()
+    start = time.perf_counter()
+    for t in range(ticks):
+        result = model(frames[t % len(frames)], conf=CONF_THRESHOLD, verbose=False)[0]
+        decide(result, model.names, routed, frames[0].shape)
+    queue.put((time.perf_counter() - start, load_time))
+
+
+def run_benchmark(replay_path, max_streams, ticks):
+    """Throughput vs camera count: batched single process vs N processes"""
+    frames = ReplaySource(replay_path, preload=True, loop=False, size=(FRAME_WIDTH, FRAME_HEIGHT)).frames
+    print(f"✓ Preloaded {len(frames)} replay frames from {replay_path}")
+
+    model = YOLO(MODEL_PATH)
+    router = BinRouter.load(ROUTES_FILE)
+    routed = [name for name in model.names.values() if name in router]
+    router.close()
+    rows = []
+    for n in range(1, max_streams + 1):
+        # Batched: stream k reads frame (t + k) so batches aren't identical
+        batch = [frames[k % len(frames)] for k in range(n)]
+        model(batch, conf=CONF_THRESHOLD, verbose=False)  # warm-up at this batch size
+        start = time.perf_counter()
+        for t in range(ticks):
+            batch = [frames[(t + k) % len(frames)] for k in range(n)]
+            for frame, result in zip(batch, model(batch, conf=CONF_THRESHOLD, verbose=False)):
+                decide(result, model.names, routed, frame.shape)
+        batched_fps = n * ticks / (time.perf_counter() - start)
+
+        # Baseline: N processes each importing torch and loading its own model
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(n)
+        queue = ctx.Queue()
+        threads = max(1, (os.cpu_count() or 1) // n)
+        workers = [ctx.Process(target=_separate_process_worker, args=(frames[:20], ticks, threads, routed,
+                                                                       barrier, queue))
+                   for _ in range(n)]
+        for w in workers:
+            w.start()
+        timings = [queue.get() for _ in workers]
+        for w in workers:
+            w.join()
+        separate_fps = n * ticks / max(t for t, _ in timings)
+        load_time = sum(l for _, l in timings) / n
+
+        rows.append((n, batched_fps, separate_fps, load_time))
+        print(f"  {n} stream(s): batched {batched_fps:.1f} fps | separate {separate_fps:.1f} fps "
+              f"({threads} torch thread(s) per process)")
+
+    print(f"\n{'='*80}")
+    print("📈 THROUGHPUT vs CAMERA COUNT (frames/s, all streams)")
+    print("="*80)
+    print(f"{'Streams':<10} {'Batched':<15} {'N Processes':<15} {'Speedup':<10} {'Per-proc load':<15}")
+    print("-"*80)
+    for n, batched_fps, separate_fps, load_time in rows:
+        print(f"{n:<10} {batched_fps:<15.1f} {separate_fps:<15.1f} {batched_fps / separate_fps:<10.2f} {load_time:<15.1f}s")
+    print("="*80)
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Multi-camera smart dustbin')
+    parser.add_argument('--benchmark', metavar='REPLAY', help='Measure throughput scaling with a replay source')
+    parser.add_argument('--max-streams', type=int, default=4)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--headless', action='store_true', help='No OpenCV window')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("SMART DUSTBIN - MULTI-CAMERA")
+    print("Batched inference across all chutes")
+    print("="*80)
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.max_streams, args.ticks)
+        exit(0)
+
+    model = YOLO(MODEL_PATH)
+
+    # One routing table per chute; each probes its own ESP8266 nodes (offline ones run in demo mode)
+    streams = []
+    for config in STREAMS:
+        router = BinRouter.load(config['routes'], hosts=config.get('hosts'))
+        print(f"\n📡 {config['name']} ({config['routes']}):")
+        router.describe()
+        router.check_nodes(timeout=3)
+        routed = [name for name in model.names.values() if name in router]
+        streams.append(Stream(config, router, routed).open())
+
+    print(f"\n✓ Model loaded once for {len(streams)} streams")
+    print(f"  Classes: {model.names}")
+    print("\nPress Q to quit\n")
+
+    frame_count, duration = run_live(model, streams, show=not args.headless)
+
+    for stream in streams:
+        stream.cap.release()
+        stream.router.close()
+    cv2.destroyAllWindows()
+
+    print(f"\n{'='*80}")
+    print("SESSION SUMMARY")
+    print("="*80)
+    print(f"{'Duration':<30} {duration:.1f}s")
+    print(f"{'Batched Ticks':<30} {frame_count}")
+    if duration > 0:
+        print(f"{'Ticks/s':<30} {frame_count / duration:.1f} ({frame_count * len(streams) / duration:.1f} frames/s)")
+    print("-"*80)
+    print(f"{'Stream':<15} {'Class':<18} {'Detections':<12} {'Success':<10} {'Failed':<10}")
+    for stream in streams:
+        for class_name, s in stream.stats.items():
+            print(f"{stream.name:<15} {class_name:<18} {s['count']:<12} {s['success']:<10} {s['failed']:<10}")
+    print("="*80)
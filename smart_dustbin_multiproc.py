@@ -0,0 +1,230 @@
+"""
+Smart Dustbin - Multi-Process Version
+Capture, inference and UI/servo run in separate processes (no shared GIL).
+Frames travel through a shared-memory ring, detections come back as
+compact records, and per-hop latency is reported at the end
+"""
+from frame_bus import FrameRing, DetectionRing
+from frame_sources import open_source
+from bin_routing import BinRouter, ROUTES_FILE
+from servo_control import ServoController
+from decision_logic import filter_detections, select_best, CONF_THRESHOLD, MIN_SIZE, MAX_SIZE
+import argparse
+import multiprocessing
+import time
+import cv2
+import numpy as np
+
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+CAMERA_SOURCE = 0               # Camera index or replay video/folder path
+
+# Timing settings
+SERVO_OPERATION_TIME = 4.0
+COOLDOWN_TIME = 0.5
+
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 720
+RING_SLOTS = 8                  # Frames kept in shared memory
+POLL_INTERVAL = 0.001           # Reader sleep when nothing new has arrived
+
+
+def capture_process(frame_ring_name, source, stop_event):
+    """Read the camera and write frames into the shared ring"""
+    ring = FrameRing(frame_ring_name, slots=RING_SLOTS, shape=(FRAME_HEIGHT, FRAME_WIDTH, 3))
+    cap = None
+    try:
+        cap = open_source(source, FRAME_WIDTH, FRAME_HEIGHT)
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape != ring.shape:
+                frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+            ring.write(frame)
+    finally:
+        stop_event.set()
+        if cap is not None:
+            cap.release()
+        ring.close()
+
+
+def inference_process(frame_ring_name, detection_ring_name, ready_conn, stop_event):
+    """Run YOLO on the newest frame (zero-copy) and publish detection records
+
+    Once the model is warm its class names are sent over `ready_conn` - that
+    message is the ready signal for the main process
+    """
+    from ultralytics import YOLO
+
+    frames = FrameRing(frame_ring_name, slots=RING_SLOTS, shape=(FRAME_HEIGHT, FRAME_WIDTH, 3))
+    detections = DetectionRing(detection_ring_name)
+    last_seq = -1
+    try:
+        model = YOLO(MODEL_PATH)
+        model(np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8), conf=CONF_THRESHOLD, verbose=False)
+        ready_conn.send(dict(model.names))
+        ready_conn.close()
+
+        while not stop_event.is_set():
+            latest = frames.latest(newer_than=last_seq)
+            if latest is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            seq, capture_time, view = latest
+            pickup_time = time.perf_counter()
+            boxes = model(view, conf=CONF_THRESHOLD, verbose=False)[0].boxes
+            last_seq = seq
+            # Slot reused mid-inference: result no longer matches a frame in the ring
+            if not frames.is_current(seq):
+                continue
+            detections.publish(seq, capture_time, pickup_time,
+                               boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.xyxy.cpu().numpy())
+    finally:
+        stop_event.set()    # Capture and UI stop with us instead of waiting for records forever
+        frames.close()
+        detections.close()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Multi-process smart dustbin')
+    parser.add_argument('--source', default=CAMERA_SOURCE, help='Camera index or replay path')
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--duration', type=float, default=0, help='Stop after N seconds (0 = until Q)')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("SMART DUSTBIN - MULTI-PROCESS")
+    print("Capture | Inference | UI+Servo in separate processes over shared memory")
+    print("="*80)
+
+    # Servo nodes, angles and dwell come from the routing table; offline nodes run in demo mode
+    router = BinRouter.load(ROUTES_FILE)
+    print(f"\n📡 Bin Routing ({ROUTES_FILE}):")
+    router.describe()
+    nodes_online = router.check_nodes(timeout=3)
+    if nodes_online < len(router.nodes):
+        print(f"⚠️  {len(router.nodes) - nodes_online} node(s) running in DEMO MODE (no servo control)")
+
+    frame_ring = FrameRing(slots=RING_SLOTS, shape=(FRAME_HEIGHT, FRAME_WIDTH, 3), create=True)
+    detection_ring = DetectionRing(create=True)
+
+    ctx = multiprocessing.get_context('spawn')
+    stop_event = ctx.Event()
+    ready_recv, ready_send = ctx.Pipe(duplex=False)
+    inference = ctx.Process(target=inference_process, name='inference',
+                            args=(frame_ring.name, detection_ring.name, ready_send, stop_event), daemon=True)
+    inference.start()
+    print("\n⏳ Loading model in inference process...")
+    while not ready_recv.poll(0.5):
+        if not inference.is_alive():
+            print(f"❌ Inference process exited (code {inference.exitcode}) before the model was ready")
+            frame_ring.close()
+            detection_ring.close()
+            router.close()
+            exit(1)
+    # Model class names come from the inference process so this one never imports torch
+    names = ready_recv.recv()
+    # Detector classes that have a bin (colours come from the routing table)
+    ROUTED_CLASSES = [name for name in names.values() if name in router]
+    BIN_COLORS = {name: router[name].color for name in ROUTED_CLASSES}
+    capture = ctx.Process(target=capture_process, name='capture',
+                          args=(frame_ring.name, args.source, stop_event), daemon=True)
+    capture.start()
+    print("✓ Capture and inference processes running\n")
+
+    # Servo control path: trigger gate, node pool dispatch and stats (servo_control.py)
+    servo = ServoController(router, ROUTED_CLASSES, SERVO_OPERATION_TIME, COOLDOWN_TIME)
+    stats = servo.stats
+    servo_state = servo.state
+
+    # Per-hop latency samples (ms)
+    hops = {'capture → inference': [], 'inference': [], 'inference → UI': [], 'end-to-end': []}
+    last_seq = -1
+    session_start = time.time()
+
+    while not stop_event.is_set():
+        if args.duration and time.time() - session_start > args.duration:
+            break
+        record = detection_ring.latest(newer_than=last_seq)
+        if record is None:
+            time.sleep(POLL_INTERVAL)
+            # A killed worker (OOM, SIGKILL) never reaches its finally to set stop_event
+            dead = next((p for p in (inference, capture) if not p.is_alive()), None)
+            if dead is not None:
+                print(f"\n❌ {dead.name.title()} process exited (code {dead.exitcode}) - stopping")
+                break
+            if not args.headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+        ui_time = time.perf_counter()
+        last_seq = int(record['seq'])
+        hops['capture → inference'].append((record['pickup_time'] - record['capture_time']) * 1000)
+        hops['inference'].append((record['done_time'] - record['pickup_time']) * 1000)
+        hops['inference → UI'].append((ui_time - record['done_time']) * 1000)
+        hops['end-to-end'].append((ui_time - record['capture_time']) * 1000)
+
+        servo.update()
+
+        # Same size filter and best pick as smart_dustbin_smooth.py (decision_logic.py)
+        n = int(record['count'])
+        detections = filter_detections(record['classes'][:n], record['confidences'][:n], record['boxes'][:n],
+                                       names, ROUTED_CLASSES, (FRAME_HEIGHT, FRAME_WIDTH), MIN_SIZE, MAX_SIZE)
+        best_detection = select_best(detections)
+        if best_detection and not servo_state['active']:
+            class_name, item = best_detection
+            route = router[class_name]
+            print(f"\n{route.emoji} {class_name.upper()} DETECTED ({item['conf']:.0%}) → Triggering {route.label}...")
+            with servo.lock:
+                stats[class_name]['confidences'].append(item['conf'])
+            servo.trigger(class_name)
+
+        if args.headless:
+            continue
+
+        view = frame_ring.get(last_seq)
+        if view is None:
+            continue
+        frame = view.copy()
+        # Capture may have lapped the ring while we copied
+        if not frame_ring.is_current(last_seq):
+            continue
+        for class_name, items in detections.items():
+            color = BIN_COLORS[class_name]
+            for item in items:
+                x1, y1, x2, y2 = item['box']
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+                cv2.putText(frame, f"{class_name.upper()}: {item['conf']:.0%}", (x1 + 5, y1 - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        cv2.putText(frame, f"MULTI-PROCESS | {servo_state['message'] or 'READY'}", (15, 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.imshow('Smart Dustbin - Multi-Process', frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    # Cleanup
+    stop_event.set()
+    capture.join(timeout=5)
+    inference.join(timeout=5)
+    cv2.destroyAllWindows()
+    frame_ring.close()
+    detection_ring.close()
+    router.close()
+
+    session_duration = time.time() - session_start
+    print(f"\n{'='*80}")
+    print("⏱️  PER-HOP LATENCY (ms)")
+    print("="*80)
+    print(f"{'Hop':<25} {'p50':<10} {'p90':<10} {'p99':<10} {'Max':<10} {'Samples':<10}")
+    print("-"*80)
+    for hop, samples in hops.items():
+        if samples:
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+            print(f"{hop:<25} {p50:<10.1f} {p90:<10.1f} {p99:<10.1f} {max(samples):<10.1f} {len(samples):<10}")
+    print("="*80)
+    if session_duration > 0:
+        print(f"{'Detection records/s':<25} {len(hops['inference']) / session_duration:.1f}")
+    for class_name, s in stats.items():
+        print(f"{class_name:<25} detections={s['count']} success={s['success']} failed={s['failed']}")
+    print("="*80)
@@ -2,107 +2,169 @@
 Smart Dustbin - Smooth Experience Version
 Camera feed never freezes - predictions shown as overlays
 """
-from ultralytics import YOLO
+from frame_sources import CameraCapture
+from chute_roi import ChuteROI, ROI_FILE
+from power_modes import PowerScheduler
+from clip_recorder import ClipRecorder
+from detection_stream import DetectionPublisher
+from inference_server import InferenceClient
+from bin_routing import BinRouter, ROUTES_FILE
+from servo_control import ServoController
+from decision_logic import filter_detections, select_best
+from thread_affinity import AffinityManager
+from sampling_profiler import SamplingProfiler
+from review_queue import ReviewSampler, REVIEW_CONF
 import cv2
+import os
+import signal
 import time
-import requests
-import threading
 
 print("="*80)
 print("SMART DUSTBIN - SMOOTH EXPERIENCE")
 print("Non-blocking servo control with live camera feed")
 print("="*80)
 
-# ESP8266 Web Server Configuration
-ESP8266_HOST = "192.168.138.133"
-ESP8266_PORT = 80
-
-# Servo control endpoints with angle parameters
-SERVO1_URL = f"http://{ESP8266_HOST}/servo1"  # Paper (Green bin)
-SERVO2_URL = f"http://{ESP8266_HOST}/servo2"  # Plastic (Blue bin)
-
-# Servo angles (adjust based on your setup)
-# Servo 1 (Paper): Open=0°, Close=180°
-# Servo 2 (Plastic): Open=180°, Close=0°
-SERVO1_OPEN_ANGLE = 0
-SERVO1_CLOSE_ANGLE = 180
-SERVO2_OPEN_ANGLE = 180
-SERVO2_CLOSE_ANGLE = 0
-
-# Wait time for waste to drop
-WASTE_DROP_DELAY = 6  # seconds
-
-print(f"\n📡 ESP8266 Configuration:")
-print(f"  Host: {ESP8266_HOST}")
-print(f"  Port: {ESP8266_PORT}")
-print(f"  Servo 1 URL: {SERVO1_URL}")
-print(f"  Servo 2 URL: {SERVO2_URL}")
-print(f"  Servo 1: Open={SERVO1_OPEN_ANGLE}°, Close={SERVO1_CLOSE_ANGLE}°")
-print(f"  Servo 2: Open={SERVO2_OPEN_ANGLE}°, Close={SERVO2_CLOSE_ANGLE}°")
-print(f"  Waste drop delay: {WASTE_DROP_DELAY}s")
-
-# Test ESP8266 connection
+# Bin routing: class → ESP node → servo → angles → dwell (edit bin_routes.yaml)
+router = BinRouter.load(ROUTES_FILE)
+
+print(f"\n📡 Bin Routing ({ROUTES_FILE}):")
+router.describe()
+
+# Test ESP8266 connections
 print(f"\n{'='*80}")
 print("TESTING ESP8266 CONNECTION...")
 print("="*80)
 
-DEMO_MODE = False
-ESP8266_CONNECTED = False
+nodes_online = router.check_nodes(timeout=3)
+DEMO_MODE = nodes_online == 0
 
-try:
-    print(f"\nTesting connection to http://{ESP8266_HOST}...")
-    response = requests.get(f"http://{ESP8266_HOST}", timeout=3)
-    print(f"✅ Connected! ESP8266 responded: {response.status_code}")
-    ESP8266_CONNECTED = True
-    
-except requests.exceptions.Timeout:
-    print(f"❌ Connection timeout - ESP8266 not responding")
-    print(f"   Make sure ESP8266 is powered on and connected to network")
-    ESP8266_CONNECTED = False
-    
-except requests.exceptions.ConnectionError:
-    print(f"❌ Connection failed - Cannot reach {ESP8266_HOST}")
-    print(f"   Check:")
-    print(f"   1. ESP8266 IP address is correct ({ESP8266_HOST})")
-    print(f"   2. ESP8266 and laptop are on same network")
-    print(f"   3. ESP8266 web server is running")
-    ESP8266_CONNECTED = False
-    
-except Exception as e:
-    print(f"❌ Error: {e}")
-    ESP8266_CONNECTED = False
-
-if not ESP8266_CONNECTED:
-    print(f"\n⚠️  Running in DEMO MODE (no servo control)")
-    print(f"   Commands will be printed but not sent to ESP8266")
-    DEMO_MODE = True
-else:
-    DEMO_MODE = False
+if nodes_online < len(router.nodes):
+    print(f"\n⚠️  {len(router.nodes) - nodes_online} node(s) running in DEMO MODE (no servo control)")
+    print(f"   Commands will be printed but not sent to those ESP8266 boards")
+
+# Thread/core layout for inference, capture and I/O threads ('' = OS defaults),
+# e.g. 'torch=3;opencv=1;inference=1-3;capture=0;io=0' - search with benchmark_affinity.py.
+# Applied before the model loads so torch's workers start on the inference cores
+AFFINITY_LAYOUT = ''
+affinity = AffinityManager(AFFINITY_LAYOUT).apply()
+if AFFINITY_LAYOUT:
+    print(f"\n🧵 Thread layout: {AFFINITY_LAYOUT}")
+    affinity.describe()
 
 # Load model
 print(f"\n{'='*80}")
 print("LOADING DETECTION MODEL...")
 print("="*80)
 
-model = YOLO('runs/train/roboflow_fresh/weights/best.pt')
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
+MODEL_WATCH_DIR = 'models/incoming'  # Drop new .pt files here to hot-swap them
+
+# Use a running inference_server.py instead of loading the model here
+# (its SERVER_ADDRESS, e.g. 'unix:/tmp/dustbin_inference.sock'; reloads then happen in the server)
+INFERENCE_SERVER_ADDRESS = None
 
-print(f"\n✓ Model loaded")
-print(f"  Classes: {model.names}")
+if INFERENCE_SERVER_ADDRESS:
+    client = InferenceClient(INFERENCE_SERVER_ADDRESS)
+    model = None
+    names = client.names
+    print(f"\n✓ Connected to inference server: {INFERENCE_SERVER_ADDRESS} ({client.weights})")
+else:
+    # torch/ultralytics only for the local model - a server client starts without them
+    from ultralytics import YOLO
+    from inference_buffers import LetterboxBuffers, warm_up
+    from model_reloader import ModelReloader
+    client = None
+    model = YOLO(MODEL_PATH)
+    names = model.names
+    print(f"\n✓ Model loaded")
+print(f"  Classes: {names}")
 print(f"  mAP: 88.18%")
 
-# Open webcam
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+# Detector classes that have a bin (colours come from the routing table)
+ROUTED_CLASSES = [name for name in names.values() if name in router]
+BIN_COLORS = {name: router[name].color for name in ROUTED_CLASSES}
+
+# Camera capture settings
+CAMERA_INDEX = 0
+CAMERA_FPS = 30
+CAMERA_BUFFER_SIZE = 1    # Driver-side frame queue (1 = freshest frame)
+DECODE_THREADS = 2        # MJPEG decode pool (0 = decode in driver)
+
+# Open webcam (MJPEG negotiated explicitly, frames grabbed on a background thread)
+cap = CameraCapture(CAMERA_INDEX, 1280, 720, fps=CAMERA_FPS,
+                    buffer_size=CAMERA_BUFFER_SIZE, decode_threads=DECODE_THREADS).open()
 
 print(f"\n✓ Webcam opened")
+print(f"  Format: {cap.negotiated['fourcc']} {cap.negotiated['width']}x{cap.negotiated['height']} "
+      f"@ {cap.negotiated['fps']:.0f} fps | buffer={cap.negotiated['buffer_size']} | decode={cap.negotiated['decode']}")
+
+# Chute ROI - only the bin opening goes to the model (calibrate: python chute_roi.py)
+camera_shape = (cap.negotiated['height'] or 720, cap.negotiated['width'] or 1280, 3)
+roi = None
+if os.path.exists(ROI_FILE):
+    roi = ChuteROI.load(ROI_FILE, camera_shape)
+    print(f"✓ Chute ROI loaded: {roi.x2 - roi.x1}x{roi.y2 - roi.y1} crop ({roi.area_fraction():.0%} of frame)")
+else:
+    print(f"  No {ROI_FILE} - running on the full frame")
+
+# Warm-up with dummy frames of the deployed size + preallocated input buffers,
+# so the first real frame doesn't pay for lazy init and allocator growth
+INFERENCE_IMGSZ = 640
+WARMUP_RUNS = 10
+if model is not None:
+    buffers = LetterboxBuffers(roi.crop_shape if roi else camera_shape, INFERENCE_IMGSZ)
+    warmup_time = warm_up(model, buffers, WARMUP_RUNS)
+    print(f"✓ Model warmed up ({WARMUP_RUNS} runs in {warmup_time:.1f}s, input {tuple(buffers.tensor.shape)})")
+
+# Optional two-stage cascade: a tiny presence classifier decides whether
+# the full detector runs (train it with train_presence_classifier.py)
+CASCADE_ENABLED = False
+gate = None
+if CASCADE_ENABLED:
+    from presence_cascade import PresenceGate, PRESENCE_MODEL_PATH     # Loads ultralytics
+    if os.path.exists(PRESENCE_MODEL_PATH):
+        gate = PresenceGate(PRESENCE_MODEL_PATH).warm_up()
+        print(f"✓ Presence cascade enabled (threshold {gate.threshold:.0%}, hold {gate.hold_frames} frames)")
+    else:
+        print(f"⚠️  Cascade disabled - {PRESENCE_MODEL_PATH} not found")
+
+# Adaptive power modes: IDLE (low fps, motion check only) → ARMED on motion →
+# ACTIVE during and just after a servo cycle (see power_modes.py for rates)
+POWER_MODES_ENABLED = False
+POWER_REPORT_DIR = 'runs/power'
+power = PowerScheduler(cap) if POWER_MODES_ENABLED else None
+if power:
+    print(f"✓ Power modes enabled (wake-up bound {power.wake_bound_ms} ms)")
+
+# Trigger clips: a few seconds before/after each automatic trigger are
+# encoded in a background process (see clip_recorder.py for window and quota)
+CLIP_RECORDING_ENABLED = False
+recorder = ClipRecorder() if CLIP_RECORDING_ENABLED else None
+
+# Detection stream for dashboards/conveyors (None = off), e.g. 'tcp:0.0.0.0:8765'
+# or 'unix:/tmp/dustbin_detections.sock'. Consume with: python detection_stream.py <address>
+DETECTION_STREAM_ADDRESS = None
+stream = DetectionPublisher(DETECTION_STREAM_ADDRESS) if DETECTION_STREAM_ADDRESS else None
+if stream:
+    class_ids = {name: cls for cls, name in names.items()}
+    print(f"✓ Publishing detections on {stream.address}")
+
+# Sampling profiler: P key or `kill -USR1 <pid>` toggles it at runtime; stacks of
+# all threads go to runs/profiles/ as a collapsed-stack flamegraph file at exit
+PROFILER_ENABLED = False        # Start sampling right away
+profiler = SamplingProfiler('smooth')
+profiler_signal = profiler.install_signal()   # False on Windows (no SIGUSR1)
+if PROFILER_ENABLED:
+    profiler.start()
 
 print(f"\n{'='*80}")
 print("CONTROLS:")
 print("  SPACE - Pause/Resume")
 print("  Q     - Quit")
-print("  1     - Test Servo 1 (manual)")
-print("  2     - Test Servo 2 (manual)")
+for i, name in enumerate(ROUTED_CLASSES[:9], 1):
+    print(f"  {i}     - Test {router[name].label} (manual)")
+print("  R     - Reload model weights (also SIGHUP)")
+print(f"  P     - Toggle sampling profiler{' (also SIGUSR1)' if profiler_signal else ''}")
 print("="*80)
 print("\nStarting detection...\n")
 
@@ -111,15 +173,28 @@ CONF_THRESHOLD = 0.60
 MIN_SIZE = 0.03
 MAX_SIZE = 1.0
 
+# Active learning: uncertain frames (low-confidence, disputed, class flips) are
+# saved to review/queue/ - review with review_queue.py, retrain with finetune.py.
+# The model then runs at REVIEW_CONF and the trigger threshold is applied after
+ACTIVE_LEARNING_ENABLED = False
+sampler = ReviewSampler(names, CONF_THRESHOLD) if ACTIVE_LEARNING_ENABLED else None
+detect_conf = REVIEW_CONF if sampler else CONF_THRESHOLD
+if sampler:
+    print(f"🧐 Sampling uncertain detections to {sampler.output_dir}/")
+
 # Timing settings
 SERVO_OPERATION_TIME = 4.0
 COOLDOWN_TIME = 0.5
 
-# Bin colors
-BIN_COLORS = {
-    'paper': (0, 255, 0),         # GREEN
-    'plastic bottle': (255, 0, 0) # BLUE
-}
+# Hot model reload - new weights load/warm in the background and swap between frames
+reloader = None
+if model is not None:
+    reloader = ModelReloader(model, MODEL_PATH, watch_dir=MODEL_WATCH_DIR,
+                             expected_classes=names.values(), conf=CONF_THRESHOLD,
+                             frame_shape=roi.crop_shape if roi else camera_shape).start()
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, stack: reloader.request_reload())
+    print(f"🔄 Watching {MODEL_WATCH_DIR}/ for new weights")
 
 # State management
 paused = False
@@ -128,141 +203,27 @@ fps_time = time.time()
 fps = 0
 session_start_time = time.time()
 
-# Statistics
-stats = {
-    'paper': {'count': 0, 'success': 0, 'failed': 0, 'confidences': [], 'response_times': []},
-    'plastic bottle': {'count': 0, 'success': 0, 'failed': 0, 'confidences': [], 'response_times': []}
-}
-
-# Servo operation state (shared between threads)
-servo_state = {
-    'active': False,
-    'class_name': None,
-    'start_time': 0,
-    'message': '',
-    'countdown': 0
-}
-servo_lock = threading.Lock()
-
-def send_http_request_async(url, class_name):
-    """Send HTTP request in background thread with angle control"""
-    global servo_state
-    
-    # Determine angles based on servo (paper=servo1, plastic=servo2)
-    if class_name == 'paper':
-        open_angle = SERVO1_OPEN_ANGLE
-        close_angle = SERVO1_CLOSE_ANGLE
-        bin_name = "GREEN BIN (Servo 1)"
-    else:  # plastic bottle
-        open_angle = SERVO2_OPEN_ANGLE
-        close_angle = SERVO2_CLOSE_ANGLE
-        bin_name = "BLUE BIN (Servo 2)"
-    
-    if DEMO_MODE:
-        print(f"\n🎬 DEMO MODE: Would send:")
-        print(f"   Open: GET {url}?angle={open_angle}")
-        print(f"   Wait {WASTE_DROP_DELAY} seconds...")
-        print(f"   Close: GET {url}?angle={close_angle}")
-        with servo_lock:
-            stats[class_name]['success'] += 1
-    else:
-        operation_start = time.time()
-        try:
-            # Step 1: Open the bin lid
-            open_url = f"{url}?angle={open_angle}"
-            print(f"\n📤 Opening bin: {open_url}")
-            response = requests.get(open_url, timeout=5)
-            
-            if response.status_code == 200:
-                print(f"✅ Lid opened! (Servo at {open_angle}°)")
-                
-                # Wait for waste to drop
-                print(f"⏳ Waiting for waste to drop ({WASTE_DROP_DELAY}s)...")
-                time.sleep(WASTE_DROP_DELAY)
-                
-                # Step 2: Close the bin lid
-                close_url = f"{url}?angle={close_angle}"
-                print(f"📤 Closing bin: {close_url}")
-                response = requests.get(close_url, timeout=5)
-                
-                if response.status_code == 200:
-                    print(f"✅ Lid closed! (Servo at {close_angle}°)")
-                    operation_time = time.time() - operation_start
-                    with servo_lock:
-                        stats[class_name]['success'] += 1
-                        stats[class_name]['response_times'].append(operation_time)
-                else:
-                    print(f"⚠️  Close failed: {response.status_code}")
-                    with servo_lock:
-                        stats[class_name]['failed'] += 1
-            else:
-                print(f"⚠️  ESP8266 responded with status: {response.status_code}")
-                with servo_lock:
-                    stats[class_name]['failed'] += 1
-                    
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            with servo_lock:
-                stats[class_name]['failed'] += 1
-
-def trigger_servo(class_name):
-    """Trigger servo operation in background"""
-    global servo_state
-    
-    # Check if already processing
-    with servo_lock:
-        if servo_state['active']:
-            print(f"⚠️  Servo already active, skipping...")
-            return
-        
-        # Mark as active
-        servo_state['active'] = True
-        servo_state['class_name'] = class_name
-        servo_state['start_time'] = time.time()
-        stats[class_name]['count'] += 1
-    
-    # Determine URL
-    url = SERVO1_URL if class_name == 'paper' else SERVO2_URL
-    
-    # Send HTTP request in background thread
-    request_thread = threading.Thread(target=send_http_request_async, args=(url, class_name))
-    request_thread.daemon = True
-    request_thread.start()
-    
-    # Update countdown in main loop
-
-def update_servo_state():
-    """Update servo operation state"""
-    global servo_state
-    
-    with servo_lock:
-        if servo_state['active']:
-            elapsed = time.time() - servo_state['start_time']
-            total_time = SERVO_OPERATION_TIME + COOLDOWN_TIME
-            
-            if elapsed < SERVO_OPERATION_TIME:
-                # Servo operating
-                remaining = SERVO_OPERATION_TIME - elapsed
-                servo_state['countdown'] = int(remaining) + 1
-                servo_state['message'] = f"SERVO OPERATING... {servo_state['countdown']}s"
-            elif elapsed < total_time:
-                # Cooldown
-                servo_state['countdown'] = 0
-                servo_state['message'] = "COOLDOWN..."
-            else:
-                # Done
-                servo_state['active'] = False
-                servo_state['message'] = "READY FOR NEXT DETECTION"
-                print(f"✅ Ready for next detection\n")
-                return False
-            return True
-    return False
+# Servo control path: trigger gate, node pool dispatch and stats (servo_control.py)
+servo = ServoController(router, ROUTED_CLASSES, SERVO_OPERATION_TIME, COOLDOWN_TIME,
+                        on_started=power.servo_started if power else None,
+                        on_ready=power.servo_finished if power else None)
+stats = servo.stats
+servo_state = servo.state   # Shared between threads; hold servo_lock when writing
+servo_lock = servo.lock
 
 # Main loop
 while True:
+    # Power modes pace the loop (sleeping, not spinning) in idle/armed
+    if power:
+        power.throttle()
     ret, frame = cap.read()
     if not ret:
         break
+    if recorder:
+        recorder.add(frame)     # Raw frame, before any overlay is drawn
+    
+    # Pin threads started since the last frame (servo workers, reload, ...)
+    affinity.maybe_refresh()
     
     # Calculate FPS
     frame_count += 1
@@ -271,61 +232,83 @@ while True:
         fps_time = time.time()
     
     # Update servo state
-    update_servo_state()
+    servo.update()
+    
+    # Swap in a freshly loaded model between frames
+    if reloader:
+        swap_message = reloader.swap_if_ready()
+        if swap_message:
+            print(swap_message)
+            buffers.bind(reloader.model)
+        model = reloader.model
+        names = model.names
     
     # Run detection (always, even during servo operation)
     if not paused:
-        results = model(frame, conf=CONF_THRESHOLD, verbose=False)
-        boxes = results[0].boxes
+        # Only the chute region goes through the cascade and the detector
+        roi_frame = roi.crop(frame) if roi else frame
+        detector_ran = False
+        if (power is None or power.should_detect(roi_frame)) and (gate is None or gate.should_detect(roi_frame)):
+            detector_ran = True
+            if client:
+                classes, confidences, crop_boxes = client.predict(roi_frame, detect_conf)
+            else:
+                reloader.remember_frame(roi_frame)
+                try:
+                    results = model(buffers.prepare(roi_frame), conf=detect_conf, verbose=False)
+                    reloader.confirm()
+                except Exception as e:
+                    rollback_message = reloader.rollback(e)
+                    if rollback_message is None:
+                        raise
+                    print(rollback_message)
+                    model = reloader.model
+                    buffers.bind(model)
+                    results = model(buffers.prepare(roi_frame), conf=detect_conf, verbose=False)
+                boxes = results[0].boxes
+                classes = boxes.cls.cpu().numpy().astype(int)
+                confidences = boxes.conf.cpu().numpy()
+                crop_boxes = buffers.scale_boxes(boxes.xyxy.cpu().numpy())
+            if sampler:
+                sampler.observe(roi_frame, classes, confidences, crop_boxes,
+                                reloader.weights_path if reloader else client.weights)
+        else:
+            classes, confidences, crop_boxes = [], [], []  # Idle or cascade: nothing in view, skip the detector
         
-        # Process detections
-        detections = {'paper': [], 'plastic bottle': []}
+        # Process detections (size filter + best pick live in decision_logic.py)
+        frame_boxes = roi.to_frame(crop_boxes) if roi and len(crop_boxes) else crop_boxes
+        detections = filter_detections(classes, confidences, frame_boxes, names, ROUTED_CLASSES,
+                                       frame.shape, MIN_SIZE, MAX_SIZE,
+                                       conf_threshold=CONF_THRESHOLD if sampler else None)
+        best_detection = select_best(detections)
         
-        for box in boxes:
-            cls = int(box.cls[0])
-            conf = float(box.conf[0])
-            class_name = model.names[cls]
-            
-            xyxy = box.xyxy[0].cpu().numpy()
-            x1, y1, x2, y2 = map(int, xyxy)
-            
-            # Calculate size
-            width = x2 - x1
-            height = y2 - y1
-            area = width * height
-            frame_area = frame.shape[0] * frame.shape[1]
-            size_ratio = area / frame_area
-            
-            # Size filtering
-            if size_ratio < MIN_SIZE or size_ratio > MAX_SIZE:
-                continue
-            
-            detections[class_name].append({
-                'box': (x1, y1, x2, y2),
-                'conf': conf,
-                'size': size_ratio
-            })
+        if power and detector_ran:
+            power.detection_done(best_detection is not None)
         
-        # Find best detection
-        best_detection = None
-        best_conf = 0
-        
-        for class_name, items in detections.items():
-            for item in items:
-                if item['conf'] > best_conf:
-                    best_conf = item['conf']
-                    best_detection = (class_name, item)
+        # Publish what passed the filters (never blocks; slow subscribers drop records)
+        if stream and detector_ran:
+            published = [(class_ids[name], item) for name, items in detections.items() for item in items]
+            stream.publish([cls for cls, _ in published],
+                           [item['conf'] for _, item in published],
+                           [item['box'] for _, item in published])
         
         # Trigger servo if detection found and not already processing
         if best_detection and not servo_state['active']:
             class_name, item = best_detection
-            emoji = "🟢" if class_name == 'paper' else "🔵"
-            servo_num = "1" if class_name == 'paper' else "2"
-            print(f"\n{emoji} {class_name.upper()} DETECTED → Triggering Servo {servo_num}...")
+            route = router[class_name]
+            print(f"\n{route.emoji} {class_name.upper()} DETECTED → Triggering {route.label}...")
             # Track confidence for evaluation
             with servo_lock:
                 stats[class_name]['confidences'].append(item['conf'])
-            trigger_servo(class_name)
+            servo.trigger(class_name)
+            if recorder:
+                recorder.trigger({
+                    'class_name': class_name,
+                    'confidence': round(float(item['conf']), 4),
+                    'box': [round(float(v), 1) for v in item['box']],
+                    'size_ratio': round(float(item['size']), 4),
+                    'model': reloader.weights_path if reloader else client.weights,
+                })
         
         # Draw detections
         for class_name, items in detections.items():
@@ -345,6 +328,10 @@ while True:
                 cv2.putText(frame, label, (x1 + 5, y1 - 10), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
     
+    # Chute ROI outline
+    if roi:
+        roi.draw(frame)
+    
     # Status overlay (top bar)
     overlay_h = 140
     overlay = frame.copy()
@@ -356,19 +343,20 @@ while True:
                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
     
     # ESP8266 status
-    esp_status = "DEMO MODE" if DEMO_MODE else f"ESP8266: {ESP8266_HOST}"
+    esp_status = "DEMO MODE" if DEMO_MODE else f"ESP8266 nodes: {nodes_online}/{len(router.nodes)} online"
     status_color = (0, 165, 255) if DEMO_MODE else (0, 255, 0)
     cv2.putText(frame, esp_status, (15, 70),
                cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
     
     # Stats
-    total_paper = stats['paper']['count']
-    total_plastic = stats['plastic bottle']['count']
-    cv2.putText(frame, f"Paper: {total_paper} | Plastic: {total_plastic}", (15, 105),
+    counts_text = " | ".join(f"{router[name].name.title()}: {stats[name]['count']}" for name in ROUTED_CLASSES)
+    cv2.putText(frame, counts_text, (15, 105),
                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
     
     # FPS and State
     state_text = "PAUSED" if paused else servo_state.get('message', 'READY')
+    if power:
+        state_text = f"{power.mode.upper()} | {state_text}"
     if servo_state['active']:
         state_color = (0, 255, 255)  # Yellow when processing
     elif paused:
@@ -401,12 +389,11 @@ while True:
         
         # Prediction text
         prediction_text = class_name.upper()
-        servo_num = "1 (GREEN)" if class_name == 'paper' else "2 (BLUE)"
         
         cv2.putText(frame, prediction_text, (x1 + 50, y1 + 70),
                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, border_color, 3)
         
-        cv2.putText(frame, f"Servo {servo_num} Activated", (x1 + 50, y1 + 120),
+        cv2.putText(frame, f"{router[class_name].label} Activated", (x1 + 50, y1 + 120),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
         
         # Countdown
@@ -425,16 +412,36 @@ while True:
     elif key == ord(' '):
         paused = not paused
         print(f"{'⏸️  Paused' if paused else '▶️  Resumed'}")
-    elif key == ord('1'):
+    elif ord('1') <= key < ord('1') + len(ROUTED_CLASSES):
+        class_name = ROUTED_CLASSES[key - ord('1')]
         if not servo_state['active']:
-            print(f"\n🧪 MANUAL TEST: Servo 1 (Paper)")
-            trigger_servo('paper')
-    elif key == ord('2'):
-        if not servo_state['active']:
-            print(f"\n🧪 MANUAL TEST: Servo 2 (Plastic)")
-            trigger_servo('plastic bottle')
+            print(f"\n🧪 MANUAL TEST: {router[class_name].label}")
+            servo.trigger(class_name)
+    elif key == ord('r'):
+        print(f"\n🔄 Reloading {MODEL_PATH} in background...")
+        if reloader:
+            reloader.request_reload(MODEL_PATH)
+        else:
+            client.reload(MODEL_PATH)
+    elif key == ord('p'):
+        print(f"\n🔥 Profiler {'ON' if profiler.toggle() else 'OFF'} ({profiler.samples} samples so far)")
 
 # Cleanup
+if reloader:
+    reloader.stop()
+if client:
+    client.close()
+router.close()
+if recorder:
+    recorder.close()
+if sampler:
+    sampler.close()
+if stream:
+    stream_stats = stream.stats()
+    stream.close()
+profile_overhead = profiler.overhead()
+profile_path = profiler.write()
+capture_stats = cap.stats()
 cap.release()
 cv2.destroyAllWindows()
 
@@ -456,14 +463,73 @@ print(f"{'Duration':<30} {session_duration:.1f}s ({session_duration/60:.1f} min)
 print(f"{'Total Frames Processed':<30} {frame_count}")
 if session_duration > 0:
     print(f"{'Average FPS':<30} {frame_count/session_duration:.1f}")
+if reloader:
+    print(f"{'Model Swaps / Rollbacks':<30} {reloader.swap_count} / {reloader.rollback_count}")
+print(f"{'Capture Latency p50/p99':<30} {capture_stats['p50_ms']:.1f} / {capture_stats['p99_ms']:.1f} ms")
+print(f"{'Camera FPS / Dropped Frames':<30} {capture_stats['fps']:.1f} / {capture_stats['dropped']}")
+if gate is not None:
+    gate_stats = gate.stats()
+    print(f"{'Cascade Pass Rate':<30} {gate_stats['pass_rate']:.1%} ({gate_stats['passed']}/{gate_stats['frames']})")
+    print(f"{'Cascade Gate Time':<30} {gate_stats['avg_gate_ms']:.2f} ms/frame")
+if stream:
+    print(f"{'Stream Records / Dropped':<30} {stream_stats['records']} / {stream_stats['dropped']} "
+          f"({stream_stats['subscribers']} subscribers at exit)")
+if recorder:
+    print(f"{'Clips Queued / Dropped':<30} {recorder.clips_queued} / {recorder.clips_dropped}")
+if sampler:
+    print(f"{'Review Samples Saved':<30} {sum(sampler.saved.values())} of {sum(sampler.candidates.values())} candidates "
+          f"({', '.join(f'{reason} {count}' for reason, count in sampler.saved.items()) or 'none'})")
+if affinity.pinning:
+    print(f"{'Thread Layout':<30} {AFFINITY_LAYOUT} ({len(affinity.pinned)} threads pinned)")
+print(f"{'Final Model':<30} {reloader.weights_path if reloader else 'inference server: ' + client.weights}")
 print("="*80)
 
+# Power mode report (time and CPU per mode, wake-up latency)
+if power:
+    power_path = os.path.join(POWER_REPORT_DIR, f"power_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    power_summary = power.export(power_path)
+    print(f"\n{'='*80}")
+    print("🔋 POWER MODES")
+    print("="*80)
+    print(f"{'Mode':<15} {'Time':<15} {'Share':<10} {'CPU Time':<15} {'CPU Load':<12} {'Detector Runs':<15}")
+    print("-"*80)
+    for mode, m in power_summary['modes'].items():
+        wall_text = f"{m['wall_s']:.1f}s"
+        share_text = f"{m['share']:.1%}"
+        cpu_text = f"{m['cpu_s']:.1f}s"
+        load_text = f"{m['cpu_load']:.2f} cores"
+        print(f"{mode.upper():<15} {wall_text:<15} {share_text:<10} {cpu_text:<15} {load_text:<12} {m['detector_frames']:<15}")
+    wake = power_summary['wake_latency_ms']
+    print("-"*80)
+    if wake['count']:
+        print(f"{'Wake-up latency':<30} p50 {wake['p50']:.0f} ms | p99 {wake['p99']:.0f} ms | max {wake['max']:.0f} ms "
+              f"(bound {wake['bound']} ms, {wake['violations']} violations)")
+    print(f"{'Report':<30} {power_path}")
+
+# Sampling profile (self time per thread, full stacks in the .folded file)
+if profile_path:
+    print(f"\n{'='*80}")
+    print("🔥 PROFILE (top self time)")
+    print("="*80)
+    print(f"{'Thread':<20} {'Share':<10} {'Frame':<50}")
+    print("-"*80)
+    for thread_name, frame_label, share in profiler.top(10):
+        print(f"{thread_name[:19]:<20} {f'{share:.1%}':<10} {frame_label[:50]:<50}")
+    print("-"*80)
+    print(f"{'Samples / Overhead':<30} {profiler.samples} / {profile_overhead:.2%}")
+    print(f"{'Flamegraph':<30} {profile_path}")
+    print("="*80)
+
 # Calculate metrics for each class
-total_detections = stats['paper']['count'] + stats['plastic bottle']['count']
-total_success = stats['paper']['success'] + stats['plastic bottle']['success']
-total_failed = stats['paper']['failed'] + stats['plastic bottle']['failed']
+total_detections = sum(stats[name]['count'] for name in ROUTED_CLASSES)
+total_success = sum(stats[name]['success'] for name in ROUTED_CLASSES)
+total_failed = sum(stats[name]['failed'] for name in ROUTED_CLASSES)
 total_operations = total_success + total_failed
 
+def class_label(name):
+    route = router[name]
+    return f"{route.emoji} {route.name.title()}"
+
 # Detection Statistics Table
 print(f"\n{'='*80}")
 print("🎯 DETECTION STATISTICS")
@@ -471,13 +537,11 @@ print("="*80)
 print(f"{'Class':<15} {'Detections':<15} {'Success':<15} {'Failed':<15} {'Rate':<15}")
 print("-"*80)
 
-# Paper row
-paper_rate = f"{(stats['paper']['success'] / (stats['paper']['success'] + stats['paper']['failed']) * 100):.1f}%" if (stats['paper']['success'] + stats['paper']['failed']) > 0 else "N/A"
-print(f"{'🟢 Paper':<15} {stats['paper']['count']:<15} {stats['paper']['success']:<15} {stats['paper']['failed']:<15} {paper_rate:<15}")
-
-# Plastic row
-plastic_rate = f"{(stats['plastic bottle']['success'] / (stats['plastic bottle']['success'] + stats['plastic bottle']['failed']) * 100):.1f}%" if (stats['plastic bottle']['success'] + stats['plastic bottle']['failed']) > 0 else "N/A"
-print(f"{'🔵 Plastic':<15} {stats['plastic bottle']['count']:<15} {stats['plastic bottle']['success']:<15} {stats['plastic bottle']['failed']:<15} {plastic_rate:<15}")
+for name in ROUTED_CLASSES:
+    row = stats[name]
+    attempts = row['success'] + row['failed']
+    rate = f"{(row['success'] / attempts * 100):.1f}%" if attempts > 0 else "N/A"
+    print(f"{class_label(name):<15} {row['count']:<15} {row['success']:<15} {row['failed']:<15} {rate:<15}")
 
 # Total row
 total_rate = f"{(total_success / total_operations * 100):.1f}%" if total_operations > 0 else "N/A"
@@ -492,28 +556,16 @@ print("="*80)
 print(f"{'Class':<15} {'Average':<15} {'Minimum':<15} {'Maximum':<15} {'Count':<15}")
 print("-"*80)
 
-# Paper confidence
-if stats['paper']['confidences']:
-    paper_avg = sum(stats['paper']['confidences']) / len(stats['paper']['confidences'])
-    paper_min = min(stats['paper']['confidences'])
-    paper_max = max(stats['paper']['confidences'])
-    paper_cnt = len(stats['paper']['confidences'])
-    print(f"{'🟢 Paper':<15} {f'{paper_avg:.1%}':<15} {f'{paper_min:.1%}':<15} {f'{paper_max:.1%}':<15} {paper_cnt:<15}")
-else:
-    print(f"{'🟢 Paper':<15} {'N/A':<15} {'N/A':<15} {'N/A':<15} {'0':<15}")
-
-# Plastic confidence
-if stats['plastic bottle']['confidences']:
-    plastic_avg = sum(stats['plastic bottle']['confidences']) / len(stats['plastic bottle']['confidences'])
-    plastic_min = min(stats['plastic bottle']['confidences'])
-    plastic_max = max(stats['plastic bottle']['confidences'])
-    plastic_cnt = len(stats['plastic bottle']['confidences'])
-    print(f"{'🔵 Plastic':<15} {f'{plastic_avg:.1%}':<15} {f'{plastic_min:.1%}':<15} {f'{plastic_max:.1%}':<15} {plastic_cnt:<15}")
-else:
-    print(f"{'🔵 Plastic':<15} {'N/A':<15} {'N/A':<15} {'N/A':<15} {'0':<15}")
+for name in ROUTED_CLASSES:
+    values = stats[name]['confidences']
+    if values:
+        avg, low, high = sum(values) / len(values), min(values), max(values)
+        print(f"{class_label(name):<15} {f'{avg:.1%}':<15} {f'{low:.1%}':<15} {f'{high:.1%}':<15} {len(values):<15}")
+    else:
+        print(f"{class_label(name):<15} {'N/A':<15} {'N/A':<15} {'N/A':<15} {'0':<15}")
 
 # Overall confidence
-all_confidences = stats['paper']['confidences'] + stats['plastic bottle']['confidences']
+all_confidences = [c for name in ROUTED_CLASSES for c in stats[name]['confidences']]
 if all_confidences:
     overall_avg = sum(all_confidences) / len(all_confidences)
     overall_min = min(all_confidences)
@@ -531,28 +583,16 @@ print("="*80)
 print(f"{'Class':<15} {'Average':<15} {'Minimum':<15} {'Maximum':<15} {'Count':<15}")
 print("-"*80)
 
-# Paper response time
-if stats['paper']['response_times']:
-    paper_avg_rt = sum(stats['paper']['response_times']) / len(stats['paper']['response_times'])
-    paper_min_rt = min(stats['paper']['response_times'])
-    paper_max_rt = max(stats['paper']['response_times'])
-    paper_cnt_rt = len(stats['paper']['response_times'])
-    print(f"{'🟢 Paper':<15} {f'{paper_avg_rt:.2f}s':<15} {f'{paper_min_rt:.2f}s':<15} {f'{paper_max_rt:.2f}s':<15} {paper_cnt_rt:<15}")
-else:
-    print(f"{'🟢 Paper':<15} {'N/A':<15} {'N/A':<15} {'N/A':<15} {'0':<15}")
-
-# Plastic response time
-if stats['plastic bottle']['response_times']:
-    plastic_avg_rt = sum(stats['plastic bottle']['response_times']) / len(stats['plastic bottle']['response_times'])
-    plastic_min_rt = min(stats['plastic bottle']['response_times'])
-    plastic_max_rt = max(stats['plastic bottle']['response_times'])
-    plastic_cnt_rt = len(stats['plastic bottle']['response_times'])
-    print(f"{'🔵 Plastic':<15} {f'{plastic_avg_rt:.2f}s':<15} {f'{plastic_min_rt:.2f}s':<15} {f'{plastic_max_rt:.2f}s':<15} {plastic_cnt_rt:<15}")
-else:
-    print(f"{'🔵 Plastic':<15} {'N/A':<15} {'N/A':<15} {'N/A':<15} {'0':<15}")
+for name in ROUTED_CLASSES:
+    values = stats[name]['response_times']
+    if values:
+        avg, low, high = sum(values) / len(values), min(values), max(values)
+        print(f"{class_label(name):<15} {f'{avg:.2f}s':<15} {f'{low:.2f}s':<15} {f'{high:.2f}s':<15} {len(values):<15}")
+    else:
+        print(f"{class_label(name):<15} {'N/A':<15} {'N/A':<15} {'N/A':<15} {'0':<15}")
 
 # Overall response time
-all_response_times = stats['paper']['response_times'] + stats['plastic bottle']['response_times']
+all_response_times = [t for name in ROUTED_CLASSES for t in stats[name]['response_times']]
 if all_response_times:
     overall_avg_rt = sum(all_response_times) / len(all_response_times)
     overall_min_rt = min(all_response_times)
@@ -2,9 +2,12 @@
 Smart Dustbin - Voice Control Version
 Control bin by voice commands: "plastic" or "paper"
 """
+from bin_routing import BinRouter, ROUTES_FILE
+from sampling_profiler import SamplingProfiler
+from voice_matcher import VoiceMatcher, hypotheses_from_google
 import speech_recognition as sr
 import pyttsx3
-import requests
+import sys
 import threading
 import time
 
@@ -13,61 +16,28 @@ print("SMART DUSTBIN - VOICE CONTROL")
 print("Say 'plastic' or 'paper' to open the corresponding bin")
 print("="*80)
 
-# ESP8266 Web Server Configuration
-ESP8266_HOST = "192.168.138.133"
-ESP8266_PORT = 80
+# Bin routing: voice keyword → ESP node → servo → angles → dwell (edit bin_routes.yaml)
+router = BinRouter.load(ROUTES_FILE)
 
-# Servo control endpoints
-SERVO1_URL = f"http://{ESP8266_HOST}/servo1"  # Paper (Green bin)
-SERVO2_URL = f"http://{ESP8266_HOST}/servo2"  # Plastic (Blue bin)
+print(f"\n📡 Bin Routing ({ROUTES_FILE}):")
+router.describe()
 
-# Servo angles
-SERVO1_OPEN_ANGLE = 0
-SERVO1_CLOSE_ANGLE = 180
-SERVO2_OPEN_ANGLE = 180
-SERVO2_CLOSE_ANGLE = 0
-
-# Wait time for waste to drop
-WASTE_DROP_DELAY = 6  # seconds
-
-print(f"\n📡 ESP8266 Configuration:")
-print(f"  Host: {ESP8266_HOST}")
-print(f"  Servo 1 (Paper): Open={SERVO1_OPEN_ANGLE}°, Close={SERVO1_CLOSE_ANGLE}°")
-print(f"  Servo 2 (Plastic): Open={SERVO2_OPEN_ANGLE}°, Close={SERVO2_CLOSE_ANGLE}°")
-print(f"  Waste drop delay: {WASTE_DROP_DELAY}s")
-
-# Test ESP8266 connection
+# Test ESP8266 connections
 print(f"\n{'='*80}")
 print("TESTING ESP8266 CONNECTION...")
 print("="*80)
 
-DEMO_MODE = False
-ESP8266_CONNECTED = False
+nodes_online = router.check_nodes(timeout=3)
+DEMO_MODE = nodes_online == 0
 
-try:
-    print(f"\nTesting connection to http://{ESP8266_HOST}...")
-    response = requests.get(f"http://{ESP8266_HOST}", timeout=3)
-    print(f"✅ Connected! ESP8266 responded: {response.status_code}")
-    ESP8266_CONNECTED = True
-    
-except requests.exceptions.Timeout:
-    print(f"❌ Connection timeout - ESP8266 not responding")
-    ESP8266_CONNECTED = False
-    
-except requests.exceptions.ConnectionError:
-    print(f"❌ Connection failed - Cannot reach {ESP8266_HOST}")
-    ESP8266_CONNECTED = False
-    
-except Exception as e:
-    print(f"❌ Error: {e}")
-    ESP8266_CONNECTED = False
+if nodes_online < len(router.nodes):
+    print(f"\n⚠️  {len(router.nodes) - nodes_online} node(s) running in DEMO MODE (no servo control)")
+    print(f"   Commands will be printed but not sent to those ESP8266 boards")
 
-if not ESP8266_CONNECTED:
-    print(f"\n⚠️  Running in DEMO MODE (no servo control)")
-    print(f"   Commands will be printed but not sent to ESP8266")
-    DEMO_MODE = True
-else:
-    DEMO_MODE = False
+# Voice vocabulary: route names, detector classes and `voice:` synonyms, matched
+# fuzzily (spelling + sound) over all of Google's alternatives
+matcher = VoiceMatcher.from_router(router)
+print(f"\n🗣️  Vocabulary: {len(matcher.phrases)} phrases (accept ≥ {matcher.accept:.2f}, margin {matcher.margin:.2f})")
 
 # Initialize speech recognition
 recognizer = sr.Recognizer()
@@ -78,10 +48,7 @@ engine = pyttsx3.init()
 engine.setProperty('rate', 150)  # Speed of speech
 
 # Statistics
-stats = {
-    'paper': {'count': 0, 'success': 0, 'failed': 0},
-    'plastic': {'count': 0, 'success': 0, 'failed': 0}
-}
+stats = {route.name: {'count': 0, 'success': 0, 'failed': 0} for route in router.routes}
 
 # Servo state
 servo_lock = threading.Lock()
@@ -93,10 +60,25 @@ servo_state = {
     'message': 'READY'
 }
 
-# Timing constants
-SERVO_OPERATION_TIME = WASTE_DROP_DELAY  # Time for waste to drop
+# Timing constants (lid dwell time is per route in bin_routes.yaml)
 COOLDOWN_TIME = 2  # Cooldown after operation
 
+# Sampling profiler: typing P + Enter (or `kill -USR1 <pid>` where signals exist,
+# not on Windows) toggles it; a flamegraph file is written on exit
+PROFILER_ENABLED = False
+profiler = SamplingProfiler('voice')
+profiler_signal = profiler.install_signal()
+if PROFILER_ENABLED:
+    profiler.start()
+
+def profiler_keyboard_toggle():
+    """Console toggle that works on every OS (the main thread is busy listening)"""
+    for line in sys.stdin:
+        if line.strip().lower() == 'p':
+            print(f"\n🔥 Profiler {'ON' if profiler.toggle() else 'OFF'} ({profiler.samples} samples so far)")
+
+threading.Thread(target=profiler_keyboard_toggle, name='profiler-toggle', daemon=True).start()
+
 def speak(text):
     """Text-to-speech output"""
     print(f"🔊 {text}")
@@ -106,76 +88,31 @@ def speak(text):
     except:
         pass  # Ignore TTS errors
 
-def control_servo(url, open_angle, close_angle, class_name):
-    """Control servo: open, wait, close"""
-    try:
-        # Open servo
-        open_url = f"{url}?angle={open_angle}"
-        if not DEMO_MODE:
-            response = requests.get(open_url, timeout=2)
-            if response.status_code == 200:
-                print(f"✅ {class_name.upper()} bin opened ({open_angle}°)")
-                speak(f"{class_name} bin opened")
-            else:
-                print(f"❌ Failed to open {class_name} bin")
-                return False
-        else:
-            print(f"[DEMO] Would open {class_name} bin to {open_angle}°")
-            speak(f"{class_name} bin opened")
-        
-        # Wait for waste to drop
-        print(f"⏳ Waiting {WASTE_DROP_DELAY}s for waste to drop...")
-        time.sleep(WASTE_DROP_DELAY)
-        
-        # Close servo
-        close_url = f"{url}?angle={close_angle}"
-        if not DEMO_MODE:
-            response = requests.get(close_url, timeout=2)
-            if response.status_code == 200:
-                print(f"✅ {class_name.upper()} bin closed ({close_angle}°)")
-                speak(f"{class_name} bin closed")
-            else:
-                print(f"❌ Failed to close {class_name} bin")
-                return False
-        else:
-            print(f"[DEMO] Would close {class_name} bin to {close_angle}°")
-            speak(f"{class_name} bin closed")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Servo control error: {e}")
-        return False
+def announce(event, route):
+    """Spoken feedback as the lid moves"""
+    speak(f"{route.name} bin {event}")
 
-def send_servo_command_async(url, open_angle, close_angle, class_name):
-    """Send servo commands in background thread"""
+def servo_command_done(route, success, operation_time, message):
+    """Runs on the node's worker thread once the open/dwell/close cycle ends"""
     global servo_state
     
-    try:
-        success = control_servo(url, open_angle, close_angle, class_name)
-        
-        with servo_lock:
-            if success:
-                stats[class_name]['success'] += 1
-                servo_state['message'] = f"{class_name.upper()} bin operation complete"
-            else:
-                stats[class_name]['failed'] += 1
-                servo_state['message'] = f"{class_name.upper()} bin operation failed"
-                
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        with servo_lock:
-            stats[class_name]['failed'] += 1
+    with servo_lock:
+        if success:
+            stats[route.name]['success'] += 1
+            servo_state['message'] = f"{route.name.upper()} bin operation complete"
+        else:
+            print(f"❌ {route.label}: {message}")
+            stats[route.name]['failed'] += 1
+            servo_state['message'] = f"{route.name.upper()} bin operation failed"
     
-    finally:
-        # Cooldown
-        time.sleep(COOLDOWN_TIME)
-        with servo_lock:
-            servo_state['active'] = False
-            servo_state['message'] = 'READY FOR NEXT COMMAND'
-        print(f"✅ Ready for next command\n")
+    # Cooldown
+    time.sleep(COOLDOWN_TIME)
+    with servo_lock:
+        servo_state['active'] = False
+        servo_state['message'] = 'READY FOR NEXT COMMAND'
+    print(f"✅ Ready for next command\n")
 
-def trigger_bin(class_name):
+def trigger_bin(bin_name):
     """Trigger bin operation in background"""
     global servo_state
     
@@ -188,32 +125,17 @@ def trigger_bin(class_name):
         
         # Mark as active
         servo_state['active'] = True
-        servo_state['class_name'] = class_name
+        servo_state['class_name'] = bin_name
         servo_state['start_time'] = time.time()
-        stats[class_name]['count'] += 1
+        stats[bin_name]['count'] += 1
     
-    # Determine servo parameters
-    if class_name == 'paper':
-        url = SERVO1_URL
-        open_angle = SERVO1_OPEN_ANGLE
-        close_angle = SERVO1_CLOSE_ANGLE
-    else:  # plastic
-        url = SERVO2_URL
-        open_angle = SERVO2_OPEN_ANGLE
-        close_angle = SERVO2_CLOSE_ANGLE
-    
-    # Send command in background thread
-    thread = threading.Thread(
-        target=send_servo_command_async,
-        args=(url, open_angle, close_angle, class_name)
-    )
-    thread.daemon = True
-    thread.start()
+    # Run the cycle on the route's ESP node pool
+    router.dispatch(bin_name, on_done=servo_command_done, on_event=announce)
 
 def listen_for_command():
-    """Listen for voice command and return recognized text"""
+    """Listen for voice command and return the recognizer's N-best hypotheses"""
     with microphone as source:
-        print("\n🎤 Listening... (say 'plastic' or 'paper')")
+        print(f"\n🎤 Listening... (say {' or '.join(repr(r.name) for r in router.routes)})")
         
         # Adjust for ambient noise
         recognizer.adjust_for_ambient_noise(source, duration=0.5)
@@ -221,16 +143,9 @@ def listen_for_command():
         try:
             audio = recognizer.listen(source, timeout=5, phrase_time_limit=3)
             
-            # Recognize speech using Google Speech Recognition
-            text = recognizer.recognize_google(audio).lower()
-            
-            # Only return if valid command detected
-            if 'plastic' in text or 'paper' in text:
-                print(f"📝 Detected: '{text}'")
-                return text
-            else:
-                # Invalid command - stay quiet and continue listening
-                return None
+            # Recognize speech using Google Speech Recognition (all alternatives)
+            hypotheses = hypotheses_from_google(recognizer.recognize_google(audio, show_all=True))
+            return hypotheses or None
             
         except sr.WaitTimeoutError:
             # No speech detected - stay quiet and continue listening
@@ -244,43 +159,45 @@ def listen_for_command():
             print(f"❌ Speech recognition error: {e}")
             return None
 
-def process_command(text):
-    """Process voice command and trigger appropriate bin"""
-    if not text:
+def process_command(hypotheses):
+    """Match the hypotheses against the vocabulary and trigger the bin"""
+    if not hypotheses:
         return
     
-    # Check for keywords (text already validated in listen_for_command)
-    if 'plastic' in text:
-        print(f"\n{'='*80}")
-        print("🗑️  PLASTIC DETECTED")
-        print("="*80)
-        trigger_bin('plastic')
-        
-    elif 'paper' in text:
-        print(f"\n{'='*80}")
-        print("📄 PAPER DETECTED")
-        print("="*80)
-        trigger_bin('paper')
+    match = matcher.match(hypotheses)
+    if match is None:
+        # Not a command (or too close between bins) - stay quiet and continue listening
+        return
+    
+    route = router[match.bin]
+    print(f"📝 Detected: '{match.text}' → '{match.phrase}' (score {match.score:.2f})")
+    print(f"\n{'='*80}")
+    print(f"{route.emoji}  {route.name.upper()} DETECTED")
+    print("="*80)
+    trigger_bin(route.name)
 
 # Main loop
 print(f"\n{'='*80}")
 print("🎙️  VOICE CONTROL ACTIVE")
 print("="*80)
 print("\nCommands:")
-print("  - Say 'plastic' to open plastic bin")
-print("  - Say 'paper' to open paper bin")
+for route in router.routes:
+    print(f"  - Say '{route.name}' to open {route.name} bin ({route.label})")
 print("  - Press Ctrl+C to exit")
+print("  - Type P + Enter to toggle the sampling profiler")
+if profiler_signal:
+    print("  - kill -USR1 <pid> also toggles it")
 print()
 
-speak("Voice control ready. Say plastic or paper to open bin.")
+speak(f"Voice control ready. Say {' or '.join(r.name for r in router.routes)} to open bin.")
 
 try:
     while True:
         # Listen for command
-        command_text = listen_for_command()
+        hypotheses = listen_for_command()
         
         # Process command
-        process_command(command_text)
+        process_command(hypotheses)
         
         # Small delay before next listen
         time.sleep(0.5)
@@ -291,7 +208,7 @@ except KeyboardInterrupt:
     print("="*80)
     
     print("\n📊 Session Statistics:")
-    for class_name in ['paper', 'plastic']:
+    for class_name in stats:
         total = stats[class_name]['count']
         success = stats[class_name]['success']
         failed = stats[class_name]['failed']
@@ -300,5 +217,13 @@ except KeyboardInterrupt:
         print(f"  Successful: {success}")
         print(f"  Failed: {failed}")
     
+    profile_overhead = profiler.overhead()
+    profile_path = profiler.write()
+    if profile_path:
+        print(f"\n🔥 Profile: {profiler.samples} samples, {profile_overhead:.2%} overhead → {profile_path}")
+        for thread_name, frame_label, share in profiler.top(5):
+            print(f"  {share:>6.1%}  {thread_name}: {frame_label}")
+    
+    router.close()
     speak("Goodbye")
     print("\n✅ Voice control stopped")
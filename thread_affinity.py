@@ -0,0 +1,191 @@
+"""
+Thread and Core Affinity
+Sets torch/OpenCV pool sizes and pins the inference, capture and I/O threads
+to chosen cores, so a servo cycle's HTTP threads and the camera decode pool
+don't preempt the model on small boards. Layouts are short spec strings:
+
+    torch=3;opencv=1;inference=1-3;capture=0;io=0
+
+Anything left out keeps the library/OS default. Per-thread pinning needs
+Linux (sched_setaffinity on thread ids); elsewhere only pool sizes apply.
+Search layouts for a board with: python benchmark_affinity.py
+"""
+from collections import namedtuple
+import os
+import threading
+
+ROLES = ('inference', 'capture', 'io')
+
+# Python thread name prefixes → role (see the thread_name_prefix/name used
+# in frame_sources.py, bin_routing.py, clip_recorder.py, model_reloader.py)
+ROLE_THREADS = {
+    'inference': ('MainThread',),
+    'capture': ('camera-grab', 'jpeg-decode'),
+    'io': ('node-', 'clip-feeder', 'model-reload'),
+}
+# Native threads Python doesn't know about are the torch/OpenCV compute pools
+NATIVE_ROLE = 'inference'
+UNKNOWN_ROLE = 'io'
+
+Layout = namedtuple('Layout', 'torch_threads opencv_threads inference capture io')
+DEFAULT_LAYOUT = Layout(None, None, None, None, None)
+
+SPEC_KEYS = {'torch': 'torch_threads', 'opencv': 'opencv_threads',
+             'inference': 'inference', 'capture': 'capture', 'io': 'io'}
+
+
+def parse_cores(text):
+    """'0,2-3' → (0, 2, 3)"""
+    cores = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cores.update(range(int(first), int(last) + 1))
+        else:
+            cores.add(int(part))
+    return tuple(sorted(cores))
+
+
+def format_cores(cores):
+    """(0, 2, 3) → '0,2-3'"""
+    parts = []
+    for core in sorted(cores):
+        if parts and core == parts[-1][1] + 1:
+            parts[-1][1] = core
+        else:
+            parts.append([core, core])
+    return ','.join(str(a) if a == b else f"{a}-{b}" for a, b in parts)
+
+
+def parse_layout(spec):
+    """Spec string ('torch=3;inference=1-3;...', '' or 'default') → Layout"""
+    values = {}
+    if (spec or '').strip() == 'default':
+        return DEFAULT_LAYOUT
+    for item in (spec or '').split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        key, _, value = item.partition('=')
+        field = SPEC_KEYS.get(key.strip())
+        if field is None:
+            raise ValueError(f"Unknown layout key '{key}' (expected {', '.join(SPEC_KEYS)})")
+        values[field] = int(value) if field.endswith('_threads') else parse_cores(value)
+    return DEFAULT_LAYOUT._replace(**values)
+
+
+def format_layout(layout):
+    """Layout → spec string (inverse of parse_layout)"""
+    parts = []
+    for key, field in SPEC_KEYS.items():
+        value = getattr(layout, field)
+        if value is None:
+            continue
+        parts.append(f"{key}={value if field.endswith('_threads') else format_cores(value)}")
+    return ';'.join(parts) or 'default'
+
+
+def available_cores():
+    """Cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return tuple(sorted(os.sched_getaffinity(0)))
+    return tuple(range(os.cpu_count() or 1))
+
+
+def role_for(thread_name):
+    for role, prefixes in ROLE_THREADS.items():
+        if thread_name.startswith(prefixes):
+            return role
+    return UNKNOWN_ROLE
+
+
+class AffinityManager:
+    """Applies a Layout to this process and keeps new threads pinned
+
+    Threads inherit the mask of the thread that starts them, so pool workers
+    spawned lazily from the main (inference) thread would land on inference
+    cores; maybe_refresh() re-pins them once per change in thread count.
+    """
+
+    def __init__(self, layout=DEFAULT_LAYOUT):
+        if isinstance(layout, str):
+            layout = parse_layout(layout)
+        self.layout = layout
+        self.pinning = hasattr(os, 'sched_setaffinity') and any(getattr(layout, role) for role in ROLES)
+        self.all_cores = available_cores()
+        self.pinned = {}                # native thread id → cores
+        self.thread_count = 0
+        self.errors = 0
+
+    def apply(self):
+        """Set pool sizes and pin the calling (inference) thread
+
+        Call before the model is loaded so torch's intra-op workers are
+        created with the right count and inherit the inference cores.
+        """
+        if self.layout.torch_threads:
+            import torch
+            torch.set_num_threads(self.layout.torch_threads)
+        if self.layout.opencv_threads is not None:
+            import cv2
+            cv2.setNumThreads(self.layout.opencv_threads)
+        if self.pinning and self.layout.inference:
+            self._pin(threading.get_native_id(), self.layout.inference)
+        return self
+
+    def cores_for(self, role):
+        """Role's cores; unpinned roles get back the full set a pinned parent took away"""
+        return getattr(self.layout, role) or self.all_cores
+
+    def _pin(self, tid, cores):
+        if self.pinned.get(tid) == cores:
+            return
+        try:
+            os.sched_setaffinity(tid, cores)
+            self.pinned[tid] = cores
+        except OSError:
+            self.errors += 1        # Thread exited, or core not allowed
+
+    def refresh(self):
+        """Pin every current thread to its role's cores"""
+        self.thread_count = threading.active_count()
+        if not self.pinning:
+            return
+        known = set()
+        for thread in threading.enumerate():
+            if thread.native_id is None:
+                continue
+            known.add(thread.native_id)
+            self._pin(thread.native_id, self.cores_for(role_for(thread.name)))
+
+        try:
+            tids = [int(tid) for tid in os.listdir('/proc/self/task')]
+        except OSError:
+            tids = list(known)
+        for tid in tids:
+            if tid not in known:
+                self._pin(tid, self.cores_for(NATIVE_ROLE))
+
+        # Forget threads that have exited
+        alive = known.union(tids)
+        self.pinned = {tid: cores for tid, cores in self.pinned.items() if tid in alive}
+
+    def maybe_refresh(self):
+        """Cheap per-frame check: refresh only when Python threads came or went"""
+        if self.pinning and threading.active_count() != self.thread_count:
+            self.refresh()
+
+    def describe(self):
+        layout = self.layout
+        print(f"  Pools: torch={layout.torch_threads or 'default'} | opencv="
+              f"{'default' if layout.opencv_threads is None else layout.opencv_threads}")
+        if not any(getattr(layout, role) for role in ROLES):
+            print("  Pinning: off")
+        elif not self.pinning:
+            print("  Pinning: not supported on this OS (pool sizes only)")
+        else:
+            print("  Pinning: " + ' | '.join(f"{role}={format_cores(getattr(layout, role))}"
+                                             for role in ROLES if getattr(layout, role)))
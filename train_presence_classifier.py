@@ -0,0 +1,228 @@
+"""
+Presence Classifier Training - Cascade First Stage
+Builds a present/absent crop dataset from the Roboflow labels (plus optional
+background footage) and trains a tiny YOLOv11 classifier for CPU gating
+"""
+from ultralytics import YOLO
+from multiprocessing import Pool
+from pathlib import Path
+import argparse
+import multiprocessing
+import os
+import random
+import cv2
+import numpy as np
+import torch
+import yaml
+
+DATA_YAML = 'data_roboflow.yaml'
+DATASET_DIR = 'runs/presence/dataset'
+CROP_SIZE = 128                 # Stored crop size (training resizes to IMGSZ)
+IMGSZ = 96
+EPOCHS = 30
+MAX_IMAGES_PER_SPLIT = 4000     # Enough variety for a 2-class gate
+NEGATIVES_PER_IMAGE = 2
+MAX_BOX_OVERLAP = 0.05          # Max fraction of any box allowed inside a negative crop
+MASK_PADDING = 0.15             # Box growth (per side, fraction of box size) before masking
+MAX_MASKED_AREA = 0.4           # Skip full-frame negatives where the masked boxes cover more than this
+MASK_SIZE = 256                 # Long side the frame is downscaled to before inpainting
+
+SPLITS = {'train': 'train', 'val': 'val'}       # dataset folder → data YAML key
+
+
+def read_boxes(image_path, width, height):
+    """YOLO label file → pixel xyxy boxes"""
+    label_path = Path(str(image_path).replace(f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}")).with_suffix('.txt')
+    boxes = []
+    if label_path.exists():
+        for line in label_path.read_text().splitlines():
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cx, cy, w, h = (float(v) for v in parts[1:5])
+            boxes.append(((cx - w / 2) * width, (cy - h / 2) * height, (cx + w / 2) * width, (cy + h / 2) * height))
+    return np.array(boxes).reshape(-1, 4)
+
+
+def max_overlap(crop, boxes):
+    """Largest fraction of any box that falls inside the crop"""
+    if not len(boxes):
+        return 0.0
+    x1, y1, x2, y2 = crop
+    iw = (np.minimum(boxes[:, 2], x2) - np.maximum(boxes[:, 0], x1)).clip(0)
+    ih = (np.minimum(boxes[:, 3], y2) - np.maximum(boxes[:, 1], y1)).clip(0)
+    areas = ((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])).clip(1e-6)
+    return float((iw * ih / areas).max())
+
+
+def save_crop(image, crop, path):
+    x1, y1, x2, y2 = (int(v) for v in crop)
+    patch = image[max(y1, 0):y2, max(x1, 0):x2]
+    if patch.size:
+        cv2.imwrite(str(path), cv2.resize(patch, (CROP_SIZE, CROP_SIZE), interpolation=cv2.INTER_AREA))
+
+
+def masked_frame(image, boxes):
+    """Whole frame with the labeled items inpainted away, or None if they cover too much of it
+
+    Gives the gate full-frame "absent" samples at the scale it sees at
+    runtime - otherwise only zoomed crops are absent and full frames are
+    (almost) always present, so frame scale alone would predict the label.
+    """
+    height, width = image.shape[:2]
+    scale = MASK_SIZE / max(height, width)
+    small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    mask = np.zeros(small.shape[:2], dtype=np.uint8)
+    for x1, y1, x2, y2 in boxes:
+        pad_x, pad_y = (x2 - x1) * MASK_PADDING, (y2 - y1) * MASK_PADDING
+        cv2.rectangle(mask, (int((x1 - pad_x) * scale), int((y1 - pad_y) * scale)),
+                      (int((x2 + pad_x) * scale), int((y2 + pad_y) * scale)), 255, -1)
+    if (mask > 0).mean() > MAX_MASKED_AREA:
+        return None
+    return cv2.inpaint(small, mask, 5, cv2.INPAINT_TELEA)
+
+
+def extract(job):
+    """Positive (whole frame + context crops) and negative (empty crops + masked whole frame) samples for one image"""
+    image_path, out_dir, seed = job
+    rng = random.Random(seed)
+    image = cv2.imread(str(image_path))
+    if image is None:
+        return 0, 0
+    height, width = image.shape[:2]
+    boxes = read_boxes(image_path, width, height)
+    stem = Path(image_path).stem
+    positives = negatives = 0
+
+    if len(boxes):
+        # Whole downscaled frame, as the gate sees it in the app
+        save_crop(image, (0, 0, width, height), Path(out_dir) / 'present' / f"{stem}_full.jpg")
+        positives += 1
+        # Item with surrounding context at a random scale
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            scale = rng.uniform(1.3, 2.5)
+            cx, cy, half = (x1 + x2) / 2, (y1 + y2) / 2, max(x2 - x1, y2 - y1) * scale / 2
+            save_crop(image, (cx - half, cy - half, cx + half, cy + half),
+                      Path(out_dir) / 'present' / f"{stem}_ctx{i}.jpg")
+            positives += 1
+
+    for attempt in range(NEGATIVES_PER_IMAGE * 10):
+        if negatives >= NEGATIVES_PER_IMAGE:
+            break
+        size = rng.uniform(0.3, 0.6) * min(width, height)
+        x1, y1 = rng.uniform(0, width - size), rng.uniform(0, height - size)
+        crop = (x1, y1, x1 + size, y1 + size)
+        if max_overlap(crop, boxes) <= MAX_BOX_OVERLAP:
+            save_crop(image, crop, Path(out_dir) / 'absent' / f"{stem}_bg{negatives}.jpg")
+            negatives += 1
+    if not len(boxes):
+        save_crop(image, (0, 0, width, height), Path(out_dir) / 'absent' / f"{stem}_full.jpg")
+        negatives += 1
+    else:
+        # Same frame with the items removed: a full-frame negative
+        masked = masked_frame(image, boxes)
+        if masked is not None:
+            save_crop(masked, (0, 0, masked.shape[1], masked.shape[0]), Path(out_dir) / 'absent' / f"{stem}_masked.jpg")
+            negatives += 1
+    return positives, negatives
+
+
+def is_full_frame(path):
+    """Whole-frame samples (what the gate sees in the app), as opposed to zoomed crops"""
+    return path.stem.endswith(('_full', '_masked')) or path.stem.startswith('site_')
+
+
+def full_frame_accuracy(model, split_dir, imgsz):
+    """Per-label accuracy on whole-frame samples only → {label: (correct, total)}"""
+    results = {}
+    for label in ('present', 'absent'):
+        paths = sorted(p for p in (Path(split_dir) / label).glob('*.jpg') if is_full_frame(p))
+        correct = 0
+        for i in range(0, len(paths), 256):
+            for result in model.predict([str(p) for p in paths[i:i + 256]], imgsz=imgsz, verbose=False):
+                correct += result.names[result.probs.top1] == label
+        results[label] = (correct, len(paths))
+    return results
+
+
+def add_background_footage(folder, out_dir, split_ratio=0.9):
+    """Site footage with no waste (hands, people, empty chute) → absent"""
+    images = sorted(p for p in Path(folder).rglob('*') if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    count = 0
+    for i, path in enumerate(images):
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        split = 'train' if (i % 10) < split_ratio * 10 else 'val'
+        height, width = image.shape[:2]
+        save_crop(image, (0, 0, width, height), Path(out_dir) / split / 'absent' / f"site_{i}.jpg")
+        count += 1
+    return count
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description='Train the cascade presence classifier')
+    parser.add_argument('--data', default=DATA_YAML)
+    parser.add_argument('--background', help='Folder of waste-free site frames (hands, people, empty chute)')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--imgsz', type=int, default=IMGSZ)
+    parser.add_argument('--skip-extract', action='store_true', help='Reuse an existing crop dataset')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("PRESENCE CLASSIFIER TRAINING - CASCADE STAGE 1")
+    print("="*80)
+
+    if not args.skip_extract:
+        with open(args.data, 'r') as f:
+            data = yaml.safe_load(f)
+        root = Path(data['path'])
+        print(f"\n📦 Building crop dataset in {DATASET_DIR}...")
+        for split, key in SPLITS.items():
+            images = sorted(p for p in (root / data[key]).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+            random.Random(42).shuffle(images)
+            images = images[:MAX_IMAGES_PER_SPLIT]
+            out_dir = Path(DATASET_DIR) / split
+            for label in ('present', 'absent'):
+                (out_dir / label).mkdir(parents=True, exist_ok=True)
+            with Pool(os.cpu_count()) as pool:
+                counts = pool.map(extract, [(p, out_dir, i) for i, p in enumerate(images)], chunksize=32)
+            positives = sum(c[0] for c in counts)
+            negatives = sum(c[1] for c in counts)
+            print(f"  {split:<6} present: {positives:>6} | absent: {negatives:>6}  ({len(images)} source images)")
+
+        if args.background:
+            added = add_background_footage(args.background, DATASET_DIR)
+            print(f"  + {added} site background frames → absent")
+
+    print(f"\n🔧 Training YOLOv11n-cls @ {args.imgsz}px...")
+    model = YOLO('yolo11n-cls.pt')
+    model.train(
+        data=DATASET_DIR,
+        epochs=args.epochs,
+        imgsz=args.imgsz,
+        batch=256,
+        device=0 if torch.cuda.is_available() else 'cpu',
+        workers=0,
+        project='runs/presence',
+        name='presence_cls',
+        exist_ok=True,
+        seed=42,
+        patience=10,
+    )
+
+    metrics = model.val(data=DATASET_DIR, imgsz=args.imgsz)
+    print(f"\n{'='*80}")
+    print("✅ PRESENCE CLASSIFIER READY")
+    print("="*80)
+    print(f"  Top-1 accuracy: {metrics.top1 * 100:.2f}%")
+    # The app gates on whole frames, so that accuracy matters most
+    for label, (correct, total) in full_frame_accuracy(model, Path(DATASET_DIR) / 'val', args.imgsz).items():
+        if total:
+            print(f"  Full frames, {label + ':':<9} {correct / total * 100:.2f}% ({correct}/{total})")
+    print(f"  Weights: runs/presence/presence_cls/weights/best.pt")
+    print(f"\nEnable it with CASCADE_ENABLED = True in smart_dustbin_smooth.py")
+    print(f"Measure savings with: python benchmark_cascade.py <recorded footage>")
+    print("="*80)
@@ -4,9 +4,15 @@ High-quality paper and plastic bottle detection
 11,639 training images with professional labels
 """
 from ultralytics import YOLO
+from inference_server import InferenceClient, SERVER_ADDRESS
 import multiprocessing
 import torch
 
+# Packed dataset from `python packed_dataset.py`: one memory-mapped array per
+# split instead of re-decoding every JPEG each epoch (same labels, same resize).
+# None = read the Roboflow folders.
+PACKED_DATA = None              # e.g. 'packed/roboflow_640/data_packed.yaml'
+
 if __name__ == '__main__':
     multiprocessing.freeze_support()
     
@@ -74,6 +80,13 @@ if __name__ == '__main__':
         'val': True,                # Validate during training
         'plots': True,              # Generate plots
     }
+    data_yaml = PACKED_DATA or 'data_roboflow.yaml'
+    config['data'] = data_yaml
+    trainer = validator = None      # Stock Ultralytics loaders for the folders
+    if PACKED_DATA:
+        from packed_dataset import PackedTrainer, PackedValidator
+        trainer, validator = PackedTrainer, PackedValidator
+        print(f"  data: {PACKED_DATA} (packed, memory-mapped)")
     
     for key, value in config.items():
         if key not in ['data', 'project', 'name']:
@@ -88,7 +101,7 @@ if __name__ == '__main__':
     print(f"📈 This will be MUCH better than previous 48.98%\n")
     
     # Train
-    results = model.train(**config)
+    results = model.train(trainer=trainer, **config)
     
     # Training complete
     print(f"\n{'='*80}")
@@ -108,7 +121,7 @@ if __name__ == '__main__':
     print("TESTING ON TEST SET...")
     print("="*80)
     
-    test_results = model.val(data='data_roboflow.yaml', split='test')
+    test_results = model.val(data=data_yaml, split='test', validator=validator)
     
     print(f"\n📊 Test Set Results:")
     print(f"  mAP50: {test_results.results_dict.get('metrics/mAP50(B)', 0)*100:.2f}%")
@@ -124,6 +137,15 @@ if __name__ == '__main__':
     print(f"Last model: runs/train/roboflow_fresh/weights/last.pt")
     print(f"\n📈 Training plots: runs/train/roboflow_fresh/")
     
+    # Hand the new weights to a running inference server (clients keep their connection)
+    try:
+        client = InferenceClient(SERVER_ADDRESS, timeout=3)
+        client.reload('runs/train/roboflow_fresh/weights/best.pt')
+        client.close()
+        print(f"\n🔄 Inference server at {SERVER_ADDRESS} is loading the new best.pt")
+    except OSError:
+        print(f"\n  (No inference server running at {SERVER_ADDRESS} - nothing to reload)")
+    
     print(f"\n{'='*80}")
     print("NEXT STEP: Test with webcam")
     print("="*80)
@@ -0,0 +1,264 @@
+"""
+Voice Command Matcher
+Scores the recognizer's N-best hypotheses against a per-bin vocabulary
+(route name, detector classes and `voice:` synonyms in bin_routes.yaml)
+by spelling and by a phonetic key, so "plastik", "pay per" or "bottle"
+still open the right bin instead of costing another listen cycle.
+
+The vocabulary is precomputed into inverted n-gram indexes (n-gram → phrase
+ids); one match counts shared n-grams with a bincount over all word spans of
+all hypotheses, so its cost follows the postings hit, not the vocabulary size.
+
+    python voice_matcher.py voice_corpus.jsonl      (accept/reject report)
+
+Corpus lines: {"hypotheses": [["plastik", 0.82], ["plastic", null]], "expected": "plastic"}
+(`expected` null = should be rejected)
+"""
+from collections import namedtuple
+import re
+import time
+import numpy as np
+
+ACCEPT_SCORE = 0.65             # Minimum combined score to act
+MARGIN = 0.10                   # Best bin must beat the runner-up by this much
+PHONETIC_WEIGHT = 0.5           # Phonetic vs spelling similarity
+CONF_WEIGHT = 0.5               # score × confidence**CONF_WEIGHT
+RANK_DECAY = 0.9                # Confidence of alternatives the recognizer didn't score
+SPELLING_N = 3
+PHONETIC_N = 2
+
+Match = namedtuple('Match', 'bin score phrase text')
+
+# Ordered rewrite rules for the phonetic key (English spelling → sound class)
+PHONETIC_RULES = [
+    ('ph', 'f'), ('ck', 'k'), ('gh', ''), ('wh', 'w'), ('kn', 'n'), ('wr', 'r'), ('dg', 'j'),
+    ('ce', 'se'), ('ci', 'si'), ('cy', 'sy'), ('c', 'k'), ('q', 'k'), ('x', 'ks'), ('z', 's'),
+]
+VOWELS = re.compile(r'[aeiouy]+')
+REPEATS = re.compile(r'(.)\1+')
+NON_LETTERS = re.compile(r'[^a-z ]+')
+
+
+def normalize(text):
+    """Lowercase letters and single spaces"""
+    return ' '.join(NON_LETTERS.sub(' ', text.lower()).split())
+
+
+def phonetic(text):
+    """Phonetic key: words joined ("pay per" = "paper"), sound classes, vowel runs → 'a'"""
+    key = text.replace(' ', '')
+    for pattern, replacement in PHONETIC_RULES:
+        key = key.replace(pattern, replacement)
+    key = VOWELS.sub('a', key)
+    return REPEATS.sub(r'\1', key)
+
+
+def ngrams(text, n):
+    padded = f"^{text}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def features(text):
+    """Spelling and phonetic n-gram sets of a normalized phrase"""
+    return ngrams(text, SPELLING_N), ngrams(phonetic(text), PHONETIC_N)
+
+
+class NgramIndex:
+    """Inverted n-gram → phrase ids index with phrase sizes, for cosine over n-gram sets"""
+
+    def __init__(self, grams_per_phrase):
+        postings = {}
+        for row, grams in enumerate(grams_per_phrase):
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+        self.postings = {gram: np.array(rows, dtype=np.intp) for gram, rows in postings.items()}
+        self.sizes = np.array([len(grams) for grams in grams_per_phrase], dtype=np.float32)
+
+    def similarity(self, grams_per_query):
+        """(queries × phrases) cosine similarity"""
+        phrases = len(self.sizes)
+        hits = [np.empty(0, dtype=np.intp)]
+        sizes = np.empty(len(grams_per_query), dtype=np.float32)
+        for row, grams in enumerate(grams_per_query):
+            sizes[row] = len(grams)
+            # Offset phrase ids by query row so one bincount fills the whole matrix
+            hits.extend(self.postings[g] + row * phrases for g in grams if g in self.postings)
+        overlap = np.bincount(np.concatenate(hits), minlength=len(grams_per_query) * phrases)
+        overlap = overlap.reshape(len(grams_per_query), phrases).astype(np.float32)
+        return overlap / np.sqrt(sizes[:, None] * self.sizes[None, :])
+
+
+class VoiceMatcher:
+    """Bin name ← best-scoring vocabulary phrase over all hypotheses and word spans"""
+
+    def __init__(self, vocabulary, accept=ACCEPT_SCORE, margin=MARGIN):
+        self.accept = accept
+        self.margin = margin
+        self.bins = list(vocabulary)
+        self.vocabulary = {}
+        self.phrases = []
+        self.phrase_bin = []
+        for index, (bin_name, phrases) in enumerate(vocabulary.items()):
+            self.vocabulary[bin_name] = [p for p in dict.fromkeys(normalize(p) for p in phrases) if p]
+            for phrase in self.vocabulary[bin_name]:
+                self.phrases.append(phrase)
+                self.phrase_bin.append(index)
+        self.phrase_bin = np.array(self.phrase_bin)
+        self.bin_rows = [np.nonzero(self.phrase_bin == i)[0] for i in range(len(self.bins))]
+        grams = [features(phrase) for phrase in self.phrases]
+        self.spelling = NgramIndex([g[0] for g in grams])
+        self.phonetic = NgramIndex([g[1] for g in grams])
+        self.max_words = max(len(phrase.split()) for phrase in self.phrases) + 1   # +1: "pay per"
+        self.last_scores = {}
+
+    @classmethod
+    def from_router(cls, router, **kwargs):
+        """Vocabulary per route: name, detector classes and `voice:` synonyms"""
+        return cls({route.name: (route.name,) + route.classes + route.voice for route in router.routes}, **kwargs)
+
+    def spans(self, text):
+        words = normalize(text).split()
+        return [' '.join(words[i:j]) for i in range(len(words))
+                for j in range(i + 1, min(len(words), i + self.max_words) + 1)]
+
+    def scores(self, hypotheses):
+        """Per-bin best score, and the (phrase, text) behind it, over N-best (text, confidence) pairs"""
+        spans, weights, sources = [], [], []
+        top_conf = hypotheses[0][1] if hypotheses and hypotheses[0][1] is not None else 1.0
+        for rank, (text, conf) in enumerate(hypotheses):
+            if conf is None:
+                conf = top_conf * RANK_DECAY ** rank
+            for span in self.spans(text):
+                spans.append(span)
+                weights.append(conf ** CONF_WEIGHT)
+                sources.append(text)
+        best = np.zeros(len(self.bins), dtype=np.float32)
+        behind = [None] * len(self.bins)
+        if not spans:
+            return best, behind
+
+        grams = [features(span) for span in spans]
+        similarity = ((1 - PHONETIC_WEIGHT) * self.spelling.similarity([g[0] for g in grams])
+                      + PHONETIC_WEIGHT * self.phonetic.similarity([g[1] for g in grams]))
+        similarity *= np.asarray(weights, dtype=np.float32)[:, None]
+
+        # Best (span, phrase) per bin
+        flat = similarity.argmax(axis=0)                # Best span for every phrase
+        phrase_scores = similarity[flat, np.arange(len(self.phrases))]
+        for index, rows in enumerate(self.bin_rows):
+            top = rows[phrase_scores[rows].argmax()]
+            best[index] = phrase_scores[top]
+            behind[index] = (self.phrases[top], sources[flat[top]])
+        return best, behind
+
+    def match(self, hypotheses):
+        """Match for [(text, confidence or None), ...] best first, or None (rejected)"""
+        best, behind = self.scores(hypotheses)
+        self.last_scores = dict(zip(self.bins, best.tolist()))
+        if not len(best):
+            return None
+        order = np.argsort(best)[::-1]
+        top = order[0]
+        runner_up = best[order[1]] if len(order) > 1 else 0.0
+        if best[top] < self.accept or best[top] - runner_up < self.margin:
+            return None
+        phrase, text = behind[top]
+        return Match(self.bins[top], float(best[top]), phrase, text)
+
+
+def hypotheses_from_google(result):
+    """recognize_google(..., show_all=True) result → [(text, confidence or None), ...]"""
+    if not result:
+        return []
+    return [(alt['transcript'], alt.get('confidence')) for alt in result.get('alternative', [])]
+
+
+def keyword_vocabulary(router):
+    """The previous command keywords per route: name and detector classes (no `voice:` synonyms)"""
+    return {route.name: (route.name,) + route.classes for route in router.routes}
+
+
+def substring_match(vocabulary, hypotheses):
+    """The previous behaviour: first keyword contained in the top hypothesis"""
+    if not hypotheses:
+        return None
+    text = hypotheses[0][0].lower()
+    keywords = sorted(((k, b) for b, phrases in vocabulary.items() for k in phrases), key=lambda kb: -len(kb[0]))
+    for keyword, bin_name in keywords:
+        if keyword in text:
+            return bin_name
+    return None
+
+
+def evaluate(matcher, corpus, keywords):
+    """Accept/reject counts for the matcher and the substring baseline over `keywords`"""
+    results = {}
+    timings = []
+    for name in ('matcher', 'substring'):
+        counts = {'correct': 0, 'wrong_bin': 0, 'false_accept': 0, 'false_reject': 0, 'true_reject': 0}
+        for sample in corpus:
+            hypotheses = [tuple(h) for h in sample['hypotheses']]
+            if name == 'matcher':
+                start = time.perf_counter()
+                match = matcher.match(hypotheses)
+                timings.append((time.perf_counter() - start) * 1e6)
+                predicted = match.bin if match else None
+            else:
+                predicted = substring_match(keywords, hypotheses)
+            expected = sample.get('expected')
+            if expected is None:
+                counts['false_accept' if predicted else 'true_reject'] += 1
+            elif predicted is None:
+                counts['false_reject'] += 1
+            else:
+                counts['correct' if predicted == expected else 'wrong_bin'] += 1
+        results[name] = counts
+    return results, np.array(timings)
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from bin_routing import BinRouter, ROUTES_FILE
+
+    parser = argparse.ArgumentParser(description='Voice matcher accept/reject report on a corpus')
+    parser.add_argument('corpus', help='JSON lines: {"hypotheses": [[text, conf], ...], "expected": bin or null}')
+    parser.add_argument('--routes', default=ROUTES_FILE)
+    parser.add_argument('--accept', type=float, nargs='+', default=[ACCEPT_SCORE])
+    parser.add_argument('--margin', type=float, default=MARGIN)
+    args = parser.parse_args()
+
+    router = BinRouter.load(args.routes)
+    router.close()
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    in_vocab = sum(1 for s in corpus if s.get('expected') is not None)
+    # The baseline is the old matcher as it was: only route names and classes, no synonyms
+    keywords = keyword_vocabulary(router)
+
+    print("="*80)
+    print("VOICE MATCHER - CORPUS REPORT")
+    print("="*80)
+    print(f"  Corpus: {len(corpus)} utterances ({in_vocab} commands, {len(corpus) - in_vocab} should be rejected)")
+
+    rows = []
+    for accept in args.accept:
+        matcher = VoiceMatcher.from_router(router, accept=accept, margin=args.margin)
+        results, timings = evaluate(matcher, corpus, keywords)
+        rows.append((f"matcher @ {accept:.2f}", results['matcher'], timings))
+    rows.insert(0, ('substring (old)', results['substring'], None))
+    print(f"  Vocabulary: {len(matcher.phrases)} phrases over {len(matcher.bins)} bins")
+
+    print(f"\n{'Matcher':<18} {'Accept':<9} {'Correct':<9} {'Wrong bin':<11} {'False acc':<11} {'False rej':<11} {'µs p50/p99':<12}")
+    print("-"*80)
+    for label, counts, timings in rows:
+        commands = max(1, in_vocab)
+        negatives = max(1, len(corpus) - in_vocab)
+        accepted = counts['correct'] + counts['wrong_bin'] + counts['false_accept']
+        timing_text = f"{np.percentile(timings, 50):.0f} / {np.percentile(timings, 99):.0f}" if timings is not None else '-'
+        print(f"{label:<18} {accepted / len(corpus):<9.1%} {counts['correct'] / commands:<9.1%} "
+              f"{counts['wrong_bin'] / commands:<11.1%} {counts['false_accept'] / negatives:<11.1%} "
+              f"{counts['false_reject'] / commands:<11.1%} {timing_text:<12}")
+    print("="*80)
@@ -2,7 +2,8 @@
 Fresh Webcam Inference - Roboflow Trained Model
 High-accuracy real-time detection for smart dustbin
 """
-from ultralytics import YOLO
+from frame_sources import CameraCapture
+from inference_server import InferenceClient
 import cv2
 import time
 
@@ -11,19 +12,49 @@ print("SMART DUSTBIN - FRESH MODEL")
 print("Paper and Plastic Bottle Detection")
 print("="*80)
 
-# Load the NEW trained model
-model = YOLO('runs/train/roboflow_fresh/weights/best.pt')
+# Inference backend: local model, or a running inference_server.py
+# (its SERVER_ADDRESS, e.g. 'unix:/tmp/dustbin_inference.sock' - this script then starts without loading torch)
+INFERENCE_SERVER_ADDRESS = None
+MODEL_PATH = 'runs/train/roboflow_fresh/weights/best.pt'
 
-print(f"\n✓ Model loaded: Fresh Roboflow trained model")
-print(f"  Classes: {model.names}")
+if INFERENCE_SERVER_ADDRESS:
+    client = InferenceClient(INFERENCE_SERVER_ADDRESS)
+    names = client.names
+    print(f"\n✓ Connected to inference server: {INFERENCE_SERVER_ADDRESS}")
+    print(f"  Model: {client.weights}")
+else:
+    from ultralytics import YOLO
+    from inference_buffers import LetterboxBuffers, warm_up
+    client = None
+    # Load the NEW trained model
+    model = YOLO(MODEL_PATH)
+    names = model.names
+    print(f"\n✓ Model loaded: Fresh Roboflow trained model")
+print(f"  Classes: {names}")
 print(f"  Expected confidence: 70-85%")
 
-# Open webcam
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+# Camera capture settings
+CAMERA_INDEX = 0
+CAMERA_FPS = 30
+CAMERA_BUFFER_SIZE = 1    # Driver-side frame queue (1 = freshest frame)
+DECODE_THREADS = 2        # MJPEG decode pool (0 = decode in driver)
+
+# Open webcam (MJPEG negotiated explicitly, frames grabbed on a background thread)
+cap = CameraCapture(CAMERA_INDEX, 1280, 720, fps=CAMERA_FPS,
+                    buffer_size=CAMERA_BUFFER_SIZE, decode_threads=DECODE_THREADS).open()
 
 print(f"\n✓ Webcam opened")
+print(f"  Format: {cap.negotiated['fourcc']} {cap.negotiated['width']}x{cap.negotiated['height']} "
+      f"@ {cap.negotiated['fps']:.0f} fps | buffer={cap.negotiated['buffer_size']} | decode={cap.negotiated['decode']}")
+
+# Warm-up with dummy frames of the deployed size + preallocated input buffers,
+# so the first real frame doesn't pay for lazy init and allocator growth
+INFERENCE_IMGSZ = 640
+WARMUP_RUNS = 10
+if client is None:
+    buffers = LetterboxBuffers((cap.negotiated['height'] or 720, cap.negotiated['width'] or 1280, 3), INFERENCE_IMGSZ)
+    warmup_time = warm_up(model, buffers, WARMUP_RUNS)
+    print(f"✓ Model warmed up ({WARMUP_RUNS} runs in {warmup_time:.1f}s, input {tuple(buffers.tensor.shape)})")
 print(f"\n{'='*80}")
 print("CONTROLS:")
 print("  SPACE - Pause/Resume")
@@ -51,11 +82,15 @@ while True:
         if not ret:
             break
         
-        # Run inference
-        results = model(frame, conf=CONF_THRESHOLD, verbose=False)
-        
-        # Get detections
-        boxes = results[0].boxes
+        # Run inference (boxes come back in frame coordinates either way)
+        if client:
+            classes, confidences, frame_boxes = client.predict(frame, CONF_THRESHOLD)
+        else:
+            results = model(buffers.prepare(frame), conf=CONF_THRESHOLD, verbose=False)
+            boxes = results[0].boxes
+            classes = boxes.cls.cpu().numpy().astype(int)
+            confidences = boxes.conf.cpu().numpy()
+            frame_boxes = buffers.scale_boxes(boxes.xyxy.cpu().numpy())
         
         # Calculate FPS
         frame_count += 1
@@ -68,12 +103,9 @@ while True:
         # Process detections
         detections = {'paper': [], 'plastic bottle': []}
         
-        for box in boxes:
-            cls = int(box.cls[0])
-            conf = float(box.conf[0])
-            class_name = model.names[cls]
-            
-            xyxy = box.xyxy[0].cpu().numpy()
+        for cls, conf, xyxy in zip(classes, confidences, frame_boxes):
+            conf = float(conf)
+            class_name = names[int(cls)]
             x1, y1, x2, y2 = map(int, xyxy)
             
             # Calculate size
@@ -164,6 +196,8 @@ while True:
 
 cap.release()
 cv2.destroyAllWindows()
+if client:
+    client.close()
 
 print("\n" + "="*80)
 print("DETECTION STOPPED")